@@ -1,10 +1,20 @@
 from django.urls import path
 
+from core.pagecache import cache_page_with_holes
+
 from . import views
 
 app_name = 'about'
 
 urlpatterns = [
-    path('author/', views.AboutAuthorView.as_view(), name='author'),
-    path('tech/', views.AboutTechView.as_view(), name='tech'),
+    path(
+        'author/',
+        cache_page_with_holes(views.AboutAuthorView.as_view()),
+        name='author'
+    ),
+    path(
+        'tech/',
+        cache_page_with_holes(views.AboutTechView.as_view()),
+        name='tech'
+    ),
 ]
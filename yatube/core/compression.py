@@ -0,0 +1,68 @@
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+RUNTIME_LEVELS = {'br': 5, 'gzip': 6}
+INCOMPRESSIBLE_TYPES = (
+    'image/', 'video/', 'audio/', 'font/woff', 'application/zip',
+    'application/gzip', 'application/x-gzip', 'application/pdf',
+    'application/octet-stream',
+)
+
+
+def compress(data, encoding, fast=False):
+    if encoding == 'br':
+        if fast:
+            return brotli.compress(data, quality=RUNTIME_LEVELS['br'])
+        return brotli.compress(data)
+    level = RUNTIME_LEVELS['gzip'] if fast else 9
+    return gzip.compress(data, compresslevel=level)
+
+
+def compress_sequence(sequence, encoding):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=RUNTIME_LEVELS['br'])
+        for item in sequence:
+            compressor.process(item)
+            data = compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(
+        RUNTIME_LEVELS['gzip'], zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for item in sequence:
+        data = compressor.compress(item) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def is_compressible(content_type):
+    return not content_type.lower().startswith(INCOMPRESSIBLE_TYPES)
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, которые мы умеем отдавать, по порядку."""
+    accepted = {}
+    for item in header.split(','):
+        token, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip().lower()] = quality
+    wildcard = accepted.get('*', 0.0)
+    return [
+        encoding for encoding in ENCODINGS
+        if accepted.get(encoding, wildcard) > 0
+    ]
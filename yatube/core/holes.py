@@ -0,0 +1,37 @@
+import json
+import re
+
+from django.template.loader import render_to_string
+
+HOLES = {}
+MARKER_RE = re.compile(r'<!--hole:(\{.*?\})-->')
+
+
+def register(name, template):
+    def decorator(get_context):
+        HOLES[name] = (template, get_context)
+        return get_context
+    return decorator
+
+
+def render_hole(request, name, **kwargs):
+    template, get_context = HOLES[name]
+    return render_to_string(
+        template, get_context(request, **kwargs), request=request)
+
+
+def hole_marker(name, **kwargs):
+    payload = json.dumps({'name': name, 'kwargs': kwargs})
+    return '<!--hole:{}-->'.format(payload.replace('>', '\\u003e'))
+
+
+def fill_holes(request, content):
+    def fill(match):
+        payload = json.loads(match.group(1))
+        return render_hole(request, payload['name'], **payload['kwargs'])
+    return MARKER_RE.sub(fill, content)
+
+
+@register('header', 'includes/header.html')
+def header_context(request):
+    return {}
@@ -0,0 +1,38 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from core.ratelimit import ratelimit
+
+
+class Command(BaseCommand):
+    help = 'Замеряет накладные расходы ограничителя запросов на один запрос'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=10000)
+        parser.add_argument('--clients', type=int, default=100)
+
+    def handle(self, *args, **options):
+        requests_count = options['requests']
+        factory = RequestFactory()
+        requests = []
+        for number in range(options['clients']):
+            request = factory.post('/', REMOTE_ADDR=f'10.0.{number}.1')
+            request.user = AnonymousUser()
+            requests.append(request)
+
+        def view(request):
+            return HttpResponse()
+
+        limited = ratelimit('benchmark', f'{requests_count}/s')(view)
+        for func, label in ((view, 'без лимита'), (limited, 'с лимитом')):
+            started = time.perf_counter()
+            for number in range(requests_count):
+                func(requests[number % len(requests)])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{label}: {elapsed / requests_count * 1e6:.1f} мкс/запрос'
+            )
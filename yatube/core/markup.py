@@ -0,0 +1,116 @@
+import re
+
+from django.utils.html import escape
+
+RENDERER_VERSION = 1
+
+FENCE_RE = re.compile(r'^```')
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*)$')
+BULLET_RE = re.compile(r'^[-*+]\s+(.*)$')
+NUMBER_RE = re.compile(r'^\d+[.)]\s+(.*)$')
+QUOTE_RE = re.compile(r'^&gt;\s?(.*)$')
+CODE_RE = re.compile(r'`([^`\n]+)`')
+LINK_RE = re.compile(r'\[([^\]\n]+)\]\(((?:https?://|mailto:|/)[^)\s]+)\)')
+STRONG_RE = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*')
+EMPHASIS_RE = re.compile(
+    r'(?<![\w*])[*_](?=\S)([^*_\n]+?)(?<=\S)[*_](?![\w*])')
+PLACEHOLDER_RE = re.compile('\x00(\\d+)\x00')
+
+
+def emphasize(text):
+    text = STRONG_RE.sub(r'<strong>\1</strong>', text)
+    return EMPHASIS_RE.sub(r'<em>\1</em>', text)
+
+
+def render_inline(text):
+    """Строчная разметка одной строки.
+
+    Код и ссылки заменяются метками, чтобы их содержимое не размечалось
+    повторно. Текст ссылки размечается с теми же метками и без вложенных
+    ссылок.
+    """
+    saved = []
+
+    def save(html):
+        saved.append(html)
+        return f'\x00{len(saved) - 1}\x00'
+
+    def restore(text):
+        return PLACEHOLDER_RE.sub(
+            lambda match: saved[int(match.group(1))], text)
+
+    text = CODE_RE.sub(
+        lambda match: save(f'<code>{match.group(1)}</code>'), text)
+    text = LINK_RE.sub(
+        lambda match: save(
+            f'<a href="{match.group(2)}" rel="nofollow">'
+            f'{restore(emphasize(match.group(1)))}</a>'
+        ),
+        text,
+    )
+    return restore(emphasize(text))
+
+
+def render_list(lines, pattern, tag):
+    items = ''.join(
+        f'<li>{render_inline(pattern.match(line).group(1))}</li>'
+        for line in lines
+    )
+    return f'<{tag}>{items}</{tag}>'
+
+
+def render_block(lines):
+    heading = HEADING_RE.match(lines[0])
+    if heading and len(lines) == 1:
+        level = min(len(heading.group(1)) + 2, 6)
+        return f'<h{level}>{render_inline(heading.group(2))}</h{level}>'
+    if all(BULLET_RE.match(line) for line in lines):
+        return render_list(lines, BULLET_RE, 'ul')
+    if all(NUMBER_RE.match(line) for line in lines):
+        return render_list(lines, NUMBER_RE, 'ol')
+    if all(QUOTE_RE.match(line) for line in lines):
+        inner = '\n'.join(QUOTE_RE.match(line).group(1) for line in lines)
+        return f'<blockquote>{render_blocks(inner)}</blockquote>'
+    return '<p>{}</p>'.format(
+        '<br>'.join(render_inline(line) for line in lines))
+
+
+def render_blocks(escaped):
+    html = []
+    block = []
+    code = None
+    for line in escaped.split('\n'):
+        if code is not None:
+            if FENCE_RE.match(line):
+                html.append('<pre><code>{}</code></pre>'.format(
+                    '\n'.join(code)))
+                code = None
+            else:
+                code.append(line)
+        elif FENCE_RE.match(line):
+            if block:
+                html.append(render_block(block))
+                block = []
+            code = []
+        elif line.strip():
+            block.append(line.rstrip())
+        elif block:
+            html.append(render_block(block))
+            block = []
+    if code is not None:
+        html.append('<pre><code>{}</code></pre>'.format('\n'.join(code)))
+    if block:
+        html.append(render_block(block))
+    return '\n'.join(html)
+
+
+def render_markdown(text):
+    """Безопасное подмножество Markdown в HTML.
+
+    Весь текст сначала экранируется, поэтому HTML из текста не проходит;
+    поддерживаются абзацы с переносами строк, заголовки, списки, цитаты,
+    блоки и фрагменты кода, жирный и курсив, ссылки http(s), mailto и
+    относительные.
+    """
+    text = (text or '').replace('\r\n', '\n').replace('\r', '\n')
+    return render_blocks(escape(text))
@@ -0,0 +1,143 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import constant_time_compare
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from .compression import (
+    SUFFIXES, accepted_encodings, compress, compress_sequence, is_compressible,
+)
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def user_cache_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+def get_cached_user(request):
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = request.session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    user = cache.get(user_cache_key(user_id))
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    if (user is not None and session_hash
+            and constant_time_compare(
+                session_hash, user.get_session_auth_hash())):
+        user.backend = backend_path
+        return user
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(
+            user_cache_key(user.pk), user, settings.USER_CACHE_TIMEOUT)
+    return user
+
+
+def get_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_cached_user(request)
+    return request._cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+
+
+class StaticFilesMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.root = settings.STATIC_ROOT
+        self.prefix = settings.STATIC_URL
+        self.immutable = set()
+        if hasattr(staticfiles_storage, 'immutable_names'):
+            self.immutable = staticfiles_storage.immutable_names()
+
+    def __call__(self, request):
+        if (self.root and request.path.startswith(self.prefix)
+                and request.method in ('GET', 'HEAD')):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        content_type, _ = mimetypes.guess_type(path)
+        encoding = None
+        for candidate in accepted_encodings(
+                request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            if os.path.isfile(path + SUFFIXES[candidate]):
+                encoding = candidate
+                break
+        response = FileResponse(
+            open(path + SUFFIXES[encoding] if encoding else path, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if os.path.normpath(name) in self.immutable:
+            response['Cache-Control'] = (
+                f'public, max-age={IMMUTABLE_MAX_AGE}, immutable')
+        else:
+            response['Cache-Control'] = 'public, max-age=60'
+        return response
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    min_length = 200
+
+    def process_response(self, request, response):
+        if (response.has_header('Content-Encoding')
+                or not is_compressible(response.get('Content-Type', ''))):
+            return response
+        if not response.streaming and len(response.content) < self.min_length:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encodings = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if not encodings:
+            return response
+        encoding = encodings[0]
+        if response.streaming:
+            response.streaming_content = compress_sequence(
+                response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            content = None
+            precompressed = getattr(response, 'precompressed', {})
+            if precompressed.get('identity') == response.content:
+                content = precompressed.get(encoding)
+            if content is None:
+                content = compress(response.content, encoding, fast=True)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
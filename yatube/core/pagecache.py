@@ -0,0 +1,98 @@
+import hashlib
+
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from .compression import ENCODINGS, compress
+from .holes import fill_holes
+
+GENERATION_KEY = 'pagecache:generation'
+
+
+def get_generation():
+    return cache.get_or_set(GENERATION_KEY, 1, None)
+
+
+def invalidate():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def page_cache_key(request):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f'pagecache:{get_generation()}:{url}'
+
+
+def anonymous_variant(request, entry):
+    """Дырки у всех анонимов одинаковы: заполняем и сжимаем их один раз."""
+    content = fill_holes(request, entry['content']).encode(entry['charset'])
+    variant = {'identity': content}
+    for encoding in ENCODINGS:
+        variant[encoding] = compress(content, encoding, fast=True)
+    return variant
+
+
+def fill_response(request, response, entry, key, cacheable):
+    patch_vary_headers(response, ('Cookie',))
+    if request.user.is_authenticated:
+        response.content = fill_holes(request, entry['content'])
+        patch_cache_control(response, private=True)
+        return response
+    if 'anonymous' not in entry:
+        entry['anonymous'] = anonymous_variant(request, entry)
+        if cacheable:
+            cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+    response.content = entry['anonymous']['identity']
+    response.precompressed = entry['anonymous']
+    return response
+
+
+def cache_page_with_holes(view_func=None, *, personal=None):
+    """Кэширует страницу одну на всех, дырки заполняются при ответе.
+
+    Если personal(request) истинно, страница этого пользователя своя:
+    она рисуется целиком и в общий кэш не попадает.
+    """
+    if view_func is None:
+        return lambda func: cache_page_with_holes(func, personal=personal)
+
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view_func(request, *args, **kwargs)
+        if personal is not None and personal(request):
+            response = view_func(request, *args, **kwargs)
+            patch_vary_headers(response, ('Cookie',))
+            patch_cache_control(response, private=True)
+            return response
+        key = page_cache_key(request)
+        entry = cache.get(key)
+        cacheable = True
+        if entry is None:
+            request.punch_holes = True
+            try:
+                response = view_func(request, *args, **kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+            finally:
+                request.punch_holes = False
+            if response.streaming:
+                return response
+            entry = {
+                'content': response.content.decode(response.charset),
+                'content_type': response['Content-Type'],
+                'charset': response.charset,
+            }
+            cacheable = response.status_code == 200 and not response.cookies
+            if cacheable:
+                cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+        else:
+            response = HttpResponse(content_type=entry['content_type'])
+        return fill_response(request, response, entry, key, cacheable)
+    return _wrapped_view
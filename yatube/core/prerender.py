@@ -0,0 +1,71 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import Resolver404, resolve
+
+from .compression import ENCODINGS, SUFFIXES, compress
+
+
+def page_file(path):
+    return os.path.join(
+        settings.PRERENDER_ROOT, path.strip('/'), 'index.html')
+
+
+def write_atomic(filename, data):
+    directory = os.path.dirname(filename)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=directory, prefix='.prerender-')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        os.chmod(temp_name, 0o644)
+        os.replace(temp_name, filename)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+
+
+def remove_page(path):
+    filename = page_file(path)
+    for name in [filename] + [filename + SUFFIXES[e] for e in ENCODINGS]:
+        if os.path.exists(name):
+            os.unlink(name)
+
+
+def render_page(path):
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return None
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    try:
+        response = match.func(request, *match.args, **match.kwargs)
+    except Http404:
+        return None
+    if hasattr(response, 'render'):
+        response.render()
+    if response.status_code != 200 or response.streaming:
+        return None
+    return response.content
+
+
+def prerender(paths):
+    """Пишет страницы на диск, возвращает число записанных."""
+    written = 0
+    for path in paths:
+        content = render_page(path)
+        if content is None:
+            remove_page(path)
+            continue
+        filename = page_file(path)
+        for encoding in ENCODINGS:
+            write_atomic(
+                filename + SUFFIXES[encoding], compress(content, encoding))
+        write_atomic(filename, content)
+        written += 1
+    return written
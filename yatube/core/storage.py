@@ -0,0 +1,47 @@
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from .compression import ENCODINGS, SUFFIXES, compress
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.ico', '.txt', '.html', '.json', '.xml', '.map',
+)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if isinstance(hashed_name, str):
+                names.update((name, hashed_name))
+            yield name, hashed_name, processed
+        if not dry_run:
+            for name in sorted(names):
+                self.compress_file(name)
+
+    def compress_file(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as original:
+            content = original.read()
+        for encoding in ENCODINGS:
+            compressed = compress(content, encoding)
+            compressed_name = name + SUFFIXES[encoding]
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            if len(compressed) < len(content):
+                self._save(compressed_name, ContentFile(compressed))
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def immutable_names(self):
+        return {
+            os.path.normpath(name) for name in self.hashed_files.values()
+        }
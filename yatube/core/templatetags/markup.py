@@ -0,0 +1,18 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.markup import RENDERER_VERSION, render_markdown
+
+register = template.Library()
+
+
+@register.filter
+def rendered(obj):
+    """HTML текста поста или комментария, сохранённый при записи.
+
+    Если текст сохранён старой версией разметки или в обход save(),
+    он размечается на лету до запуска команды render_markup.
+    """
+    if obj.render_version == RENDERER_VERSION:
+        return mark_safe(obj.rendered_text)
+    return mark_safe(render_markdown(obj.text))
@@ -0,0 +1,68 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.middleware import user_cache_key
+
+User = get_user_model()
+
+
+class CachedAuthenticationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='HasNoName', password='old-secret-42')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.login(
+            username='HasNoName', password='old-secret-42')
+
+    def test_user_loaded_from_cache(self):
+        """Повторный запрос не обращается к базе за сессией и пользователем."""
+        url = reverse('posts:follow_index')
+        self.authorized_client.get(url)
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_user_save_invalidates_cache(self):
+        """Сохранение пользователя сбрасывает кэш."""
+        self.authorized_client.get(reverse('posts:follow_index'))
+        self.user.first_name = 'Имя'
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+    def test_password_change_logs_out_other_sessions(self):
+        """После смены пароля старая сессия перестаёт действовать."""
+        other_client = Client()
+        other_client.login(username='HasNoName', password='old-secret-42')
+        other_client.get(reverse('posts:follow_index'))
+        self.authorized_client.post(
+            reverse('users:password_change_form'),
+            {
+                'old_password': 'old-secret-42',
+                'new_password1': 'new-secret-42',
+                'new_password2': 'new-secret-42',
+            }
+        )
+        response = other_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_shared_page_keeps_user_header(self):
+        """Общая для всех страница показывает вошедшему его шапку."""
+        url = reverse('about:author')
+        self.client.get(url)
+        self.authorized_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(url)
+        self.assertContains(response, 'Пользователь: HasNoName')
+        self.assertNotContains(response, 'Регистрация')
@@ -0,0 +1,83 @@
+import gzip
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from core.compression import accepted_encodings
+from core.middleware import CompressionMiddleware
+from posts.models import Post
+
+User = get_user_model()
+
+
+class CompressionMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        for number in range(10):
+            Post.objects.create(
+                author=cls.user, text=f'Тестовый пост {number}')
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def process(self, response, accept_encoding='gzip'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_accepted_encodings(self):
+        """Accept-Encoding разбирается с учётом q-значений."""
+        self.assertIn('gzip', accepted_encodings('deflate, gzip;q=0.5'))
+        self.assertNotIn('gzip', accepted_encodings('gzip;q=0, identity'))
+        self.assertEqual(accepted_encodings(''), [])
+
+    def test_html_is_compressed(self):
+        """HTML-ответ сжимается, если клиент это поддерживает."""
+        response = self.process(HttpResponse('<p>Пост</p>' * 100))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(response.content).decode(), '<p>Пост</p>' * 100)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_media_is_not_compressed(self):
+        """Уже сжатые форматы не пережимаются."""
+        response = self.process(
+            HttpResponse(b'\x89PNG' * 100, content_type='image/png'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_response_is_compressed(self):
+        """Потоковый ответ сжимается по частям."""
+        response = self.process(
+            StreamingHttpResponse(['<p>Пост</p>'] * 100))
+        content = b''.join(response.streaming_content)
+        self.assertEqual(
+            gzip.decompress(content).decode(), '<p>Пост</p>' * 100)
+
+    def test_cached_page_served_precompressed(self):
+        """Попадание в кэш страницы отдаёт заранее сжатые байты."""
+        url = reverse('posts:posts_index')
+        self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        with mock.patch('core.middleware.compress') as compress:
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        compress.assert_not_called()
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(
+            'Тестовый пост 9', gzip.decompress(response.content).decode())
+
+    def test_rewritten_page_is_compressed_again(self):
+        """Изменённое после кэша тело не подменяется старыми байтами."""
+        body = '<p>Пост</p>' * 100
+        response = HttpResponse(body)
+        response.precompressed = {
+            'identity': b'<p>old</p>' * 100,
+            'gzip': gzip.compress(b'<p>old</p>' * 100),
+        }
+        response = self.process(response)
+        self.assertEqual(gzip.decompress(response.content).decode(), body)
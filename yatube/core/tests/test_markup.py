@@ -0,0 +1,55 @@
+from django.test import SimpleTestCase
+
+from core.markup import render_markdown
+
+
+class RenderMarkdownTests(SimpleTestCase):
+    def test_html_is_escaped(self):
+        """HTML из текста экранируется."""
+        self.assertEqual(
+            render_markdown('<script>alert(1)</script>'),
+            '<p>&lt;script&gt;alert(1)&lt;/script&gt;</p>',
+        )
+
+    def test_paragraphs_and_line_breaks(self):
+        """Пустая строка делит абзацы, перенос строки сохраняется."""
+        self.assertEqual(
+            render_markdown('раз\nдва\n\nтри'),
+            '<p>раз<br>два</p>\n<p>три</p>',
+        )
+
+    def test_inline_markup(self):
+        """Поддерживаются жирный, курсив, код и ссылки."""
+        self.assertEqual(
+            render_markdown(
+                '**жирный** *курсив* `a*b*` [сайт](https://ya.ru)'),
+            '<p><strong>жирный</strong> <em>курсив</em> <code>a*b*</code> '
+            '<a href="https://ya.ru" rel="nofollow">сайт</a></p>',
+        )
+
+    def test_markup_inside_link_text(self):
+        """Код и ссылка внутри текста ссылки не ломают разбор."""
+        self.assertEqual(
+            render_markdown('[`code` и **жирный**](http://x.ru)'),
+            '<p><a href="http://x.ru" rel="nofollow"><code>code</code> '
+            'и <strong>жирный</strong></a></p>',
+        )
+        html = render_markdown('[[a](http://x.ru)](http://y.ru) [`b`](/c)')
+        self.assertEqual(html.count('<a '), 2)
+        self.assertIn(
+            '<a href="/c" rel="nofollow"><code>b</code></a>', html)
+
+    def test_unsafe_links_stay_text(self):
+        """Ссылки с javascript: не превращаются в теги."""
+        self.assertNotIn(
+            '<a', render_markdown('[x](javascript:alert(1))'))
+
+    def test_blocks(self):
+        """Поддерживаются заголовки, списки, цитаты и блоки кода."""
+        self.assertEqual(
+            render_markdown(
+                '# Заголовок\n\n- один\n- два\n\n> цитата\n\n```\n<b>\n```'),
+            '<h3>Заголовок</h3>\n<ul><li>один</li><li>два</li></ul>\n'
+            '<blockquote><p>цитата</p></blockquote>\n'
+            '<pre><code>&lt;b&gt;</code></pre>',
+        )
@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.author = User.objects.create_user(username='PostAuthor')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_logged_in_user_hits_anonymous_cache(self):
+        """Авторизованный пользователь получает страницу из общего кэша."""
+        url = reverse('posts:posts_index')
+        self.client.get(url)
+        self.authorized_client.get(reverse('posts:follow_index'))
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(url)
+        self.assertContains(response, self.user.username)
+        self.assertContains(response, self.post.text)
+        self.assertEqual(response['Cache-Control'], 'private')
+
+    def test_username_does_not_leak(self):
+        """Имя пользователя не попадает в общий кэш."""
+        url = reverse('posts:posts_index')
+        self.authorized_client.get(url)
+        response = self.client.get(url)
+        self.assertNotContains(response, self.user.username)
+        self.assertNotContains(response, '<!--hole:')
+
+    def test_follow_button_is_personal(self):
+        """Кнопка подписки на закэшированном профиле своя для каждого."""
+        url = reverse(
+            'posts:profile', kwargs={'username': self.author.username})
+        follow_url = reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username}
+        )
+        self.client.get(url)
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertContains(self.authorized_client.get(url), follow_url)
+        self.assertNotContains(self.client.get(url), follow_url)
+
+    def test_feed_switcher_is_personal(self):
+        """Вкладки лент на закэшированной главной зависят от входа."""
+        url = reverse('posts:posts_index')
+        follow_url = reverse('posts:follow_index')
+        for first in (self.client, self.authorized_client):
+            with self.subTest(first_is_anonymous=first is self.client):
+                cache.clear()
+                first.get(url)
+                self.assertContains(
+                    self.authorized_client.get(url), follow_url)
+                self.assertNotContains(self.client.get(url), follow_url)
+
+    def test_new_post_invalidates_cache(self):
+        """Новый пост сразу появляется на закэшированной странице."""
+        url = reverse('posts:posts_index')
+        self.client.get(url)
+        Post.objects.create(author=self.author, text='Свежий пост')
+        self.assertContains(self.client.get(url), 'Свежий пост')
@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.ratelimit import consume, parse_rate
+from posts.models import Post
+
+User = get_user_model()
+
+
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_parse_rate(self):
+        """Лимит вида N/период разбирается в число запросов и период."""
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        with self.assertRaises(ValueError):
+            parse_rate('10/week')
+
+    def test_window_resets(self):
+        """Лимит отсчитывается в окне и сбрасывается в следующем."""
+        for _ in range(3):
+            self.assertEqual(consume('test', 'ip:1', '3/m', now=100), 0)
+        self.assertAlmostEqual(consume('test', 'ip:1', '3/m', now=100), 20)
+        self.assertAlmostEqual(consume('test', 'ip:1', '3/m', now=119), 1)
+        self.assertEqual(consume('test', 'ip:2', '3/m', now=100), 0)
+        self.assertEqual(consume('test', 'ip:1', '3/m', now=120), 0)
+
+    def test_concurrent_requests_counted(self):
+        """Одновременные запросы не проходят сверх лимита."""
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(
+                lambda _: consume('test', 'ip:1', '10/m', now=100),
+                range(50),
+            ))
+        self.assertEqual(results.count(0), 10)
+
+    def test_evicted_counter_restarts(self):
+        """Вытесненный из кэша счётчик заводится заново."""
+        add = cache.add
+        calls = []
+
+        def add_once_lost(*args):
+            calls.append(args)
+            return len(calls) == 1 or add(*args)
+
+        with mock.patch.object(cache, 'add', side_effect=add_once_lost):
+            self.assertEqual(consume('test', 'ip:1', '1/m', now=100), 0)
+        self.assertEqual(len(calls), 2)
+        self.assertAlmostEqual(consume('test', 'ip:1', '1/m', now=100), 20)
+
+    @override_settings(RATELIMIT_RATES={'post_create': '2/m'})
+    def test_post_create_returns_429(self):
+        """После исчерпания лимита создание поста возвращает 429."""
+        for number in range(2):
+            self.authorized_client.post(
+                reverse('posts:post_create'), {'text': f'Пост {number}'})
+        response = self.authorized_client.post(
+            reverse('posts:post_create'), {'text': 'Лишний пост'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertTrue(int(response['Retry-After']) > 0)
+        self.assertFalse(Post.objects.filter(text='Лишний пост').exists())
+
+    @override_settings(RATELIMIT_RATES={'post_create': '1/m'})
+    def test_get_is_not_limited(self):
+        """Открытие формы не расходует лимит на создание поста."""
+        for _ in range(3):
+            response = self.authorized_client.get(
+                reverse('posts:post_create'))
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(RATELIMIT_RATES={'signup': '1/h'})
+    def test_signup_limited_by_ip(self):
+        """Регистрация ограничивается по IP-адресу."""
+        self.client.post(reverse('users:signup'), {})
+        response = self.client.post(reverse('users:signup'), {})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
@@ -0,0 +1,81 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.middleware import StaticFilesMiddleware
+
+TEMP_STATIC_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    STATICFILES_DIRS=(TEMP_STATIC_DIR,),
+    STATIC_ROOT=TEMP_STATIC_ROOT,
+)
+class StaticPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(TEMP_STATIC_DIR, 'css'))
+        with open(os.path.join(TEMP_STATIC_DIR, 'css', 'site.css'), 'w') as f:
+            f.write('body { color: red; }\n' * 100)
+        call_command(
+            'collectstatic',
+            interactive=False,
+            verbosity=0,
+            ignore_patterns=['admin', 'debug_toolbar'],
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_STATIC_DIR, ignore_errors=True)
+        shutil.rmtree(TEMP_STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.middleware = StaticFilesMiddleware(lambda request: HttpResponse())
+
+    def test_collectstatic_writes_hashed_compressed_files(self):
+        """collectstatic пишет хешированные файлы и их сжатые копии."""
+        hashed_name = staticfiles_storage.stored_name('css/site.css')
+        self.assertNotEqual(hashed_name, 'css/site.css')
+        path = os.path.join(TEMP_STATIC_ROOT, hashed_name)
+        with open(path, 'rb') as original, gzip.open(path + '.gz') as packed:
+            self.assertEqual(packed.read(), original.read())
+        self.assertEqual(
+            staticfiles_storage.url('css/site.css'), '/static/' + hashed_name)
+
+    def test_serves_best_encoding_with_immutable_headers(self):
+        """Хешированный файл отдаётся сжатым и кэшируется навсегда."""
+        url = staticfiles_storage.url('css/site.css')
+        request = RequestFactory().get(url, HTTP_ACCEPT_ENCODING='gzip')
+        response = self.middleware(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_serves_plain_file_without_accept_encoding(self):
+        """Без Accept-Encoding отдаётся несжатый файл."""
+        request = RequestFactory().get('/static/css/site.css')
+        response = self.middleware(request)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertEqual(
+            b''.join(response.streaming_content),
+            b'body { color: red; }\n' * 100
+        )
+
+    def test_missing_manifest_entry_falls_back(self):
+        """Файл без записи в манифесте отдаётся по исходному имени."""
+        self.assertEqual(
+            staticfiles_storage.url('img/missing.png'),
+            '/static/img/missing.png'
+        )
@@ -1,6 +1,7 @@
-from django.test import TestCase
 from http import HTTPStatus
 
+from django.test import TestCase
+
 
 class ViewTestClass(TestCase):
     def test_error_page(self):
@@ -1,17 +1,309 @@
-from django.contrib import admin
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
+from django.shortcuts import render
+from django.urls import path
+from django.utils import timezone
+from django.utils.functional import cached_property
 
-from .models import Comment, Follow, Group, Post
+from . import bulk
+from .models import Comment, ContentSignature, Follow, Group, Post
+from .utility import (
+    decode_cursor, encode_cursor, estimated_count, keyset_filter,
+)
 
+CURSOR_VAR = 'cursor'
 
-class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
-    list_editable = ('group',)
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)
+
+
+class CursorChangeList(ChangeList):
+    def get_filters_params(self, params=None):
+        params = super().get_filters_params(params)
+        params.pop(CURSOR_VAR, None)
+        return params
+
+    def get_results(self, request):
+        fields = self.model_admin.cursor_fields
+        values = None
+        if ORDER_VAR not in self.params and CURSOR_VAR in self.params:
+            values = decode_cursor(self.params[CURSOR_VAR], fields)
+        if values is None:
+            super().get_results(request)
+        else:
+            self.paginator = self.model_admin.get_paginator(
+                request, self.queryset, self.list_per_page)
+            self.result_count = self.paginator.count
+            self.show_full_result_count = False
+            self.show_admin_actions = True
+            self.full_result_count = None
+            self.result_list = keyset_filter(
+                self.queryset, fields, values)[:self.list_per_page]
+            self.can_show_all = False
+            self.multi_page = True
+        self.next_cursor_query = None
+        if ORDER_VAR not in self.params and not self.show_all:
+            results = list(self.result_list)
+            if len(results) == self.list_per_page:
+                self.next_cursor_query = self.get_query_string(
+                    {CURSOR_VAR: encode_cursor(results[-1], fields)},
+                    [PAGE_VAR],
+                )
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = 'admin/cursor_change_list.html'
+    cursor_fields = ('pk',)
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
+
+
+class DeletedFilter(admin.SimpleListFilter):
+    title = 'удаление'
+    parameter_name = 'deleted'
+
+    def lookups(self, request, model_admin):
+        return (('no', 'Видимые'), ('yes', 'Скрытые'))
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.filter(deleted_at__isnull=False)
+        if self.value() == 'no':
+            return queryset.filter(deleted_at__isnull=True)
+        return queryset
+
+
+class SoftDeleteAdmin(ScalableAdmin):
+    """Показывает и скрытые строки, чтобы модератор мог их вернуть."""
+
+    def get_queryset(self, request):
+        queryset = self.model.all_objects.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+    def soft_delete(self, request, queryset):
+        for obj in queryset.filter(deleted_at__isnull=True):
+            obj.soft_delete()
+    soft_delete.short_description = 'Скрыть (можно вернуть)'
+
+    def restore(self, request, queryset):
+        for obj in queryset.filter(deleted_at__isnull=False):
+            obj.restore()
+    restore.short_description = 'Вернуть скрытые'
+
+
+class MoveToGroupForm(forms.Form):
+    group = forms.ModelChoiceField(
+        Group.objects.all(), required=False, label='Новая группа')
+
+
+class PostAdmin(SoftDeleteAdmin):
+    list_display = (
+        'pk', 'text', 'pub_date', 'author', 'group', 'status', 'deleted_at')
+    list_select_related = ('author', 'group')
+    search_fields = ('text',)
+    list_filter = ('pub_date', 'status', DeletedFilter)
+    date_hierarchy = 'pub_date'
+    autocomplete_fields = ('author', 'group')
+    empty_value_display = '-пусто-'
+    cursor_fields = ('pub_date', 'pk')
+    actions = (
+        'soft_delete', 'restore', 'move_to_group', 'delete_with_comments',
+        'purge_authors',
+    )
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def get_urls(self):
+        return [
+            path(
+                'bulk/<str:job_id>/',
+                self.admin_site.admin_view(self.bulk_progress_view),
+                name='posts_post_bulk_progress',
+            ),
+        ] + super().get_urls()
+
+    def bulk_progress_view(self, request, job_id):
+        progress = bulk.get_progress(job_id)
+        if progress is None:
+            raise Http404
+        return JsonResponse(progress)
+
+    def confirm(self, request, action, message, form=None):
+        return render(request, 'admin/posts/bulk_confirmation.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Подтверждение массового действия',
+            'opts': self.model._meta,
+            'action': action,
+            'message': message,
+            'form': form,
+            'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+            'select_across': request.POST.get('select_across', '0'),
+        })
+
+    def run_job(self, request, func, ids, *args):
+        job = bulk.BulkJob(func, ids, *args)
+        if len(job.ids) > settings.BULK_BACKGROUND_THRESHOLD:
+            job_id = job.run_in_background()
+            self.message_user(
+                request,
+                f'Задача {job_id} запущена в фоне, обрабатывается '
+                f'{len(job.ids)} записей.',
+                messages.INFO,
+            )
+            return
+        progress = job.run()
+        self.message_user(
+            request,
+            f'Обработано {progress["done"]} из {progress["total"]} '
+            f'за {progress["seconds"]} с.',
+            messages.SUCCESS,
+        )
+
+    def soft_delete(self, request, queryset):
+        self.run_job(
+            request,
+            bulk.set_deleted,
+            queryset.filter(deleted_at__isnull=True).values_list(
+                'pk', flat=True),
+            timezone.now(),
+        )
+    soft_delete.short_description = 'Скрыть (можно вернуть)'
+
+    def restore(self, request, queryset):
+        self.run_job(
+            request,
+            bulk.set_deleted,
+            queryset.filter(deleted_at__isnull=False).values_list(
+                'pk', flat=True),
+            None,
+        )
+    restore.short_description = 'Вернуть скрытые'
+
+    def move_to_group(self, request, queryset):
+        form = MoveToGroupForm(
+            request.POST if 'post' in request.POST else None)
+        if not form.is_valid():
+            return self.confirm(
+                request,
+                'move_to_group',
+                f'Перенести записи ({queryset.count()}) в группу:',
+                form,
+            )
+        group = form.cleaned_data['group']
+        self.run_job(
+            request,
+            bulk.move_posts,
+            queryset.values_list('pk', flat=True),
+            group.pk if group else None,
+        )
+    move_to_group.short_description = 'Перенести в другую группу'
+
+    def delete_with_comments(self, request, queryset):
+        if 'post' not in request.POST:
+            comments = Comment.objects.filter(post__in=queryset).count()
+            return self.confirm(
+                request,
+                'delete_with_comments',
+                f'Будут удалены записи ({queryset.count()}) '
+                f'и комментарии к ним ({comments}).',
+            )
+        self.run_job(
+            request, bulk.delete_posts, queryset.values_list('pk', flat=True))
+    delete_with_comments.short_description = 'Удалить вместе с комментариями'
+
+    def purge_authors(self, request, queryset):
+        author_ids = list(queryset.order_by().values_list(
+            'author_id', flat=True).distinct())
+        if 'post' not in request.POST:
+            posts = Post.objects.filter(author_id__in=author_ids).count()
+            comments = Comment.objects.filter(
+                author_id__in=author_ids).count()
+            return self.confirm(
+                request,
+                'purge_authors',
+                f'Будут удалены все записи ({posts}) и комментарии '
+                f'({comments}) авторов ({len(author_ids)}).',
+            )
+        self.run_job(request, bulk.purge_authors, author_ids)
+    purge_authors.short_description = (
+        'Удалить все записи и комментарии авторов')
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+
+
+class CommentAdmin(SoftDeleteAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post', 'deleted_at')
+    list_select_related = ('author', 'post')
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_filter = (DeletedFilter,)
+    actions = ('soft_delete', 'restore')
+    date_hierarchy = 'created'
+    raw_id_fields = ('post',)
+    autocomplete_fields = ('author',)
+    empty_value_display = '-пусто-'
+    ordering = ('-created', '-pk')
+    cursor_fields = ('created', 'pk')
+
+
+class FollowAdmin(ScalableAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    empty_value_display = '-пусто-'
+
+
+class FlaggedFilter(admin.SimpleListFilter):
+    title = 'похожие тексты'
+    parameter_name = 'flagged'
+
+    def lookups(self, request, model_admin):
+        return (('yes', 'Есть похожая запись'), ('no', 'Нет похожих'))
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.filter(duplicate_of__isnull=False)
+        if self.value() == 'no':
+            return queryset.filter(duplicate_of__isnull=True)
+        return queryset
+
+
+class ContentSignatureAdmin(ScalableAdmin):
+    list_display = (
+        'pk', 'kind', 'object_id', 'author', 'duplicate_of', 'similarity',
+        'created',
+    )
+    list_select_related = ('author', 'duplicate_of')
+    list_filter = ('kind', FlaggedFilter)
+    raw_id_fields = ('duplicate_of',)
+    autocomplete_fields = ('author',)
+    exclude = ('signature',)
     empty_value_display = '-пусто-'
+    ordering = ('-created', '-pk')
+    cursor_fields = ('created', 'pk')
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
-admin.site.register(Comment)
-admin.site.register(Follow)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(ContentSignature, ContentSignatureAdmin)
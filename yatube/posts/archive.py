@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .bulk import notify
+from .models import (
+    ArchivedComment, ArchivedPost, ArchivedPostRevision, Comment, Post,
+    PostRevision,
+)
+from .sharding import shard_aliases
+from .signals import posts_bulk_changed
+from .utility import raw_delete
+
+POST_FIELDS = (
+    'id', 'text', 'rendered_text', 'render_version', 'pub_date', 'author_id',
+    'group_id', 'image',
+)
+COMMENT_FIELDS = (
+    'id', 'post_id', 'author_id', 'text', 'rendered_text', 'render_version',
+    'created', 'parent_id', 'path', 'depth', 'reply_count',
+)
+REVISION_FIELDS = (
+    'id', 'post_id', 'number', 'is_snapshot', 'data', 'created',
+)
+
+
+def archive_cutoff(days=None):
+    if days is None:
+        days = settings.ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_shard(cutoff, batch_size, alias, progress=None):
+    archive_db = settings.ARCHIVE_DATABASE
+    posts = Post.objects.using(alias).published()
+    archived = 0
+    while True:
+        pks = list(posts.filter(pub_date__lt=cutoff).order_by(
+            'pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return archived
+        changed = notify(pks)
+        rows = posts.filter(pk__in=pks).values(*POST_FIELDS)
+        comments = Comment.objects.using(alias).filter(
+            post_id__in=pks).values(*COMMENT_FIELDS)
+        revisions = PostRevision.objects.using(alias).filter(
+            post_id__in=pks).values(*REVISION_FIELDS)
+        with transaction.atomic(using=alias):
+            with transaction.atomic(using=archive_db):
+                ArchivedPost.objects.using(archive_db).bulk_create(
+                    [ArchivedPost(**row) for row in rows],
+                    ignore_conflicts=True,
+                )
+                ArchivedComment.objects.using(archive_db).bulk_create(
+                    [ArchivedComment(**comment) for comment in comments],
+                    ignore_conflicts=True,
+                )
+                ArchivedPostRevision.objects.using(archive_db).bulk_create(
+                    [ArchivedPostRevision(**row) for row in revisions],
+                    ignore_conflicts=True,
+                )
+            raw_delete(
+                Comment, [comment['id'] for comment in comments], alias)
+            raw_delete(Post, pks, alias)
+        posts_bulk_changed.send(sender=Post, **changed)
+        archived += len(pks)
+        if progress:
+            progress(len(pks))
+
+
+def archive_posts(cutoff, batch_size, progress=None):
+    """Переносит посты старше cutoff вместе с комментариями и правками
+    в архив.
+
+    Сначала пачка записывается в архив, затем удаляется из рабочих
+    таблиц. Если удаление не удалось, повторный запуск пропустит уже
+    перенесённые строки, а чтение всегда начинается с рабочих таблиц.
+    """
+    return sum(
+        archive_shard(cutoff, batch_size, alias, progress)
+        for alias in shard_aliases()
+    )
+
+
+def get_archived_post(post_id):
+    post = ArchivedPost.objects.filter(pk=post_id).prefetch_related(
+        'author', 'group').first()
+    if post is None or post.author is None:
+        raise Http404('Пост не найден')
+    return post
+
+
+class HotColdPosts:
+    """Посты автора: сначала рабочая таблица, за ней архив.
+
+    В архив попадают только посты старше самого старого рабочего,
+    поэтому склейка двух выборок сохраняет порядок по дате.
+    """
+
+    def __init__(self, hot, cold):
+        self.hot = hot
+        self.cold = cold.prefetch_related('author', 'group')
+
+    @cached_property
+    def hot_count(self):
+        return self.hot.count()
+
+    def count(self):
+        return self.hot_count + self.cold.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = key.stop if key.stop is not None else self.count()
+        posts = []
+        if start < self.hot_count:
+            posts.extend(self.hot[start:min(stop, self.hot_count)])
+        if stop > self.hot_count:
+            posts.extend(self.cold[
+                max(start - self.hot_count, 0):stop - self.hot_count])
+        return posts
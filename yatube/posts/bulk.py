@@ -0,0 +1,206 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+
+from core.markup import RENDERER_VERSION, render_markdown
+
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+from .sharding import shard_aliases, shard_for_author
+from .signals import posts_bulk_changed
+from .tags import reindex_posts
+from .utility import raw_delete
+
+PROGRESS_TIMEOUT = 60 * 60 * 24
+
+
+def chunks(ids, size):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def notify(post_ids):
+    rows = [
+        row
+        for alias in shard_aliases()
+        for row in Post.all_objects.using(alias).filter(
+            pk__in=post_ids).values_list('author_id', 'group_id')
+    ]
+    return {
+        'post_ids': list(post_ids),
+        'author_ids': {author_id for author_id, _ in rows},
+        'group_ids': {group_id for _, group_id in rows} - {None},
+    }
+
+
+def move_posts(post_ids, group_id, progress=None):
+    for chunk in chunks(post_ids, settings.BULK_CHUNK_SIZE):
+        changed = notify(chunk)
+        for alias in shard_aliases():
+            with transaction.atomic(using=alias):
+                Post.all_objects.using(alias).filter(pk__in=chunk).update(
+                    group_id=group_id)
+        changed['group_ids'].add(group_id)
+        posts_bulk_changed.send(sender=Post, **changed)
+        if progress:
+            progress(len(chunk))
+
+
+def delete_posts(post_ids, progress=None, aliases=None):
+    for chunk in chunks(post_ids, settings.BULK_CHUNK_SIZE):
+        changed = notify(chunk)
+        for alias in aliases or shard_aliases():
+            with transaction.atomic(using=alias):
+                comment_ids = list(Comment.all_objects.using(alias).filter(
+                    post_id__in=chunk).values_list('pk', flat=True))
+                raw_delete(Comment, comment_ids, alias)
+                raw_delete(Post, chunk, alias)
+        posts_bulk_changed.send(sender=Post, **changed)
+        if progress:
+            progress(len(chunk))
+
+
+def set_deleted(post_ids, deleted_at, progress=None):
+    """Скрывает посты (deleted_at - время) или возвращает их (None)."""
+    for chunk in chunks(post_ids, settings.BULK_CHUNK_SIZE):
+        if deleted_at is not None:
+            changed = notify(chunk)
+        for alias in shard_aliases():
+            posts = Post.all_objects.using(alias).filter(pk__in=chunk)
+            with transaction.atomic(using=alias):
+                posts.update(deleted_at=deleted_at)
+                reindex_posts(list(posts.only(
+                    'pk', 'text', 'pub_date', 'status', 'deleted_at')), alias)
+        if deleted_at is None:
+            changed = notify(chunk)
+        posts_bulk_changed.send(sender=Post, **changed)
+        if progress:
+            progress(len(chunk))
+
+
+def purge_deleted(cutoff, batch_size, progress=None):
+    """Удаляет насовсем посты и комментарии, скрытые раньше cutoff.
+
+    Вместе с постом удаляются все его комментарии. Скрытые строки уже
+    не видны ни в лентах, ни в кэшах, поэтому сигналов не нужно.
+    """
+    purged = {'Посты': 0, 'Комментарии': 0}
+    for alias in shard_aliases():
+        for model, label in ((Post, 'Посты'), (Comment, 'Комментарии')):
+            deleted = model.all_objects.using(alias).filter(
+                deleted_at__lt=cutoff)
+            while True:
+                pks = list(deleted.values_list('pk', flat=True)[:batch_size])
+                if not pks:
+                    break
+                with transaction.atomic(using=alias):
+                    if model is Post:
+                        raw_delete(Comment, list(
+                            Comment.all_objects.using(alias).filter(
+                                post_id__in=pks).values_list('pk', flat=True)
+                        ), alias)
+                    raw_delete(model, pks, alias)
+                purged[label] += len(pks)
+                if progress:
+                    progress(len(pks))
+    return purged
+
+
+def purge_authors(author_ids, progress=None):
+    for author_id in author_ids:
+        for alias in shard_aliases():
+            comments = list(Comment.all_objects.using(alias).filter(
+                author_id=author_id).values_list('pk', 'post_id'))
+            for chunk in chunks(comments, settings.BULK_CHUNK_SIZE):
+                changed = notify({post_id for _, post_id in chunk} - {None})
+                with transaction.atomic(using=alias):
+                    raw_delete(Comment, [pk for pk, _ in chunk], alias)
+                posts_bulk_changed.send(sender=Comment, **changed)
+        shard = shard_for_author(author_id)
+        delete_posts(
+            list(Post.all_objects.using(shard).filter(
+                author_id=author_id).values_list('pk', flat=True)),
+            aliases=(shard,),
+        )
+        ArchivedComment.objects.filter(author_id=author_id).delete()
+        ArchivedPost.objects.filter(author_id=author_id).delete()
+        if progress:
+            progress(1)
+
+
+def render_texts(model, alias, batch_size, everything=False):
+    """Заново размечает тексты, сохранённые старой версией разметки."""
+    queryset = model._base_manager.using(alias).order_by('pk')
+    if not everything:
+        queryset = queryset.exclude(render_version=RENDERER_VERSION)
+    has_post = any(field.name == 'post' for field in model._meta.fields)
+    fields = ('pk', 'text', 'post_id') if has_post else ('pk', 'text')
+    last_pk = 0
+    rendered = 0
+    while True:
+        objs = list(queryset.filter(pk__gt=last_pk).only(*fields)[:batch_size])
+        if not objs:
+            return rendered
+        last_pk = objs[-1].pk
+        for obj in objs:
+            obj.rendered_text = render_markdown(obj.text)
+            obj.render_version = RENDERER_VERSION
+        with transaction.atomic(using=alias):
+            model._base_manager.using(alias).bulk_update(
+                objs, ('rendered_text', 'render_version'))
+        post_ids = {obj.post_id if has_post else obj.pk for obj in objs}
+        posts_bulk_changed.send(sender=model, **notify(post_ids - {None}))
+        rendered += len(objs)
+
+
+def progress_key(job_id):
+    return f'bulk:{job_id}'
+
+
+def get_progress(job_id):
+    return cache.get(progress_key(job_id))
+
+
+class BulkJob:
+    def __init__(self, func, ids, *args):
+        self.job_id = uuid.uuid4().hex
+        self.func = func
+        self.ids = list(ids)
+        self.args = args
+        self.done = 0
+        self.started = time.monotonic()
+
+    def report(self, state):
+        cache.set(progress_key(self.job_id), {
+            'state': state,
+            'done': self.done,
+            'total': len(self.ids),
+            'seconds': round(time.monotonic() - self.started, 2),
+        }, PROGRESS_TIMEOUT)
+
+    def advance(self, count):
+        self.done += count
+        self.report('running')
+
+    def run(self):
+        self.report('running')
+        try:
+            self.func(self.ids, *self.args, progress=self.advance)
+        except Exception:
+            self.report('failed')
+            raise
+        self.report('done')
+        return get_progress(self.job_id)
+
+    def run_in_background(self):
+        def target():
+            try:
+                self.run()
+            finally:
+                connections.close_all()
+        self.report('queued')
+        threading.Thread(target=target, daemon=True).start()
+        return self.job_id
@@ -0,0 +1,117 @@
+import json
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+
+from .bulk import notify
+from .models import Comment, Follow
+from .sharding import shard_aliases
+from .signals import posts_bulk_changed
+from .utility import raw_delete
+
+ORPHANS = (
+    (
+        Comment,
+        Q(post__isnull=True) | Q(author__isnull=True),
+        shard_aliases,
+    ),
+    (
+        Follow,
+        Q(user__isnull=True) | Q(author__isnull=True),
+        lambda: (DEFAULT_DB_ALIAS,),
+    ),
+)
+
+
+def orphan_batches(model, condition, batch_size, using=DEFAULT_DB_ALIAS):
+    """Отдаёт первичные ключи сирот пачками, двигаясь по возрастанию pk.
+
+    Каждая пачка выбирается отдельным коротким запросом по индексу
+    первичного ключа, поэтому между пачками таблица не блокируется.
+    """
+    last_pk = 0
+    while True:
+        pks = list(model._base_manager.using(using).filter(
+            condition, pk__gt=last_pk).order_by('pk').values_list(
+                'pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+def archive_rows(model, pks, stream, using=DEFAULT_DB_ALIAS):
+    label = model._meta.label
+    for row in model._base_manager.using(using).filter(
+            pk__in=pks).values():
+        stream.write(json.dumps(
+            {'model': label, 'fields': row},
+            cls=DjangoJSONEncoder,
+            ensure_ascii=False,
+        ) + '\n')
+
+
+def purge_batch(model, pks, alias, archive=None):
+    changed = None
+    if model is Comment:
+        post_ids = model._base_manager.using(alias).filter(
+            pk__in=pks, post__isnull=False).values_list('post_id', flat=True)
+        changed = notify(set(post_ids))
+    with transaction.atomic(using=alias):
+        if archive is not None:
+            archive_rows(model, pks, archive, alias)
+        raw_delete(model, pks, alias)
+    if changed and changed['post_ids']:
+        posts_bulk_changed.send(sender=Comment, **changed)
+
+
+def purge_orphans(batch_size, dry_run=False, archive=None, pause=0):
+    """Удаляет сирот всех моделей и возвращает число строк по моделям."""
+    purged = {}
+    for model, condition, aliases in ORPHANS:
+        purged[model._meta.label] = 0
+        for alias in aliases():
+            for pks in orphan_batches(model, condition, batch_size, alias):
+                purged[model._meta.label] += len(pks)
+                if dry_run:
+                    continue
+                purge_batch(model, pks, alias, archive)
+                if pause:
+                    time.sleep(pause)
+    return purged
+
+
+def database_size(using=DEFAULT_DB_ALIAS):
+    """Размер файла SQLite и свободного места в нём в байтах."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return None
+    with connection.cursor() as cursor:
+        values = []
+        for pragma in ('page_size', 'page_count', 'freelist_count'):
+            cursor.execute(f'PRAGMA {pragma}')
+            values.append(cursor.fetchone()[0])
+    page_size, page_count, freelist_count = values
+    return {
+        'size': page_size * page_count,
+        'free': page_size * freelist_count,
+    }
+
+
+def compact(vacuum=False, analyze=False, checkpoint=False,
+            using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    sqlite = connection.vendor == 'sqlite'
+    statements = []
+    if checkpoint and sqlite:
+        statements.append('PRAGMA wal_checkpoint(TRUNCATE)')
+    if vacuum:
+        statements.append('VACUUM')
+    if analyze:
+        statements.append('ANALYZE')
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    return statements
@@ -0,0 +1,189 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from .minhash import band_keys, from_bytes, minhash, similarity, to_bytes
+from .models import Comment, ContentSignature, Post, SignatureBucket
+from .sharding import shard_aliases
+
+KIND_MODELS = {'post': Post, 'comment': Comment}
+KIND_CODES = {'post': 0, 'comment': 1}
+QUERY_CHUNK_SIZE = 500
+
+
+def signature_pk(kind, object_id):
+    return object_id * len(KIND_CODES) + KIND_CODES[kind]
+
+
+def is_long_enough(text):
+    return len(text.strip()) >= settings.DUPLICATE_MIN_LENGTH
+
+
+def best_match(signature, candidates):
+    best = None
+    for pk, other in candidates:
+        score = similarity(signature, other)
+        if (score >= settings.DUPLICATE_THRESHOLD
+                and (best is None or score > best[1])):
+            best = (pk, score)
+    return best
+
+
+def check(text):
+    """Ищет в индексе LSH текст, похожий на данный.
+
+    Возвращает подпись текста и пару (id подписи, сходство) для самой
+    похожей записи либо None. Кандидаты из общих корзин читаются
+    одним запросом по индексу ключей.
+    """
+    if not is_long_enough(text):
+        return None, None
+    signature = minhash(text)
+    candidates = ContentSignature.objects.filter(
+        buckets__key__in=band_keys(signature)
+    ).values_list('pk', 'signature').distinct()
+    return signature, best_match(
+        signature,
+        ((pk, from_bytes(data))
+         for pk, data in candidates[:settings.DUPLICATE_CANDIDATES]),
+    )
+
+
+def rejects(match):
+    return match is not None and settings.DUPLICATE_ACTION == 'reject'
+
+
+def build(kind, object_id, author_id, signature, match):
+    return ContentSignature(
+        id=signature_pk(kind, object_id),
+        kind=kind,
+        object_id=object_id,
+        author_id=author_id,
+        signature=to_bytes(signature),
+        duplicate_of_id=match[0] if match else None,
+        similarity=match[1] if match else None,
+    )
+
+
+def store(entries):
+    ContentSignature.objects.bulk_create(
+        (entry for entry, _ in entries), ignore_conflicts=True)
+    SignatureBucket.objects.bulk_create(
+        SignatureBucket(key=key, signature_id=entry.pk)
+        for entry, signature in entries
+        for key in band_keys(signature)
+    )
+
+
+def remember(obj, signature, match):
+    """Добавляет подпись сохранённого поста или комментария в индекс.
+
+    Подписи удалённых записей остаются в индексе, чтобы повтор
+    удалённого модератором спама тоже распознавался.
+    """
+    if signature is None:
+        return
+    kind = obj._meta.model_name
+    store([(build(kind, obj.pk, obj.author_id, signature, match), signature)])
+
+
+def stored_signatures(keys):
+    buckets = {}
+    for start in range(0, len(keys), QUERY_CHUNK_SIZE):
+        for key, pk in SignatureBucket.objects.filter(
+                key__in=keys[start:start + QUERY_CHUNK_SIZE]
+        ).values_list('key', 'signature_id'):
+            buckets.setdefault(key, set()).add(pk)
+    ids = list(set().union(*buckets.values()))
+    signatures = {}
+    for start in range(0, len(ids), QUERY_CHUNK_SIZE):
+        signatures.update(
+            (pk, from_bytes(data))
+            for pk, data in ContentSignature.objects.filter(
+                pk__in=ids[start:start + QUERY_CHUNK_SIZE]
+            ).values_list('pk', 'signature')
+        )
+    return buckets, signatures
+
+
+def index_batch(kind, rows, signatures):
+    """Индексирует пачку старых записей, отмечая похожие на более ранние.
+
+    Корзины всей пачки читаются из базы заранее, а записи пачки
+    сравниваются и между собой, поэтому порядок строк rows важен.
+    """
+    items = [
+        (object_id, author_id, signature, band_keys(signature))
+        for (object_id, author_id), signature in zip(rows, signatures)
+    ]
+    buckets, known = stored_signatures(
+        list({key for *_, keys in items for key in keys}))
+    entries = []
+    for object_id, author_id, signature, keys in items:
+        candidates = set().union(*(buckets.get(key, ()) for key in keys))
+        match = best_match(
+            signature, ((pk, known[pk]) for pk in candidates))
+        entry = build(kind, object_id, author_id, signature, match)
+        for key in keys:
+            buckets.setdefault(key, set()).add(entry.pk)
+        known[entry.pk] = signature
+        entries.append((entry, signature))
+    store(entries)
+    return sum(1 for entry, _ in entries if entry.duplicate_of_id)
+
+
+def unindexed_rows(model, alias, kind, batch_size):
+    last_pk = 0
+    while True:
+        rows = list(model.objects.using(alias).filter(
+            pk__gt=last_pk).order_by('pk').values_list(
+            'pk', 'author_id', 'text')[:batch_size])
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        indexed = set(ContentSignature.objects.filter(
+            pk__in=[signature_pk(kind, pk) for pk, *_ in rows]
+        ).values_list('object_id', flat=True))
+        yield [row for row in rows if row[0] not in indexed]
+
+
+def index_history(kinds, workers, batch_size, reset=False):
+    """Строит индекс по уже опубликованным записям.
+
+    Подписи считаются в пуле из workers процессов (модуль minhash не
+    зависит от Django), а поиск похожих и запись в индекс идут в основном
+    процессе пачками по batch_size.
+    """
+    if reset:
+        SignatureBucket.objects.all().delete()
+        ContentSignature.objects.all().delete()
+    indexed = {}
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        for kind in kinds:
+            indexed[kind] = {'indexed': 0, 'duplicates': 0}
+            for alias in shard_aliases():
+                for rows in unindexed_rows(
+                        KIND_MODELS[kind], alias, kind, batch_size):
+                    rows = [
+                        (pk, author_id, text) for pk, author_id, text in rows
+                        if is_long_enough(text or '')
+                    ]
+                    texts = [text for *_, text in rows]
+                    if pool is None:
+                        signatures = list(map(minhash, texts))
+                    else:
+                        signatures = list(pool.map(
+                            minhash, texts,
+                            chunksize=max(1, len(texts) // workers),
+                        ))
+                    indexed[kind]['duplicates'] += index_batch(
+                        kind,
+                        [(pk, author_id) for pk, author_id, _ in rows],
+                        signatures,
+                    )
+                    indexed[kind]['indexed'] += len(rows)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return indexed
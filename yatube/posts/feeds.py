@@ -0,0 +1,113 @@
+import heapq
+
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .graph import follow_graph
+from .models import Post
+from .mutes import mute_filter
+from .sharding import followed_posts, shard_aliases, shard_for_author
+
+
+def author_key(author_id):
+    return f'feed:author:{author_id}'
+
+
+def load_author(author_id):
+    posts = Post.objects.using(
+        shard_for_author(author_id)).published().filter(author_id=author_id)
+    rows = posts.order_by('-pub_date', '-pk').values_list(
+        'pub_date', 'pk')[:settings.FEED_AUTHOR_POSTS]
+    return {
+        'count': posts.count(),
+        'posts': [(pub_date.timestamp(), pk) for pub_date, pk in rows],
+    }
+
+
+def author_lists(author_ids):
+    """Списки свежих постов авторов: из кэша, недостающие - из базы."""
+    keys = {author_key(author_id): author_id for author_id in author_ids}
+    lists = cache.get_many(keys)
+    missing = {
+        key: load_author(author_id)
+        for key, author_id in keys.items()
+        if key not in lists
+    }
+    cache.set_many(missing, settings.FEED_CACHE_TIMEOUT)
+    lists.update(missing)
+    return list(lists.values())
+
+
+def prepend(post):
+    key = author_key(post.author_id)
+    entry = cache.get(key)
+    if entry is None:
+        return
+    entry['posts'].insert(0, (post.pub_date.timestamp(), post.pk))
+    del entry['posts'][settings.FEED_AUTHOR_POSTS:]
+    entry['count'] += 1
+    cache.set(key, entry, settings.FEED_CACHE_TIMEOUT)
+
+
+def invalidate_authors(author_ids):
+    cache.delete_many([author_key(author_id) for author_id in author_ids])
+
+
+def fetch_posts(pks):
+    posts = {}
+    for alias in shard_aliases():
+        posts.update(Post.objects.using(alias).select_related(
+            'author', 'group').in_bulk(pks))
+    return [posts[pk] for pk in pks if pk in posts]
+
+
+class FollowFeed:
+    """Лента подписок, собранная слиянием списков постов авторов.
+
+    Списки авторов обрезаны до FEED_AUTHOR_POSTS, поэтому слиянию
+    можно верить, пока оно не опустилось ниже последнего сохранённого
+    поста какого-либо обрезанного списка. Дальше лента читается из базы.
+    """
+
+    def __init__(self, user, author_ids):
+        self.user = user
+        self.lists = author_lists(author_ids)
+        self.total = sum(entry['count'] for entry in self.lists)
+        self.boundary = max(
+            (entry['posts'][-1] for entry in self.lists
+             if entry['count'] > len(entry['posts'])),
+            default=None,
+        )
+
+    def count(self):
+        return self.total
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = min(self.total if key.stop is None else key.stop, self.total)
+        merged = list(islice(heapq.merge(
+            *(entry['posts'] for entry in self.lists), reverse=True), stop))
+        if self.boundary is not None and (
+                len(merged) < stop or merged[-1] < self.boundary):
+            return list(followed_posts(self.user)[start:stop])
+        return fetch_posts([pk for _, pk in merged[start:stop]])
+
+
+def follow_feed(user):
+    """Лента подписок: скрытые авторы выпадают целыми списками, посты
+    скрытых групп отсеиваются при чтении страницы."""
+    mutes = mute_filter(user)
+    author_ids = follow_graph.followees(user.pk)
+    if mutes.authors:
+        author_ids = [
+            author_id for author_id in author_ids
+            if author_id not in mutes.authors
+        ]
+    return mutes.apply(FollowFeed(user, author_ids), 'follow')
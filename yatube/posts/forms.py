@@ -1,4 +1,5 @@
 from django import forms
+from django.utils import timezone
 
 from .models import Comment, Post
 
@@ -9,6 +10,50 @@ class PostForm(forms.ModelForm):
         fields = ['text', 'group', 'image']
 
 
+class PublicationForm(forms.Form):
+    """Когда публиковать пост: сразу, по расписанию или не публиковать."""
+
+    draft = forms.BooleanField(
+        required=False,
+        label='Черновик',
+        help_text='Сохранить, не публикуя',
+    )
+    publish_at = forms.DateTimeField(
+        required=False,
+        label='Опубликовать в',
+        help_text='Оставьте пустым, чтобы опубликовать сразу',
+        input_formats=('%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M'),
+        widget=forms.DateTimeInput(
+            attrs={'type': 'datetime-local'}, format='%Y-%m-%dT%H:%M'),
+    )
+
+    def __init__(self, *args, post=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if post is not None and post.status == Post.DRAFT:
+            self.initial['draft'] = True
+        elif post is not None and post.status == Post.SCHEDULED:
+            self.initial['publish_at'] = timezone.localtime(post.publish_at)
+
+    def clean_publish_at(self):
+        publish_at = self.cleaned_data['publish_at']
+        if publish_at is not None and publish_at <= timezone.now():
+            raise forms.ValidationError(
+                'Время публикации должно быть в будущем')
+        return publish_at
+
+    def apply(self, post):
+        post.publish_at = None
+        if self.cleaned_data['draft']:
+            post.status = Post.DRAFT
+        elif self.cleaned_data['publish_at'] is not None:
+            post.status = Post.SCHEDULED
+            post.publish_at = self.cleaned_data['publish_at']
+        elif not post.is_published:
+            post.status = Post.PUBLISHED
+            if post.pk is not None:
+                post.pub_date = timezone.now()
+
+
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
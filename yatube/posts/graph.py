@@ -0,0 +1,237 @@
+import os
+import random
+import socket
+import threading
+
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Follow
+from .utility import bump_version, get_version
+
+VERSION_KEY = 'graph:version'
+CHECKED_KEY = 'graph:checked'
+DRIFTED_KEY = 'graph:drifted'
+DRIFT_LOG_KEY = 'graph:drift:log'
+DRIFT_LOG_SIZE = 20
+
+
+def contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def insert(ids, value):
+    index = bisect_left(ids, value)
+    if index == len(ids) or ids[index] != value:
+        ids.insert(index, value)
+
+
+def remove(ids, value):
+    index = bisect_left(ids, value)
+    if index < len(ids) and ids[index] == value:
+        del ids[index]
+
+
+class FollowGraph:
+    """Граф подписок в памяти процесса.
+
+    Для каждого пользователя хранятся отсортированные массивы id авторов,
+    на которых он подписан, и id его подписчиков. Массивы читаются из
+    базы при первом обращении и обновляются сигналами подписки в том
+    процессе, где она сделана, ещё до фиксации транзакции; остальные
+    процессы сбрасывают граф по версии в общем кэше.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.reset(None)
+
+    def reset(self, version):
+        self.version = version
+        self.following = {}
+        self.followers = {}
+
+    def check(self):
+        version = get_version(VERSION_KEY)
+        if version != self.version:
+            with self.lock:
+                self.reset(version)
+
+    def adjacency(self, name, field, other, node_id):
+        self.check()
+        index = getattr(self, name)
+        ids = index.get(node_id)
+        if ids is None:
+            ids = load_adjacency(field, other, node_id)
+            with self.lock:
+                ids = index.setdefault(node_id, ids)
+        elif random.random() < settings.FOLLOW_GRAPH_SAMPLE_RATE:
+            ids = self.verify(index, field, other, node_id, ids)
+        return ids
+
+    def verify(self, index, field, other, node_id, ids):
+        """Сверяет массив, который отдаёт этот процесс, с таблицей.
+
+        Расхождение записывается в общий кэш, где его видит команда
+        check_follow_graph, а узел перечитывается при следующем
+        обращении.
+        """
+        count_event(CHECKED_KEY)
+        expected = load_adjacency(field, other, node_id)
+        if expected == ids:
+            return ids
+        count_event(DRIFTED_KEY)
+        log = cache.get(DRIFT_LOG_KEY, [])
+        log.append(
+            f'{socket.gethostname()}:{os.getpid()} {field} {node_id}: '
+            f'в графе {len(ids)}, в базе {len(expected)}'
+        )
+        cache.set(DRIFT_LOG_KEY, log[-DRIFT_LOG_SIZE:], None)
+        with self.lock:
+            if index.get(node_id) is ids:
+                del index[node_id]
+        return expected
+
+    def followees(self, user_id):
+        return self.adjacency('following', 'user', 'author', user_id)
+
+    def followers_of(self, author_id):
+        return self.adjacency('followers', 'author', 'user', author_id)
+
+    def is_following(self, user_id, author_id):
+        return contains(self.followees(user_id), author_id)
+
+    def follower_count(self, author_id):
+        return len(self.followers_of(author_id))
+
+    def following_count(self, user_id):
+        return len(self.followees(user_id))
+
+    def advance(self):
+        """Переходит на следующую версию, если никто не менял граф раньше."""
+        current = self.version
+        version = bump_version(VERSION_KEY)
+        if current is None or version != current + 1:
+            return False
+        self.version = version
+        return True
+
+    def add(self, user_id, author_id):
+        with self.lock:
+            if not self.advance():
+                return
+            if user_id in self.following:
+                insert(self.following[user_id], author_id)
+            if author_id in self.followers:
+                insert(self.followers[author_id], user_id)
+
+    def remove(self, user_id, author_id):
+        with self.lock:
+            if not self.advance():
+                return
+            if user_id in self.following:
+                remove(self.following[user_id], author_id)
+            if author_id in self.followers:
+                remove(self.followers[author_id], user_id)
+
+    def publish(self):
+        """Заставляет другие процессы перечитать граф после фиксации.
+
+        До фиксации они могли перечитать базу без нового изменения,
+        поэтому версия сдвигается ещё раз, а свой граф остаётся в силе.
+        """
+        with self.lock:
+            self.advance()
+
+    def invalidate(self):
+        bump_version(VERSION_KEY)
+
+    def load_all(self):
+        """Читает весь граф одним проходом по таблице подписок."""
+        following, followers = table_adjacency()
+        with self.lock:
+            self.reset(get_version(VERSION_KEY))
+            for index, adjacency in ((self.following, following),
+                                     (self.followers, followers)):
+                for node_id, ids in adjacency.items():
+                    index[node_id] = array('q', sorted(ids))
+
+    def check_consistency(self):
+        """Сверяет загруженные массивы с таблицей подписок.
+
+        Возвращает список расхождений; пустой список означает, что граф
+        совпадает с базой.
+        """
+        problems = []
+        tables = dict(zip(('user', 'author'), table_adjacency()))
+        for index, field in ((self.following, 'user'),
+                             (self.followers, 'author')):
+            for node_id, ids in list(index.items()):
+                if list(ids) != sorted(set(ids)):
+                    problems.append(f'{field} {node_id}: массив не упорядочен')
+                expected = tables[field].get(node_id, set())
+                if set(ids) != expected:
+                    problems.append(
+                        f'{field} {node_id}: в графе {len(ids)}, '
+                        f'в базе {len(expected)}'
+                    )
+        duplicates = duplicate_follows()
+        if duplicates:
+            problems.append(f'повторяющихся подписок: {duplicates}')
+        return problems
+
+
+def load_adjacency(field, other, node_id):
+    return array('q', sorted(set(Follow.objects.filter(**{
+        field: node_id,
+        f'{other}__isnull': False,
+    }).values_list(f'{other}_id', flat=True))))
+
+
+def count_event(key):
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def drift_report():
+    """Сколько раз процессы сверяли граф с базой и сколько расхождений
+    нашли, с последними расхождениями."""
+    values = cache.get_many((CHECKED_KEY, DRIFTED_KEY, DRIFT_LOG_KEY))
+    return (
+        values.get(CHECKED_KEY, 0),
+        values.get(DRIFTED_KEY, 0),
+        values.get(DRIFT_LOG_KEY, []),
+    )
+
+
+def clear_drift_report():
+    cache.delete_many((CHECKED_KEY, DRIFTED_KEY, DRIFT_LOG_KEY))
+
+
+def duplicate_follows():
+    return Follow.objects.values('user_id', 'author_id').annotate(
+        rows=Count('pk')).filter(rows__gt=1).count()
+
+
+def table_adjacency():
+    following = defaultdict(set)
+    followers = defaultdict(set)
+    rows = Follow.objects.filter(
+        user__isnull=False, author__isnull=False,
+    ).values_list('user_id', 'author_id').iterator()
+    for user_id, author_id in rows:
+        following[user_id].add(author_id)
+        followers[author_id].add(user_id)
+    return following, followers
+
+
+follow_graph = FollowGraph()
@@ -0,0 +1,46 @@
+from core.holes import register
+
+from .forms import CommentForm
+from .graph import follow_graph
+from .mutes import mute_filter
+from .recommendations import suggestions_for
+
+
+@register('follow_button', 'posts/includes/follow_button.html')
+def follow_button_context(request, username, author_id):
+    following = (request.user.is_authenticated
+                 and follow_graph.is_following(request.user.pk, author_id))
+    mutes = mute_filter(request.user)
+    return {
+        'username': username,
+        'is_self': request.user.pk == author_id,
+        'muted': author_id in mutes.authors,
+        'following': following,
+        'followers': follow_graph.follower_count(author_id),
+        'followees': follow_graph.following_count(author_id),
+    }
+
+
+@register('comment_form', 'posts/includes/comment_form.html')
+def comment_form_context(request, post_id, parent_id=None):
+    return {'post_id': post_id, 'parent_id': parent_id, 'form': CommentForm()}
+
+
+@register('feed_switcher', 'posts/includes/switcher.html')
+def feed_switcher_context(request, active):
+    return {'active': active}
+
+
+@register('follow_suggestions', 'posts/includes/follow_suggestions.html')
+def follow_suggestions_context(request):
+    if not request.user.is_authenticated:
+        return {'suggestions': []}
+    return {'suggestions': suggestions_for(request.user)}
+
+
+@register('group_mute_button', 'posts/includes/group_mute_button.html')
+def group_mute_button_context(request, slug, group_id):
+    return {
+        'slug': slug,
+        'muted': group_id in mute_filter(request.user).groups,
+    }
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...archive import archive_cutoff, archive_posts
+from ...models import Post
+from ...sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты и комментарии к ним в архив'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.ARCHIVE_AFTER_DAYS,
+            help='Переносить посты старше указанного числа дней',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Число постов, переносимых в одной транзакции',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать посты для переноса',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['days'])
+        if options['dry_run']:
+            count = sum(
+                Post.objects.using(alias).published().filter(
+                    pub_date__lt=cutoff).count()
+                for alias in shard_aliases()
+            )
+            self.stdout.write(f'Будет перенесено постов: {count}')
+            return
+        archived = archive_posts(cutoff, options['batch_size'])
+        self.stdout.write(f'Перенесено постов: {archived}')
@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...related import build_related
+
+
+class Command(BaseCommand):
+    help = 'Считает похожие посты по векторам TF-IDF текста и группе'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать все посты, а не только новые',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=settings.RELATED_POSTS_TOP_K,
+            help='Сколько соседей сохранять для каждого поста',
+        )
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            default=settings.RELATED_BLOCK_SIZE,
+            help='Число постов, обсчитываемых за один проход',
+        )
+        parser.add_argument(
+            '--every',
+            type=int,
+            default=0,
+            help='Повторять расчёт каждые N секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            try:
+                built = build_related(
+                    options['top'], options['block_size'], options['full'])
+            except RuntimeError as error:
+                raise CommandError(error)
+            self.stdout.write(
+                f'Посчитано постов: {built["posts"]}, '
+                f'дополнено старых списков: {built["updated"]}, '
+                f'за {time.monotonic() - started:.2f} с'
+            )
+            if not options['every']:
+                return
+            time.sleep(options['every'])
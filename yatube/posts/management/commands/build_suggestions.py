@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...recommendations import build_suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации подписок по друзьям друзей '
+        'и общим подписчикам авторов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=settings.RECOMMENDATIONS_TOP_K,
+            help='Сколько авторов сохранять для каждого пользователя',
+        )
+        parser.add_argument(
+            '--block-size',
+            type=int,
+            default=settings.RECOMMENDATIONS_BLOCK_SIZE,
+            help='Число пользователей, обсчитываемых за один проход',
+        )
+        parser.add_argument(
+            '--every',
+            type=int,
+            default=0,
+            help='Повторять расчёт каждые N секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            try:
+                built = build_suggestions(
+                    options['top'], options['block_size'])
+            except RuntimeError as error:
+                raise CommandError(error)
+            self.stdout.write(
+                f'Рекомендации для {built["users"]} пользователей, '
+                f'авторов с подписчиками: {built["authors"]}, '
+                f'за {time.monotonic() - started:.2f} с'
+            )
+            if not options['every']:
+                return
+            time.sleep(options['every'])
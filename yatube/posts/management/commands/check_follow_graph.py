@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from ...graph import (
+    clear_drift_report, drift_report, duplicate_follows, follow_graph,
+    table_adjacency,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает расхождения графов подписок в памяти процессов с '
+        'таблицей Follow, найденные выборочной сверкой; с --reset '
+        'заставляет все процессы перечитать граф'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Сбросить графы в памяти всех процессов',
+        )
+
+    def handle(self, *args, **options):
+        following, followers = table_adjacency()
+        edges = sum(len(ids) for ids in following.values())
+        self.stdout.write(
+            f'Пользователей: {len(following)}, '
+            f'авторов: {len(followers)}, подписок: {edges}'
+        )
+        duplicates = duplicate_follows()
+        if duplicates:
+            self.stdout.write(f'повторяющихся подписок: {duplicates}')
+        checked, drifted, log = drift_report()
+        self.stdout.write(
+            f'Сверок в процессах: {checked}, расхождений: {drifted}')
+        for problem in log:
+            self.stdout.write(problem)
+        if checked and not drifted:
+            self.stdout.write('Графы процессов совпадают с таблицей подписок')
+        if options['reset']:
+            follow_graph.invalidate()
+            clear_drift_report()
+            self.stdout.write('Графы процессов будут перечитаны')
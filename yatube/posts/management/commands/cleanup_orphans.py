@@ -0,0 +1,100 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...cleanup import compact, database_size, purge_orphans
+from ...sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет комментарии и подписки, оставшиеся без поста, автора '
+        'или подписчика, и при необходимости сжимает базу'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать сирот, ничего не удаляя',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Число строк, удаляемых в одной транзакции',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Пауза между пачками в секундах',
+        )
+        parser.add_argument(
+            '--archive',
+            help='Дописать удаляемые строки в файл JSON Lines',
+        )
+        parser.add_argument(
+            '--vacuum', action='store_true', help='Выполнить VACUUM')
+        parser.add_argument(
+            '--analyze', action='store_true', help='Выполнить ANALYZE')
+        parser.add_argument(
+            '--checkpoint',
+            action='store_true',
+            help='Перенести журнал WAL в файл базы (только SQLite)',
+        )
+        parser.add_argument(
+            '--every',
+            type=int,
+            default=0,
+            help='Повторять очистку каждые N секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.cleanup(options)
+            if not options['every']:
+                return
+            time.sleep(options['every'])
+
+    def cleanup(self, options):
+        dry_run = options['dry_run']
+        before = {alias: database_size(alias) for alias in shard_aliases()}
+        archive = None
+        if options['archive'] and not dry_run:
+            archive = open(options['archive'], 'a', encoding='utf-8')
+        try:
+            purged = purge_orphans(
+                options['batch_size'],
+                dry_run=dry_run,
+                archive=archive,
+                pause=options['pause'],
+            )
+        finally:
+            if archive is not None:
+                archive.close()
+        verb = 'найдено' if dry_run else 'удалено'
+        for label, count in purged.items():
+            self.stdout.write(f'{label}: {verb} {count}')
+        if dry_run:
+            return
+        for alias, size in before.items():
+            self.compact(alias, size, options)
+
+    def compact(self, alias, before, options):
+        statements = compact(
+            vacuum=options['vacuum'],
+            analyze=options['analyze'],
+            checkpoint=options['checkpoint'],
+            using=alias,
+        )
+        for statement in statements:
+            self.stdout.write(f'Выполнено в {alias}: {statement}')
+        after = database_size(alias)
+        if before and after:
+            self.stdout.write(
+                f'Размер базы {alias}: {before["size"]} -> {after["size"]} '
+                f'байт, освобождено {before["size"] - after["size"]} байт, '
+                f'свободно внутри файла {after["free"]} байт'
+            )
@@ -0,0 +1,45 @@
+import time
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ...revisions import compact_revisions
+
+
+class Command(BaseCommand):
+    help = (
+        'Прореживает старые правки постов: из правок старше заданного '
+        'срока остаётся последняя за день'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.REVISION_KEEP_DAYS,
+            help='Правки моложе этого числа дней не трогаются',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Число постов, читаемых за один запрос',
+        )
+        parser.add_argument(
+            '--every',
+            type=int,
+            default=0,
+            help='Повторять прореживание каждые N секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            cutoff = timezone.now() - timedelta(days=options['days'])
+            removed = compact_revisions(cutoff, options['batch_size'])
+            self.stdout.write(f'Удалено правок: {removed}')
+            if not options['every']:
+                return
+            time.sleep(options['every'])
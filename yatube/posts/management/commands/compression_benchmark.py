@@ -0,0 +1,63 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.utils import timezone
+
+from core.compression import ENCODINGS, compress
+
+from ...models import Group, Post, User
+
+TEMPLATES = (
+    'posts/index.html',
+    'posts/group_list.html',
+    'posts/profile.html',
+    'posts/follow.html',
+)
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает выигрыш в байтах и затраты CPU на сжатие лент'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        author = User(pk=1, username='benchmark')
+        group = Group(pk=1, slug='benchmark', title='Бенчмарк')
+        posts = []
+        for number in range(10):
+            post = Post(
+                pk=number + 1,
+                text='Текст поста для замера сжатия. ' * 10,
+                pub_date=timezone.now(),
+                group=group,
+            )
+            post.author = author
+            posts.append(post)
+        context = {
+            'page_obj': Paginator(posts, 10).page(1),
+            'author': author,
+            'group': group,
+        }
+        for template in TEMPLATES:
+            content = render_to_string(template, context, request).encode()
+            self.stdout.write(f'{template}: {len(content)} байт')
+            for encoding in ENCODINGS:
+                for fast in (True, False):
+                    started = time.perf_counter()
+                    for _ in range(options['repeat']):
+                        compressed = compress(content, encoding, fast=fast)
+                    elapsed = (time.perf_counter() - started) / options[
+                        'repeat']
+                    level = 'быстрый' if fast else 'максимальный'
+                    self.stdout.write(
+                        f'  {encoding} ({level}): {len(compressed)} байт, '
+                        f'-{1 - len(compressed) / len(content):.0%}, '
+                        f'{elapsed * 1e3:.2f} мс'
+                    )
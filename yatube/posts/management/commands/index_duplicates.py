@@ -0,0 +1,51 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...duplicates import KIND_MODELS, index_history
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит индекс MinHash/LSH по опубликованным постам и комментариям '
+        'и отмечает почти одинаковые тексты'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            choices=tuple(KIND_MODELS),
+            action='append',
+            help='Какие записи индексировать, по умолчанию все',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Число процессов для расчёта подписей',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Число записей в одной пачке',
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Удалить индекс и построить его заново',
+        )
+
+    def handle(self, *args, **options):
+        indexed = index_history(
+            options['kind'] or tuple(KIND_MODELS),
+            options['workers'],
+            options['batch_size'],
+            reset=options['reset'],
+        )
+        for kind, counts in indexed.items():
+            self.stdout.write(
+                f'{kind}: проиндексировано {counts["indexed"]}, '
+                f'похожих на более ранние {counts["duplicates"]}'
+            )
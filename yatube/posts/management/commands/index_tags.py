@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...tags import backfill
+
+
+class Command(BaseCommand):
+    help = 'Заново строит таблицы тегов и упоминаний по текстам постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Число постов, обрабатываемых в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        indexed = backfill(options['batch_size'])
+        self.stdout.write(f'Обработано постов: {indexed}')
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.prerender import prerender
+
+from ...prerender import public_paths
+
+
+class Command(BaseCommand):
+    help = 'Сохраняет публичные страницы в виде статических файлов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--with-posts',
+            action='store_true',
+            help='Также сохранить страницы всех постов',
+        )
+
+    def handle(self, *args, **options):
+        written = prerender(public_paths(options['with_posts']))
+        self.stdout.write(f'Сохранено страниц: {written}')
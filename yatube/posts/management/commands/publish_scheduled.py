@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...scheduling import publish_due
+
+
+class Command(BaseCommand):
+    help = 'Публикует запланированные посты, время которых наступило'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Число постов, публикуемых за один проход',
+        )
+        parser.add_argument(
+            '--every',
+            type=int,
+            default=0,
+            help='Проверять расписание каждые N секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            published = publish_due(options['batch_size'])
+            if published or not options['every']:
+                self.stdout.write(f'Опубликовано постов: {published}')
+            if not options['every']:
+                return
+            time.sleep(options['every'])
@@ -0,0 +1,46 @@
+import time
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ...bulk import purge_deleted
+
+
+class Command(BaseCommand):
+    help = (
+        'Насовсем удаляет посты и комментарии, скрытые дольше срока '
+        'хранения'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.SOFT_DELETE_RETENTION_DAYS,
+            help='Сколько дней хранить скрытые строки',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Число строк, удаляемых в одной транзакции',
+        )
+        parser.add_argument(
+            '--every',
+            type=int,
+            default=0,
+            help='Повторять удаление каждые N секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            cutoff = timezone.now() - timedelta(days=options['days'])
+            purged = purge_deleted(cutoff, options['batch_size'])
+            for label, count in purged.items():
+                self.stdout.write(f'{label}: удалено {count}')
+            if not options['every']:
+                return
+            time.sleep(options['every'])
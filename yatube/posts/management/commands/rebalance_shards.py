@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import pagecache
+
+from ...models import User
+from ...sharding import (
+    move_author, plan_rebalance, seed_tickets, shard_aliases,
+    sync_reference_tables,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Готовит шарды из settings.POST_SHARDS и переносит авторов '
+        'между ними. Запускается после каждого изменения списка шардов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--move',
+            nargs=2,
+            action='append',
+            default=[],
+            metavar=('USERNAME', 'SHARD'),
+            help='Перенести автора в указанный шард',
+        )
+        parser.add_argument(
+            '--auto',
+            action='store_true',
+            help='Выровнять число постов в шардах',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать план переноса',
+        )
+
+    def handle(self, *args, **options):
+        if not options['dry_run']:
+            copied = sync_reference_tables()
+            seed_tickets()
+            self.stdout.write(f'Скопировано справочных строк: {copied}')
+        moves = []
+        for username, shard in options['move']:
+            if shard not in shard_aliases():
+                raise CommandError(f'Неизвестный шард: {shard}')
+            author = User.objects.filter(username=username).first()
+            if author is None:
+                raise CommandError(f'Нет пользователя {username}')
+            moves.append((author.pk, None, shard, None))
+        if options['auto']:
+            moves.extend(plan_rebalance())
+        for author_id, _, shard, _ in moves:
+            if options['dry_run']:
+                self.stdout.write(f'Автор {author_id} -> {shard}')
+                continue
+            moved = move_author(author_id, shard)
+            self.stdout.write(
+                f'Автор {author_id} -> {shard}, перенесено постов: {moved}')
+        if moves and not options['dry_run']:
+            pagecache.invalidate()
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...bulk import render_texts
+from ...models import ArchivedComment, ArchivedPost, Comment, Post
+from ...sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново размечает тексты постов и комментариев после обновления '
+        'версии разметки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Разметить все тексты, а не только устаревшие',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.BULK_CHUNK_SIZE,
+            help='Число записей, обновляемых в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        targets = [
+            (Post, shard_aliases()),
+            (Comment, shard_aliases()),
+            (ArchivedPost, (settings.ARCHIVE_DATABASE,)),
+            (ArchivedComment, (settings.ARCHIVE_DATABASE,)),
+        ]
+        for model, aliases in targets:
+            rendered = sum(
+                render_texts(
+                    model, alias, options['batch_size'], options['all'])
+                for alias in aliases
+            )
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: размечено {rendered}')
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.19 on 2026-10-19 10:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0018_authorshard_shardticket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowSuggestion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('authors', models.TextField(verbose_name='Рекомендованные авторы (JSON)')),
+                ('computed', models.DateTimeField(auto_now=True, verbose_name='Дата расчёта')),
+                ('user', models.OneToOneField(blank=True, help_text='Пусто - рекомендации для пользователей без подписок', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='follow_suggestions', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Рекомендации подписок',
+                'verbose_name_plural': 'Рекомендации подписок',
+            },
+        ),
+    ]
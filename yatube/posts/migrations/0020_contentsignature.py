@@ -0,0 +1,42 @@
+# Generated by Django 2.2.19 on 2026-10-19 10:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0019_followsuggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentSignature',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=10, verbose_name='Тип записи')),
+                ('object_id', models.IntegerField(verbose_name='id записи')),
+                ('signature', models.BinaryField(verbose_name='Подпись MinHash')),
+                ('similarity', models.FloatField(blank=True, null=True, verbose_name='Сходство')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата индексации')),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='content_signatures', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('duplicate_of', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='posts.ContentSignature', verbose_name='Похожая запись')),
+            ],
+            options={
+                'verbose_name': 'Подпись текста',
+                'verbose_name_plural': 'Подписи текстов',
+                'ordering': ('-created',),
+            },
+        ),
+        migrations.CreateModel(
+            name='SignatureBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.BigIntegerField(db_index=True, verbose_name='Ключ корзины')),
+                ('signature', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='posts.ContentSignature', verbose_name='Подпись')),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.19 on 2026-10-19 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_contentsignature'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPosts',
+            fields=[
+                ('post_id', models.IntegerField(primary_key=True, serialize=False, verbose_name='id поста')),
+                ('related', models.TextField(verbose_name='Похожие посты (JSON)')),
+                ('computed', models.DateTimeField(auto_now=True, verbose_name='Дата расчёта')),
+            ],
+            options={
+                'verbose_name': 'Похожие посты',
+                'verbose_name_plural': 'Похожие посты',
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 2.2.19 on 2026-10-19 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0026_post_revisions'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='posts_comme_post_id_abd11d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='posts_comme_post_id_f45a88_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='posts_post_status_3d7501_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='posts_post_status_603554_idx',
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Удалён'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Удалён'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['post', 'path'], name='comment_live_path_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['post', 'depth', 'path'], name='comment_live_depth_path_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='comment_deleted_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['status', 'pub_date'], name='post_live_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['status', 'publish_at'], name='post_live_publish_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='post_deleted_at_idx'),
+        ),
+    ]
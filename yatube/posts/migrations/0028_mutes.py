@@ -0,0 +1,43 @@
+# Generated by Django 2.2.19 on 2026-10-19 11:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0027_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Mute',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('blocked', models.BooleanField(default=False, help_text='Автор не может подписаться на пользователя и комментировать его посты', verbose_name='Заблокирован')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата скрытия')),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='muted_by', to=settings.AUTH_USER_MODEL, verbose_name='Скрытый автор')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='muted_by', to='posts.Group', verbose_name='Скрытая группа')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mutes', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Скрытие',
+                'verbose_name_plural': 'Скрытые авторы и группы',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='mute',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('author__isnull', False), ('group__isnull', True)), models.Q(('author__isnull', True), ('blocked', False), ('group__isnull', False)), _connector='OR'), name='mute_author_or_group'),
+        ),
+        migrations.AddConstraint(
+            model_name='mute',
+            constraint=models.UniqueConstraint(fields=('user', 'author'), name='unique_mute_author'),
+        ),
+        migrations.AddConstraint(
+            model_name='mute',
+            constraint=models.UniqueConstraint(fields=('user', 'group'), name='unique_mute_group'),
+        ),
+    ]
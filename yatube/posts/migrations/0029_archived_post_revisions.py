@@ -0,0 +1,33 @@
+# Generated by Django 2.2.19 on 2026-10-19 11:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0028_mutes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPostRevision',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('number', models.PositiveIntegerField(verbose_name='Номер правки')),
+                ('is_snapshot', models.BooleanField(default=False, verbose_name='Полный текст')),
+                ('data', models.BinaryField(verbose_name='Сжатый текст или разница')),
+                ('created', models.DateTimeField(verbose_name='Дата правки')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='posts.ArchivedPost', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Архивная правка поста',
+                'verbose_name_plural': 'Архивные правки постов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='archivedpostrevision',
+            constraint=models.UniqueConstraint(fields=('post', 'number'), name='unique_archived_post_revision'),
+        ),
+    ]
@@ -0,0 +1,94 @@
+import hashlib
+import random
+import re
+import zlib
+
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PRIME = (1 << 31) - 1
+PERMUTATIONS = 64
+BANDS = 16
+ROWS = PERMUTATIONS // BANDS
+SHINGLE_SIZE = 5
+SEED = 41
+
+_random = random.Random(SEED)
+COEFFICIENTS = [
+    (_random.randrange(1, PRIME), _random.randrange(0, PRIME))
+    for _ in range(PERMUTATIONS)
+]
+if np is not None:
+    MULTIPLIERS = np.array([a for a, _ in COEFFICIENTS], dtype=np.uint64)
+    OFFSETS = np.array([b for _, b in COEFFICIENTS], dtype=np.uint64)
+
+NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def normalize(text):
+    return NON_WORD_RE.sub(' ', text.lower()).strip()
+
+
+def shingles(text):
+    text = normalize(text)
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {
+        text[start:start + SHINGLE_SIZE]
+        for start in range(len(text) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash(text):
+    """Подпись MinHash по символьным шинглам текста.
+
+    Каждое из PERMUTATIONS значений - минимум универсальной хеш-функции
+    (a * x + b) mod PRIME по хешам шинглов.
+    """
+    hashes = [zlib.crc32(shingle.encode()) % PRIME
+              for shingle in shingles(text)]
+    signature = array('I')
+    if np is not None:
+        values = np.array(hashes, dtype=np.uint64)
+        signature.frombytes(
+            ((MULTIPLIERS[:, None] * values + OFFSETS[:, None]) % PRIME)
+            .min(axis=1).astype(np.uint32).tobytes()
+        )
+        return signature
+    signature.extend(
+        min((a * value + b) % PRIME for value in hashes)
+        for a, b in COEFFICIENTS
+    )
+    return signature
+
+
+def to_bytes(signature):
+    return signature.tobytes()
+
+
+def from_bytes(data):
+    signature = array('I')
+    signature.frombytes(bytes(data))
+    return signature
+
+
+def band_keys(signature):
+    """Ключи корзин LSH: по одному на каждую полосу из ROWS значений."""
+    keys = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(
+            signature[band * ROWS:(band + 1) * ROWS].tobytes(),
+            digest_size=8,
+            salt=band.to_bytes(2, 'big'),
+        ).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def similarity(first, second):
+    """Оценка коэффициента Жаккара по доле совпавших значений подписей."""
+    return sum(a == b for a, b in zip(first, second)) / PERMUTATIONS
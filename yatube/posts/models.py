@@ -1,9 +1,58 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
 
 User = get_user_model()
 
 
+class ShardedQuerySet(models.QuerySet):
+    """create() выбирает базу по самому объекту, а не по менеджеру."""
+
+    def create(self, **kwargs):
+        if self._db is not None:
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True)
+        return obj
+
+
+class LiveManager(models.Manager):
+    """Менеджер по умолчанию: только не удалённые строки."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+LIVE = models.Q(deleted_at__isnull=True)
+DELETED = models.Q(deleted_at__isnull=False)
+
+
+class SoftDeleteModel(models.Model):
+    deleted_at = models.DateTimeField(
+        blank=True, null=True, editable=False, verbose_name='Удалён')
+
+    def soft_delete(self):
+        """Скрывает строку; насовсем её удалит purge_deleted."""
+        self.deleted_at = timezone.now()
+        self.save(update_fields=('deleted_at',))
+
+    def restore(self):
+        self.deleted_at = None
+        self.save(update_fields=('deleted_at',))
+
+    @property
+    def is_deleted(self):
+        return self.deleted_at is not None
+
+    class Meta:
+        abstract = True
+
+
+class PostQuerySet(ShardedQuerySet):
+    def published(self):
+        return self.filter(status=Post.PUBLISHED)
+
+
 class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Название группы')
     slug = models.SlugField(
@@ -20,15 +69,39 @@ class Group(models.Model):
         verbose_name_plural = 'Группы'
 
 
-class Post(models.Model):
+class Post(SoftDeleteModel):
+    PUBLISHED = 'published'
+    SCHEDULED = 'scheduled'
+    DRAFT = 'draft'
+    STATUSES = (
+        (PUBLISHED, 'Опубликован'),
+        (SCHEDULED, 'Запланирован'),
+        (DRAFT, 'Черновик'),
+    )
+
     text = models.TextField(
         null=True,
         max_length=400,
         verbose_name='Текст поста',
         help_text='Текст нового поста',
     )
+    rendered_text = models.TextField(
+        blank=True, editable=False, verbose_name='Текст в HTML')
+    render_version = models.PositiveSmallIntegerField(
+        default=0, editable=False, verbose_name='Версия разметки')
     pub_date = models.DateTimeField(
-        auto_now_add=True, verbose_name='Дата публикации'
+        auto_now_add=True, db_index=True, verbose_name='Дата публикации'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PUBLISHED,
+        verbose_name='Статус',
+    )
+    publish_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Запланированная публикация',
     )
     author = models.ForeignKey(
         User,
@@ -51,16 +124,50 @@ class Post(models.Model):
         blank=True
     )
 
+    objects = LiveManager.from_queryset(PostQuerySet)()
+    all_objects = PostQuerySet.as_manager()
+
     def __str__(self):
         return self.text[:20]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        post._loaded_status = post.__dict__.get('status')
+        post._loaded_text = post.__dict__.get('text')
+        return post
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_status = self.status
+        self._loaded_text = self.text
+
+    @property
+    def is_published(self):
+        return self.status == self.PUBLISHED
+
+    def status_changed(self):
+        """Статус изменился с чтения из базы, у нового поста - всегда."""
+        return getattr(self, '_loaded_status', None) != self.status
+
     class Meta:
         verbose_name_plural = 'Посты'
         verbose_name = 'Пост'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('status', 'pub_date'), condition=LIVE,
+                name='post_live_status_date_idx'),
+            models.Index(
+                fields=('status', 'publish_at'), condition=LIVE,
+                name='post_live_publish_at_idx'),
+            models.Index(
+                fields=('deleted_at',), condition=DELETED,
+                name='post_deleted_at_idx'),
+        )
 
 
-class Comment(models.Model):
+class Comment(SoftDeleteModel):
     post = models.ForeignKey(
         Post,
         on_delete=models.SET_NULL,
@@ -85,9 +192,49 @@ class Comment(models.Model):
         verbose_name='Текст комментария',
         help_text='Текст нового комментария',
     )
+    rendered_text = models.TextField(
+        blank=True, editable=False, verbose_name='Текст в HTML')
+    render_version = models.PositiveSmallIntegerField(
+        default=0, editable=False, verbose_name='Версия разметки')
     created = models.DateTimeField(
-        auto_now_add=True, verbose_name='Дата публикации комментария'
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата публикации комментария'
+    )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        related_name='replies',
+        blank=True,
+        null=True,
+        verbose_name='Ответ на комментарий',
     )
+    path = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name='Путь в дереве комментариев',
+    )
+    depth = models.PositiveSmallIntegerField(
+        default=0, editable=False, verbose_name='Глубина')
+    reply_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Ответов в ветке')
+
+    objects = LiveManager.from_queryset(ShardedQuerySet)()
+    all_objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('post', 'path'), condition=LIVE,
+                name='comment_live_path_idx'),
+            models.Index(
+                fields=('post', 'depth', 'path'), condition=LIVE,
+                name='comment_live_depth_path_idx'),
+            models.Index(
+                fields=('deleted_at',), condition=DELETED,
+                name='comment_deleted_at_idx'),
+        )
 
 
 class Follow(models.Model):
@@ -107,3 +254,335 @@ class Follow(models.Model):
         null=True,
         verbose_name='Имя автора',
     )
+
+
+class Mute(models.Model):
+    """Автор или группа, чьи посты пользователь не хочет видеть в лентах."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mutes',
+        verbose_name='Пользователь',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='muted_by',
+        blank=True,
+        null=True,
+        verbose_name='Скрытый автор',
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='muted_by',
+        blank=True,
+        null=True,
+        verbose_name='Скрытая группа',
+    )
+    blocked = models.BooleanField(
+        default=False,
+        verbose_name='Заблокирован',
+        help_text='Автор не может подписаться на пользователя '
+                  'и комментировать его посты',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата скрытия')
+
+    class Meta:
+        verbose_name_plural = 'Скрытые авторы и группы'
+        verbose_name = 'Скрытие'
+        constraints = (
+            models.CheckConstraint(
+                check=models.Q(author__isnull=False, group__isnull=True)
+                | models.Q(author__isnull=True, group__isnull=False,
+                           blocked=False),
+                name='mute_author_or_group',
+            ),
+            models.UniqueConstraint(
+                fields=('user', 'author'), name='unique_mute_author'),
+            models.UniqueConstraint(
+                fields=('user', 'group'), name='unique_mute_group'),
+        )
+
+
+class ArchivedPost(models.Model):
+    is_archived = True
+
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(null=True, verbose_name='Текст поста')
+    rendered_text = models.TextField(
+        blank=True, editable=False, verbose_name='Текст в HTML')
+    render_version = models.PositiveSmallIntegerField(
+        default=0, editable=False, verbose_name='Версия разметки')
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='archived_posts',
+        blank=True,
+        null=True,
+        verbose_name='Группа',
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    archived = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата переноса в архив')
+
+    def __str__(self):
+        return self.text[:20]
+
+    class Meta:
+        verbose_name_plural = 'Архивные посты'
+        verbose_name = 'Архивный пост'
+        ordering = ('-pub_date',)
+        indexes = (models.Index(fields=('author', '-pub_date')),)
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='archived_comments',
+        blank=True,
+        null=True,
+        verbose_name='Автор комментария',
+    )
+    text = models.TextField(null=True, verbose_name='Текст комментария')
+    rendered_text = models.TextField(
+        blank=True, editable=False, verbose_name='Текст в HTML')
+    render_version = models.PositiveSmallIntegerField(
+        default=0, editable=False, verbose_name='Версия разметки')
+    created = models.DateTimeField(
+        verbose_name='Дата публикации комментария')
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='replies',
+        blank=True,
+        null=True,
+        verbose_name='Ответ на комментарий',
+    )
+    path = models.CharField(
+        max_length=255, blank=True, verbose_name='Путь в дереве комментариев')
+    depth = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Глубина')
+    reply_count = models.PositiveIntegerField(
+        default=0, verbose_name='Ответов в ветке')
+
+    class Meta:
+        verbose_name_plural = 'Архивные комментарии'
+        verbose_name = 'Архивный комментарий'
+        ordering = ('created',)
+        indexes = (
+            models.Index(fields=('post', 'path')),
+            models.Index(fields=('post', 'depth', 'path')),
+        )
+
+
+class ArchivedPostRevision(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+        verbose_name='Пост',
+    )
+    number = models.PositiveIntegerField(verbose_name='Номер правки')
+    is_snapshot = models.BooleanField(
+        default=False, verbose_name='Полный текст')
+    data = models.BinaryField(verbose_name='Сжатый текст или разница')
+    created = models.DateTimeField(verbose_name='Дата правки')
+
+    class Meta:
+        verbose_name_plural = 'Архивные правки постов'
+        verbose_name = 'Архивная правка поста'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('post', 'number'),
+                name='unique_archived_post_revision',
+            ),
+        )
+
+
+class AuthorShard(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shard',
+        verbose_name='Автор',
+    )
+    shard = models.CharField(max_length=100, verbose_name='База данных')
+
+    class Meta:
+        verbose_name_plural = 'Размещение авторов'
+        verbose_name = 'Размещение автора'
+
+
+class ShardTicket(models.Model):
+    """Общий для всех шардов счётчик ключей постов и комментариев."""
+
+
+class FollowSuggestion(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        blank=True,
+        null=True,
+        verbose_name='Пользователь',
+        help_text='Пусто - рекомендации для пользователей без подписок',
+    )
+    authors = models.TextField(verbose_name='Рекомендованные авторы (JSON)')
+    computed = models.DateTimeField(
+        auto_now=True, verbose_name='Дата расчёта')
+
+    class Meta:
+        verbose_name_plural = 'Рекомендации подписок'
+        verbose_name = 'Рекомендации подписок'
+
+
+class ContentSignature(models.Model):
+    KINDS = (('post', 'Пост'), ('comment', 'Комментарий'))
+
+    id = models.BigIntegerField(primary_key=True)
+    kind = models.CharField(
+        max_length=10, choices=KINDS, verbose_name='Тип записи')
+    object_id = models.IntegerField(verbose_name='id записи')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='content_signatures',
+        blank=True,
+        null=True,
+        verbose_name='Автор',
+    )
+    signature = models.BinaryField(verbose_name='Подпись MinHash')
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        related_name='duplicates',
+        blank=True,
+        null=True,
+        verbose_name='Похожая запись',
+    )
+    similarity = models.FloatField(
+        blank=True, null=True, verbose_name='Сходство')
+    created = models.DateTimeField(
+        auto_now_add=True, verbose_name='Дата индексации')
+
+    class Meta:
+        verbose_name_plural = 'Подписи текстов'
+        verbose_name = 'Подпись текста'
+        ordering = ('-created',)
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
+
+
+class SignatureBucket(models.Model):
+    key = models.BigIntegerField(db_index=True, verbose_name='Ключ корзины')
+    signature = models.ForeignKey(
+        ContentSignature,
+        on_delete=models.CASCADE,
+        related_name='buckets',
+        verbose_name='Подпись',
+    )
+
+
+class RelatedPosts(models.Model):
+    post_id = models.IntegerField(primary_key=True, verbose_name='id поста')
+    related = models.TextField(verbose_name='Похожие посты (JSON)')
+    computed = models.DateTimeField(
+        auto_now=True, verbose_name='Дата расчёта')
+
+    class Meta:
+        verbose_name_plural = 'Похожие посты'
+        verbose_name = 'Похожие посты'
+
+
+class PostTag(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='tags',
+        verbose_name='Пост',
+    )
+    tag = models.CharField(max_length=50, verbose_name='Тег')
+    pub_date = models.DateTimeField(verbose_name='Дата публикации поста')
+
+    class Meta:
+        verbose_name_plural = 'Теги постов'
+        verbose_name = 'Тег поста'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('post', 'tag'), name='unique_post_tag'),
+        )
+        indexes = (models.Index(fields=('tag', '-pub_date', '-post')),)
+
+
+class PostMention(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Пост',
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Упомянутый пользователь',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации поста')
+
+    class Meta:
+        verbose_name_plural = 'Упоминания'
+        verbose_name = 'Упоминание'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('post', 'user'), name='unique_post_mention'),
+        )
+        indexes = (models.Index(fields=('user', '-pub_date', '-post')),)
+
+
+class PostRevision(models.Model):
+    """Правка текста поста: полный снимок или сжатая разница с прошлой."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='revisions',
+        verbose_name='Пост',
+    )
+    number = models.PositiveIntegerField(verbose_name='Номер правки')
+    is_snapshot = models.BooleanField(
+        default=False, verbose_name='Полный текст')
+    data = models.BinaryField(verbose_name='Сжатый текст или разница')
+    created = models.DateTimeField(
+        default=timezone.now, verbose_name='Дата правки')
+
+    class Meta:
+        verbose_name_plural = 'Правки постов'
+        verbose_name = 'Правка поста'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('post', 'number'), name='unique_post_revision'),
+        )
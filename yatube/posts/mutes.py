@@ -0,0 +1,157 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from .models import Mute
+
+PROBE_SIZE = 10
+
+
+def mutes_key(user_id):
+    return f'mutes:{user_id}'
+
+
+class MuteFilter:
+    """Скрытые пользователем авторы и группы.
+
+    В кэше лежат два отсортированных кортежа id, при сборке ленты пост
+    проверяется по множествам без запросов к базе.
+    """
+
+    def __init__(self, author_ids=(), group_ids=(), user_id=None):
+        self.authors = frozenset(author_ids)
+        self.groups = frozenset(group_ids)
+        self.user_id = user_id
+
+    def __bool__(self):
+        return bool(self.authors or self.groups)
+
+    def hides(self, post):
+        return post.author_id in self.authors or post.group_id in self.groups
+
+    def without_group(self, group_id):
+        return MuteFilter(
+            self.authors, self.groups - {group_id}, self.user_id)
+
+    def apply(self, posts, feed):
+        if not self:
+            return posts
+        return FilteredPosts(posts, self, f'{mutes_key(self.user_id)}:{feed}')
+
+
+def mute_filter(user):
+    if not user.is_authenticated:
+        return MuteFilter()
+    if not hasattr(user, '_mute_filter'):
+        key = mutes_key(user.pk)
+        ids = cache.get(key)
+        if ids is None:
+            rows = Mute.objects.filter(user_id=user.pk).values_list(
+                'author_id', 'group_id')
+            ids = (
+                tuple(sorted(author_id for author_id, _ in rows if author_id)),
+                tuple(sorted(group_id for _, group_id in rows if group_id)),
+            )
+            cache.set(key, ids, settings.MUTES_CACHE_TIMEOUT)
+        user._mute_filter = MuteFilter(*ids, user_id=user.pk)
+    return user._mute_filter
+
+
+def has_mutes(request):
+    return bool(mute_filter(request.user))
+
+
+def invalidate(user_id):
+    cache.delete(mutes_key(user_id))
+
+
+def is_blocked(user_id, by_user_id):
+    return Mute.objects.filter(
+        user_id=by_user_id, author_id=user_id, blocked=True).exists()
+
+
+class EstimatedPaginator(Paginator):
+    """Страница всегда полная: число постов лишь оценка, и последняя
+    страница не обрезается по нему."""
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self)
+
+
+class FilteredPosts:
+    """Лента без постов скрытых авторов и групп.
+
+    Исходная лента читается кусками с запасом MUTE_OVERFETCH, но не
+    больше MUTE_SCAN_LIMIT постов за запрос. Для прочитанного
+    запоминается, с какого места исходной ленты начинается каждая
+    позиция отфильтрованной, поэтому следующая страница продолжает
+    чтение с этого места. Пока лента не дочитана до конца, число постов
+    оценивается по доле скрытых среди прочитанных.
+    """
+
+    paginator_class = EstimatedPaginator
+
+    def __init__(self, posts, mutes, key):
+        self.posts = posts
+        self.mutes = mutes
+        self.key = key
+
+    @cached_property
+    def total(self):
+        return self.posts.count()
+
+    @cached_property
+    def state(self):
+        signature = (self.total, self.mutes.authors, self.mutes.groups)
+        state = cache.get(self.key)
+        if state is None or state['signature'] != signature:
+            state = {'signature': signature, 'marks': {0: 0}, 'end': None}
+        return state
+
+    def count(self):
+        state = self.state
+        if state['end'] is None and len(state['marks']) == 1:
+            self[:PROBE_SIZE]
+        if state['end'] is not None:
+            return state['end']
+        position, offset = max(state['marks'].items())
+        estimate = position + round(
+            (self.total - offset) * position / max(offset, 1))
+        return min(max(estimate, position + 1), self.total)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = self.count() if key.stop is None else key.stop
+        marks = self.state['marks']
+        position = max(mark for mark in marks if mark <= start)
+        offset = marks[position]
+        size = max(stop - start, 1) * settings.MUTE_OVERFETCH
+        limit = min(self.total, offset + settings.MUTE_SCAN_LIMIT)
+        kept = []
+        while position < stop and offset < limit:
+            rows = list(self.posts[offset:min(offset + size, limit)])
+            if not rows:
+                break
+            for post in rows:
+                offset += 1
+                if self.mutes.hides(post):
+                    continue
+                if position >= start:
+                    kept.append(post)
+                position += 1
+                if position == stop:
+                    marks[stop] = offset
+            marks[position] = offset
+        if offset >= self.total:
+            self.state['end'] = position
+        cache.set(self.key, self.state, settings.MUTES_CACHE_TIMEOUT)
+        return kept[:stop - start]
@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.urls import reverse
+
+from core.prerender import prerender
+
+from .models import Group, Post, User
+from .sharding import shard_aliases
+
+
+def public_paths(with_posts=False):
+    yield reverse('about:author')
+    yield reverse('about:tech')
+    yield reverse('posts:posts_index')
+    for slug in Group.objects.values_list('slug', flat=True).iterator():
+        yield reverse('posts:posts_group', kwargs={'slug': slug})
+    author_ids = set()
+    for alias in shard_aliases():
+        author_ids.update(Post.objects.using(alias).order_by().values_list(
+            'author_id', flat=True).distinct())
+    authors = User.objects.filter(pk__in=author_ids)
+    for username in authors.values_list('username', flat=True).iterator():
+        yield reverse('posts:profile', kwargs={'username': username})
+    if with_posts:
+        for alias in shard_aliases():
+            for pk in Post.objects.using(alias).values_list(
+                    'pk', flat=True).iterator():
+                yield reverse('posts:post_detail', kwargs={'post_id': pk})
+
+
+def post_paths(post, group_slugs=()):
+    paths = {
+        reverse('posts:posts_index'),
+        reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+    }
+    username = User.objects.filter(
+        pk=post.author_id).values_list('username', flat=True).first()
+    if username is not None:
+        paths.add(reverse('posts:profile', kwargs={'username': username}))
+    for slug in group_slugs:
+        paths.add(reverse('posts:posts_group', kwargs={'slug': slug}))
+    return paths
+
+
+def prerender_on_commit(paths):
+    transaction.on_commit(lambda: prerender(sorted(paths)))
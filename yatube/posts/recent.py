@@ -0,0 +1,161 @@
+import threading
+
+from collections import OrderedDict, deque
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Group, Post, User
+from .sharding import sharded
+from .utility import bump_version, get_version
+
+VERSION_KEY = 'recent:version'
+POST_FIELDS = (
+    'id', 'text', 'rendered_text', 'render_version', 'pub_date', 'status',
+    'author_id', 'group_id', 'image',
+)
+
+
+class Feed:
+    def __init__(self, rows, total):
+        self.rows = deque(rows, maxlen=settings.RECENT_POSTS_SIZE)
+        self.total = total
+
+
+class BufferedPosts:
+    """Лента, первые посты которой берутся из буфера без запросов к базе.
+
+    Строки, авторы и группы снимаются вместе под замком буфера, поэтому
+    сброс буфера в другом потоке не ломает уже собираемую страницу.
+    """
+
+    def __init__(self, feed, authors, groups, fallback):
+        self.rows = list(feed.rows)
+        self.total = feed.total
+        self.authors = authors
+        self.groups = groups
+        self.fallback = fallback
+
+    def count(self):
+        return self.total
+
+    def __len__(self):
+        return self.total
+
+    def materialize(self, row):
+        *values, db = row
+        post = Post.from_db(db, POST_FIELDS, values)
+        post.author = self.authors[post.author_id]
+        post.group = self.groups.get(post.group_id)
+        return post
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = self.total if key.stop is None else key.stop
+        if stop <= len(self.rows) or len(self.rows) >= self.total:
+            return [self.materialize(row) for row in self.rows[start:stop]]
+        return list(sharded(self.fallback)[start:stop])
+
+
+class RecentPosts:
+    """Кольцевой буфер самых свежих постов в памяти процесса.
+
+    Посты хранятся кортежами, авторы - только с именем. Буфер
+    дополняется сигналами в том процессе, где пост создан; остальные
+    процессы замечают новую версию в общем кэше и перечитывают базу.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.reset(None)
+
+    def reset(self, version):
+        self.version = version
+        self.feed = None
+        self.groups = OrderedDict()
+        self.authors = {}
+        self.group_by_id = {}
+
+    def check(self):
+        version = get_version(VERSION_KEY)
+        if version != self.version:
+            with self.lock:
+                self.reset(version)
+
+    def compact(self, post):
+        if post.author_id not in self.authors:
+            self.authors[post.author_id] = User.from_db(
+                DEFAULT_DB_ALIAS,
+                ('id', 'username'),
+                (post.author_id, post.author.username),
+            )
+        if post.group_id and post.group_id not in self.group_by_id:
+            self.group_by_id[post.group_id] = post.group
+        return (
+            post.pk, post.text, post.rendered_text, post.render_version,
+            post.pub_date, post.status, post.author_id, post.group_id,
+            post.image.name, post._state.db,
+        )
+
+    def load(self, queryset):
+        posts = sharded(queryset.select_related('author', 'group'))
+        total = posts.count()
+        return Feed(
+            [self.compact(post)
+             for post in posts[:settings.RECENT_POSTS_SIZE]],
+            total,
+        )
+
+    def index_posts(self):
+        self.check()
+        with self.lock:
+            if self.feed is None:
+                self.feed = self.load(Post.objects.published())
+            return BufferedPosts(
+                self.feed, self.authors, self.group_by_id,
+                Post.objects.published())
+
+    def group_posts(self, slug):
+        """Группа и её лента или None, если группы нет."""
+        self.check()
+        with self.lock:
+            if slug in self.groups:
+                self.groups.move_to_end(slug)
+            else:
+                group = Group.objects.filter(slug=slug).first()
+                if group is None:
+                    return None
+                self.group_by_id[group.pk] = group
+                self.groups[slug] = (
+                    group, self.load(group.posts.published()))
+                if len(self.groups) > settings.RECENT_GROUPS_LIMIT:
+                    self.groups.popitem(last=False)
+            group, feed = self.groups[slug]
+            return group, BufferedPosts(
+                feed, self.authors, self.group_by_id,
+                group.posts.published())
+
+    def push(self, post):
+        """Добавляет только что созданный пост в начало лент."""
+        with self.lock:
+            current = self.version
+            version = bump_version(VERSION_KEY)
+            if current is None or version != current + 1:
+                return
+            self.version = version
+            row = self.compact(post)
+            if self.feed is not None:
+                self.feed.rows.appendleft(row)
+                self.feed.total += 1
+            for group, feed in self.groups.values():
+                if group.pk == post.group_id:
+                    feed.rows.appendleft(row)
+                    feed.total += 1
+
+    def invalidate(self):
+        bump_version(VERSION_KEY)
+
+
+recent_posts = RecentPosts()
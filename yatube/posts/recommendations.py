@@ -0,0 +1,196 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+try:
+    import numpy as np
+
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+from .graph import follow_graph
+from .models import Follow, FollowSuggestion, User
+
+POPULAR_KEY = 'suggest:popular'
+
+
+def suggestions_key(user_id):
+    return f'suggest:{user_id}' if user_id is not None else POPULAR_KEY
+
+
+def follow_matrix():
+    """Матрица смежности подписок: строка - подписчик, столбец - автор.
+
+    Строки и столбцы пронумерованы по отсортированному массиву id всех
+    пользователей, встречающихся в подписках.
+    """
+    edges = np.array(list(
+        Follow.objects.filter(user__isnull=False, author__isnull=False)
+        .values_list('user_id', 'author_id')
+    ), dtype=np.int64).reshape(-1, 2)
+    node_ids = np.unique(edges)
+    matrix = sparse.csr_matrix(
+        (
+            np.ones(len(edges)),
+            (np.searchsorted(node_ids, edges[:, 0]),
+             np.searchsorted(node_ids, edges[:, 1])),
+        ),
+        shape=(len(node_ids), len(node_ids)),
+    )
+    matrix.data[:] = 1
+    return node_ids, matrix
+
+
+def cofollow_similarity(matrix):
+    """Косинусная близость авторов по общим подписчикам."""
+    followers = np.asarray(matrix.sum(axis=0), dtype=float).ravel()
+    norm = np.zeros_like(followers)
+    np.divide(1, np.sqrt(followers), out=norm, where=followers > 0)
+    scale = sparse.diags(norm)
+    similarity = (scale @ (matrix.T @ matrix) @ scale).tocsr()
+    similarity = similarity - sparse.diags(similarity.diagonal())
+    similarity.eliminate_zeros()
+    return similarity.tocsr()
+
+
+def score_block(matrix, similarity, rows):
+    """Оценки авторов для пользователей из строк rows.
+
+    Друзья друзей дают число путей длины два, близость по общим
+    подписчикам - сумму косинусов с уже выбранными авторами. Сам
+    пользователь и его подписки из оценок исключаются.
+    """
+    block = matrix[rows]
+    scores = (block @ matrix + block @ similarity).tocsr()
+    own = sparse.csr_matrix(
+        (np.ones(len(rows)), (np.arange(len(rows)), rows)),
+        shape=block.shape,
+    )
+    scores = scores - scores.multiply(block.maximum(own))
+    scores = sparse.csr_matrix(scores)
+    scores.eliminate_zeros()
+    return scores
+
+
+def top_columns(data, columns, node_ids, top):
+    if len(data) > top:
+        picked = np.argpartition(-data, top - 1)[:top]
+        data, columns = data[picked], columns[picked]
+    order = np.lexsort((node_ids[columns], -data))
+    return [int(node_id) for node_id in node_ids[columns[order]]]
+
+
+def with_usernames(suggestions):
+    author_ids = {
+        author_id for ids in suggestions.values() for author_id in ids}
+    authors = User.objects.only('username').in_bulk(author_ids)
+    return {
+        user_id: [
+            {'id': author_id, 'username': authors[author_id].username}
+            for author_id in ids if author_id in authors
+        ]
+        for user_id, ids in suggestions.items()
+    }
+
+
+def store(suggestions):
+    suggestions = with_usernames(suggestions)
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(
+            user_id__in=[pk for pk in suggestions if pk is not None]).delete()
+        if None in suggestions:
+            FollowSuggestion.objects.filter(user__isnull=True).delete()
+        FollowSuggestion.objects.bulk_create(
+            FollowSuggestion(user_id=user_id, authors=json.dumps(authors))
+            for user_id, authors in suggestions.items()
+        )
+    cache.set_many(
+        {suggestions_key(pk): authors for pk, authors in suggestions.items()},
+        settings.RECOMMENDATIONS_CACHE_TIMEOUT,
+    )
+
+
+def build_suggestions(top=None, block_size=None):
+    """Пересчитывает рекомендации для всех пользователей с подписками.
+
+    Матрицы перемножаются блоками по block_size строк, чтобы плотные
+    промежуточные оценки не занимали память целиком. Для каждого
+    пользователя сохраняются лучшие top авторов, а отдельной строкой -
+    самые читаемые авторы для тех, у кого подписок ещё нет.
+    """
+    if sparse is None:
+        raise RuntimeError('Для расчёта рекомендаций нужны numpy и scipy')
+    top = top or settings.RECOMMENDATIONS_TOP_K
+    block_size = block_size or settings.RECOMMENDATIONS_BLOCK_SIZE
+    started = timezone.now()
+    node_ids, matrix = follow_matrix()
+    similarity = cofollow_similarity(matrix)
+    followers = np.asarray(matrix.sum(axis=0)).ravel()
+    popular = np.flatnonzero(followers)
+    store({None: top_columns(
+        followers[popular].astype(float), popular, node_ids, top)})
+    subscribers = np.flatnonzero(np.diff(matrix.indptr))
+    stored = 0
+    for start in range(0, len(subscribers), block_size):
+        rows = subscribers[start:start + block_size]
+        scores = score_block(matrix, similarity, rows)
+        suggestions = {}
+        for index, row in enumerate(rows):
+            begin, end = scores.indptr[index], scores.indptr[index + 1]
+            suggestions[int(node_ids[row])] = top_columns(
+                scores.data[begin:end],
+                scores.indices[begin:end],
+                node_ids,
+                top,
+            )
+        store(suggestions)
+        stored += len(suggestions)
+    stale = FollowSuggestion.objects.filter(computed__lt=started)
+    cache.delete_many([
+        suggestions_key(pk) for pk in stale.values_list('user_id', flat=True)
+    ])
+    stale.delete()
+    return {'users': stored, 'authors': len(popular)}
+
+
+def load_suggestions(user_ids):
+    rows = dict(FollowSuggestion.objects.filter(
+        user_id__in=[pk for pk in user_ids if pk is not None]
+    ).values_list('user_id', 'authors'))
+    if None in user_ids:
+        rows[None] = FollowSuggestion.objects.filter(
+            user__isnull=True).values_list('authors', flat=True).first()
+    return {
+        pk: json.loads(rows[pk]) if rows.get(pk) else []
+        for pk in user_ids
+    }
+
+
+def suggestions_for(user, limit=None):
+    """Рекомендованные авторы из кэша, без обхода графа подписок.
+
+    Пользователь без своих рекомендаций получает самых читаемых
+    авторов. Авторы, на которых он подписался после расчёта,
+    отсеиваются по графу подписок в памяти.
+    """
+    limit = limit or settings.RECOMMENDATIONS_SHOWN
+    keys = {user.pk: suggestions_key(user.pk), None: POPULAR_KEY}
+    cached = cache.get_many(keys.values())
+    missing = [pk for pk, key in keys.items() if key not in cached]
+    if missing:
+        loaded = load_suggestions(missing)
+        cache.set_many(
+            {keys[pk]: authors for pk, authors in loaded.items()},
+            settings.RECOMMENDATIONS_CACHE_TIMEOUT,
+        )
+        cached.update({keys[pk]: authors for pk, authors in loaded.items()})
+    authors = cached[keys[user.pk]] or cached[POPULAR_KEY]
+    return [
+        author for author in authors
+        if author['id'] != user.pk
+        and not follow_graph.is_following(user.pk, author['id'])
+    ][:limit]
@@ -0,0 +1,189 @@
+import json
+import re
+import zlib
+
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+try:
+    import numpy as np
+
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+from .models import Post, RelatedPosts
+from .sharding import shard_aliases
+
+FEATURES = 1 << 18
+SNIPPET_LENGTH = 100
+WORD_RE = re.compile(r'\w{2,}')
+
+
+def related_key(post_id):
+    return f'related:{post_id}'
+
+
+def text_features(text):
+    """Хешированные униграммы и биграммы слов текста."""
+    words = WORD_RE.findall((text or '').lower())
+    grams = words + [f'{first} {second}'
+                     for first, second in zip(words, words[1:])]
+    return Counter(zlib.crc32(gram.encode()) % FEATURES for gram in grams)
+
+
+def normalize_rows(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1))).ravel()
+    scale = np.zeros_like(norms)
+    np.divide(1, norms, out=scale, where=norms > 0)
+    return sparse.diags(scale) @ matrix
+
+
+def post_vectors():
+    """Нормированные векторы TF-IDF всех постов со всех шардов.
+
+    К хешированным словам добавляется признак группы с весом
+    RELATED_GROUP_WEIGHT, чтобы посты одной группы были ближе.
+    """
+    ids, snippets, group_ids = [], {}, []
+    indptr, indices, counts = [0], [], []
+    for alias in shard_aliases():
+        posts = Post.objects.using(alias).published().order_by('pk')
+        for pk, text, group_id in posts.values_list(
+                'pk', 'text', 'group_id').iterator():
+            features = text_features(text)
+            indices.extend(features)
+            counts.extend(features.values())
+            indptr.append(len(indices))
+            ids.append(pk)
+            group_ids.append(group_id or 0)
+            snippets[pk] = (text or '')[:SNIPPET_LENGTH]
+    matrix = sparse.csr_matrix(
+        (np.array(counts, dtype=float), indices, indptr),
+        shape=(len(ids), FEATURES),
+    )
+    matrix.data = 1 + np.log(matrix.data)
+    frequency = np.bincount(matrix.indices, minlength=FEATURES)
+    idf = np.log((1 + len(ids)) / (1 + frequency)) + 1
+    matrix = normalize_rows(matrix @ sparse.diags(idf))
+    groups, group_index = np.unique(group_ids, return_inverse=True)
+    membership = sparse.csr_matrix(
+        (np.where(groups[group_index] > 0,
+                  settings.RELATED_GROUP_WEIGHT, 0.0),
+         (np.arange(len(ids)), group_index)),
+        shape=(len(ids), len(groups)),
+    )
+    matrix = normalize_rows(sparse.hstack((matrix, membership)).tocsr())
+    return np.array(ids, dtype=np.int64), snippets, matrix
+
+
+def nearest(matrix, rows, top):
+    """Для строк rows - пары (номер строки, сходство) лучших соседей."""
+    scores = (matrix[rows] @ matrix.T).tocsr()
+    neighbours = []
+    for index, row in enumerate(rows):
+        begin, end = scores.indptr[index], scores.indptr[index + 1]
+        data, columns = scores.data[begin:end], scores.indices[begin:end]
+        keep = (columns != row) & (data >= settings.RELATED_MIN_SCORE)
+        data, columns = data[keep], columns[keep]
+        if len(data) > top:
+            picked = np.argpartition(-data, top - 1)[:top]
+            data, columns = data[picked], columns[picked]
+        order = np.argsort(-data, kind='stable')
+        neighbours.append(list(zip(
+            columns[order].tolist(), data[order].tolist())))
+    return neighbours
+
+
+def store(related):
+    with transaction.atomic():
+        RelatedPosts.objects.filter(post_id__in=list(related)).delete()
+        RelatedPosts.objects.bulk_create(
+            RelatedPosts(post_id=pk, related=json.dumps(posts))
+            for pk, posts in related.items()
+        )
+    cache.set_many(
+        {related_key(pk): posts for pk, posts in related.items()},
+        settings.RELATED_CACHE_TIMEOUT,
+    )
+
+
+def merge(current, candidates, top):
+    merged = {post['id']: post for post in current}
+    for post in candidates:
+        merged[post['id']] = post
+    return sorted(
+        merged.values(), key=lambda post: (-post['score'], post['id']))[:top]
+
+
+def build_related(top=None, block_size=None, full=False):
+    """Считает похожие посты и сохраняет списки соседей.
+
+    Без full обсчитываются только посты, для которых списка ещё нет:
+    их соседи ищутся по всем постам, а сами новые посты добавляются в
+    списки тех старых постов, которые попали к ним в соседи. Полный
+    пересчёт заодно удаляет списки удалённых постов.
+    """
+    if sparse is None:
+        raise RuntimeError('Для расчёта похожих постов нужны numpy и scipy')
+    top = top or settings.RELATED_POSTS_TOP_K
+    block_size = block_size or settings.RELATED_BLOCK_SIZE
+    started = timezone.now()
+    ids, snippets, matrix = post_vectors()
+    targets = np.arange(len(ids))
+    if not full:
+        known = set(RelatedPosts.objects.values_list('post_id', flat=True))
+        targets = np.array(
+            [row for row, pk in enumerate(ids.tolist()) if pk not in known],
+            dtype=np.int64,
+        )
+    new_ids = set(ids[targets].tolist())
+    backlinks = {}
+    for start in range(0, len(targets), block_size):
+        rows = targets[start:start + block_size]
+        related = {}
+        for row, neighbours in zip(rows, nearest(matrix, rows, top)):
+            pk = int(ids[row])
+            related[pk] = [
+                {'id': int(ids[column]), 'score': round(score, 4),
+                 'text': snippets[int(ids[column])]}
+                for column, score in neighbours
+            ]
+            for post in related[pk]:
+                if post['id'] not in new_ids:
+                    backlinks.setdefault(post['id'], []).append(
+                        {**post, 'id': pk, 'text': snippets[pk]})
+        store(related)
+    if not full:
+        old_ids = list(backlinks)
+        for start in range(0, len(old_ids), block_size):
+            rows = RelatedPosts.objects.filter(
+                post_id__in=old_ids[start:start + block_size])
+            store({
+                row.post_id: merge(
+                    json.loads(row.related), backlinks[row.post_id], top)
+                for row in rows
+            })
+    else:
+        stale = RelatedPosts.objects.filter(computed__lt=started)
+        cache.delete_many([
+            related_key(pk) for pk in stale.values_list('post_id', flat=True)
+        ])
+        stale.delete()
+    return {'posts': len(targets), 'updated': len(backlinks)}
+
+
+def related_posts(post_id):
+    """Похожие посты из кэша или из сохранённого списка соседей."""
+    key = related_key(post_id)
+    related = cache.get(key)
+    if related is None:
+        row = RelatedPosts.objects.filter(post_id=post_id).values_list(
+            'related', flat=True).first()
+        related = json.loads(row) if row else []
+        cache.set(key, related, settings.RELATED_CACHE_TIMEOUT)
+    return related[:settings.RELATED_POSTS_SHOWN]
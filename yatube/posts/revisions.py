@@ -0,0 +1,172 @@
+import json
+import zlib
+
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Subquery
+from django.utils import timezone
+
+from .models import PostRevision
+from .sharding import shard_aliases
+
+
+def make_delta(old, new):
+    """Разница текстов: куски [начало, конец] старого текста и вставки."""
+    ops = []
+    matcher = SequenceMatcher(None, old, new, autojunk=False)
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([old_start, old_end])
+        elif new_start < new_end:
+            ops.append(new[new_start:new_end])
+    return ops
+
+
+def apply_delta(old, ops):
+    return ''.join(
+        op if isinstance(op, str) else old[op[0]:op[1]] for op in ops)
+
+
+def encode(text, previous=None):
+    if previous is None:
+        return zlib.compress(text.encode())
+    delta = json.dumps(make_delta(previous, text), ensure_ascii=False)
+    return zlib.compress(delta.encode())
+
+
+def decode(revision, previous):
+    data = zlib.decompress(revision.data).decode()
+    if revision.is_snapshot:
+        return data
+    return apply_delta(previous, json.loads(data))
+
+
+def chain(revisions, first, last):
+    """Правки от ближайшего к first снимка до last одним запросом."""
+    base = revisions.filter(
+        is_snapshot=True, number__lte=first).order_by('-number')
+    return revisions.filter(
+        number__gte=Subquery(base.values('number')[:1]), number__lte=last,
+    ).order_by('number')
+
+
+def texts(revisions, numbers):
+    """Тексты правок с номерами numbers: словарь номер -> текст."""
+    if not numbers:
+        return {}
+    wanted = set(numbers)
+    found = {}
+    text = None
+    for revision in chain(revisions, min(wanted), max(wanted)):
+        text = decode(revision, text)
+        if revision.number in wanted:
+            found[revision.number] = text
+    return found
+
+
+def text_at(post, number):
+    return texts(post.revisions.all(), [number]).get(number)
+
+
+def add(revisions, post_id, text, number, previous, chain_length):
+    snapshot = previous is None or (
+        chain_length >= settings.REVISION_SNAPSHOT_EVERY)
+    revisions.create(
+        post_id=post_id,
+        number=number,
+        is_snapshot=snapshot,
+        data=encode(text, None if snapshot else previous),
+    )
+
+
+def record(post, using, created=False):
+    """Записывает текущий текст поста новой правкой.
+
+    Правка хранится разницей с прошлой, а каждая
+    REVISION_SNAPSHOT_EVERY-я - полным текстом, поэтому для любой правки
+    читается не больше этого числа строк. У поста, написанного до
+    появления истории, первой правкой становится прежний текст.
+    """
+    revisions = PostRevision.objects.using(using).filter(post_id=post.pk)
+    text = post.text or ''
+    last = None if created else revisions.order_by('-number').first()
+    if last is None:
+        previous = None if created else getattr(post, '_loaded_text', None)
+        if previous is None or previous == text:
+            add(revisions, post.pk, text, 1, None, 0)
+            return
+        add(revisions, post.pk, previous, 1, None, 0)
+        add(revisions, post.pk, text, 2, previous, 1)
+        return
+    rows = list(chain(revisions, last.number, last.number))
+    previous = None
+    for revision in rows:
+        previous = decode(revision, previous)
+    if previous != text:
+        add(revisions, post.pk, text, last.number + 1, previous, len(rows))
+
+
+def thin(rows, cutoff):
+    """Номера правок, которые остаются после прореживания.
+
+    Правки новее cutoff, первая и последняя остаются все, из более
+    старых - последняя за каждый день.
+    """
+    keep = {rows[0].number, rows[-1].number}
+    days = {}
+    for revision in rows:
+        if revision.created >= cutoff:
+            keep.add(revision.number)
+        else:
+            days[timezone.localdate(revision.created)] = revision.number
+    return keep | set(days.values())
+
+
+def compact_post(post_id, cutoff, using):
+    revisions = PostRevision.objects.using(using).filter(post_id=post_id)
+    rows = list(revisions.order_by('number'))
+    keep = thin(rows, cutoff)
+    if len(keep) == len(rows):
+        return 0
+    kept = []
+    text = previous = None
+    chain_length = 0
+    for revision in rows:
+        text = decode(revision, text)
+        if revision.number not in keep:
+            continue
+        snapshot = previous is None or (
+            chain_length >= settings.REVISION_SNAPSHOT_EVERY)
+        chain_length = 1 if snapshot else chain_length + 1
+        revision.is_snapshot = snapshot
+        revision.data = encode(text, None if snapshot else previous)
+        previous = text
+        kept.append(revision)
+    with transaction.atomic(using=using):
+        revisions.exclude(number__in=keep).delete()
+        PostRevision.objects.using(using).bulk_update(
+            kept, ('is_snapshot', 'data'))
+    return len(rows) - len(kept)
+
+
+def compact_revisions(cutoff, batch_size, progress=None):
+    """Прореживает правки старше cutoff и заново сжимает оставшиеся."""
+    removed = 0
+    for alias in shard_aliases():
+        post_ids = PostRevision.objects.using(alias).filter(
+            created__lt=cutoff).values('post_id').annotate(
+            old=Count('pk')).filter(old__gt=1).order_by(
+            'post_id').values_list('post_id', flat=True)
+        last_id = 0
+        while True:
+            batch = list(post_ids.filter(post_id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1]
+            for post_id in batch:
+                removed += compact_post(post_id, cutoff, alias)
+            if progress:
+                progress(len(batch))
+    return removed
@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .sharding import find_post, is_sharded, shard_for_author
+
+ARCHIVE_MODELS = {
+    'archivedpost', 'archivedcomment', 'archivedpostrevision',
+}
+SHARDED_MODELS = {
+    'post', 'comment', 'posttag', 'postmention', 'postrevision',
+}
+DEFAULT_ONLY_MODELS = {
+    'authorshard', 'shardticket', 'contentsignature', 'signaturebucket',
+    'relatedposts',
+}
+
+
+def is_archive_model(model):
+    return (model._meta.app_label == 'posts'
+            and model._meta.model_name in ARCHIVE_MODELS)
+
+
+def is_sharded_model(model):
+    return (model._meta.app_label == 'posts'
+            and model._meta.model_name in SHARDED_MODELS)
+
+
+class ShardRouter:
+    """Раскладывает посты и комментарии по шардам settings.POST_SHARDS.
+
+    Пост живёт в шарде своего автора, комментарий - в шарде поста.
+    Запросы без подсказки об объекте идут в основную базу, поэтому
+    чтение из всех шардов собирается явно через posts.sharding.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if not is_sharded() or instance is None:
+            return None
+        if not is_sharded_model(model):
+            if is_sharded_model(instance):
+                return DEFAULT_DB_ALIAS
+            return None
+        if is_sharded_model(instance):
+            return instance._state.db
+        if (model._meta.model_name == 'post'
+                and instance._meta.label == settings.AUTH_USER_MODEL):
+            return shard_for_author(instance.pk)
+        return None
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if (is_sharded() and isinstance(instance, model)
+                and is_sharded_model(model) and instance._state.adding):
+            if model._meta.model_name == 'post':
+                return shard_for_author(instance.author_id)
+            if instance.post_id is None:
+                return DEFAULT_DB_ALIAS
+            if not model.post.is_cached(instance):
+                instance.post = find_post(instance.post_id)
+            return instance.post._state.db
+        return self.db_for_read(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded_model(obj1) or is_sharded_model(obj2):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == 'posts' and model_name in DEFAULT_ONLY_MODELS:
+            return db == DEFAULT_DB_ALIAS
+        return None
+
+
+class ArchiveRouter:
+    """Отправляет архивные таблицы в базу settings.ARCHIVE_DATABASE.
+
+    Архив может лежать в отдельном файле SQLite, поэтому связи архивных
+    записей с пользователями и группами читаются из основной базы.
+    """
+
+    def db_for_read(self, model, **hints):
+        if is_archive_model(model):
+            return settings.ARCHIVE_DATABASE
+        instance = hints.get('instance')
+        if instance is not None and is_archive_model(instance):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_archive_model(obj1) or is_archive_model(obj2):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == 'posts' and model_name in ARCHIVE_MODELS:
+            return db == settings.ARCHIVE_DATABASE
+        return None
@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Post
+from .sharding import shard_aliases
+from .signals import posts_bulk_changed
+from .tags import reindex_posts
+from .trending import posts_published
+
+
+def publish_due(batch_size, now=None, progress=None):
+    """Публикует запланированные посты, время которых наступило.
+
+    Посты выбираются пачками по индексу (статус, время публикации) и
+    получают дату публикации, равную запланированной. На
+    пачку приходится одно обновление статуса, одна переиндексация тегов,
+    одна запись в счётчики популярного и один сигнал posts_bulk_changed,
+    который сбрасывает ленты авторов, буфер свежих постов и кэш страниц.
+    """
+    now = now or timezone.now()
+    published = 0
+    for alias in shard_aliases():
+        due = Post.objects.using(alias).filter(
+            status=Post.SCHEDULED, publish_at__lte=now)
+        while True:
+            batch = list(due.select_related('author', 'group').order_by(
+                'publish_at', 'pk')[:batch_size])
+            if not batch:
+                break
+            pks = [post.pk for post in batch]
+            with transaction.atomic(using=alias):
+                due.filter(pk__in=pks).update(
+                    status=Post.PUBLISHED, pub_date=F('publish_at'))
+                for post in batch:
+                    post.status = Post.PUBLISHED
+                    post.pub_date = post.publish_at
+                reindex_posts(batch, alias)
+            posts_published(batch)
+            posts_bulk_changed.send(
+                sender=Post,
+                post_ids=pks,
+                author_ids={post.author_id for post in batch},
+                group_ids={post.group_id for post in batch} - {None},
+            )
+            published += len(batch)
+            if progress:
+                progress(len(batch))
+    return published
@@ -0,0 +1,324 @@
+import heapq
+
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F, Max
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from .models import (
+    ArchivedPost, AuthorShard, Comment, Follow, Group, Post, PostMention,
+    PostRevision, PostTag, ShardTicket, User,
+)
+from .utility import raw_delete
+
+SHARD_CACHE_TIMEOUT = 60 * 60
+REFERENCE_MODELS = (User, Group)
+
+
+def shard_aliases():
+    return tuple(settings.POST_SHARDS)
+
+
+def is_sharded():
+    return len(settings.POST_SHARDS) > 1
+
+
+def shard_cache_key(author_id):
+    return f'shard:{author_id}'
+
+
+def shard_for_author(author_id):
+    """База, в которой лежат посты автора.
+
+    Авторы без записи в карте шардов остаются в основной базе: так
+    включение шардирования не теряет уже написанные посты.
+    """
+    if not is_sharded():
+        return DEFAULT_DB_ALIAS
+    key = shard_cache_key(author_id)
+    shard = cache.get(key)
+    if shard is None:
+        shard = AuthorShard.objects.filter(
+            author_id=author_id).values_list('shard', flat=True).first()
+        if shard not in shard_aliases():
+            shard = DEFAULT_DB_ALIAS
+        cache.set(key, shard, SHARD_CACHE_TIMEOUT)
+    return shard
+
+
+def place_author(author_id):
+    shards = shard_aliases()
+    AuthorShard.objects.get_or_create(
+        author_id=author_id,
+        defaults={'shard': shards[author_id % len(shards)]},
+    )
+    cache.delete(shard_cache_key(author_id))
+
+
+def next_id():
+    return ShardTicket.objects.create().pk
+
+
+def seed_tickets():
+    """Сдвигает счётчик ключей выше всех ключей, выданных шардами сами."""
+    top = max(
+        model._base_manager.using(alias).aggregate(top=Max('pk'))['top'] or 0
+        for alias in shard_aliases()
+        for model in (Post, Comment)
+    )
+    top = max(top, ArchivedPost.objects.aggregate(top=Max('pk'))['top'] or 0)
+    if not ShardTicket.objects.filter(pk__gte=top).exists():
+        ShardTicket.objects.create(pk=top)
+
+
+def replicate(instance, update_fields=None, delete=False):
+    """Повторяет изменение справочной строки во всех шардах."""
+    model = type(instance)
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in model._meta.concrete_fields
+        if not field.primary_key
+        and (update_fields is None or field.name in update_fields)
+    }
+    for alias in shard_aliases():
+        if alias == DEFAULT_DB_ALIAS:
+            continue
+        rows = model._base_manager.using(alias).filter(pk=instance.pk)
+        if delete:
+            rows.delete()
+        elif not rows.update(**values) and update_fields is None:
+            model._base_manager.using(alias).create(pk=instance.pk, **values)
+
+
+def sync_reference_tables():
+    """Копирует в шарды пользователей и группы, которых там ещё нет."""
+    copied = 0
+    for alias in shard_aliases():
+        if alias == DEFAULT_DB_ALIAS:
+            continue
+        for model in REFERENCE_MODELS:
+            present = set(model._base_manager.using(alias).values_list(
+                'pk', flat=True))
+            missing = [
+                model(**row)
+                for row in model._base_manager.values().iterator()
+                if row['id'] not in present
+            ]
+            model._base_manager.using(alias).bulk_create(missing)
+            copied += len(missing)
+    return copied
+
+
+def find_post(post_id):
+    """Пост из шарда его автора.
+
+    Во время переноса автора пост лежит в двух шардах, и чтение с
+    записью идут в тот, на который указывает карта шардов.
+    """
+    found = None
+    for alias in shard_aliases():
+        post = Post.objects.using(alias).filter(pk=post_id).first()
+        if post is None:
+            continue
+        if not is_sharded() or shard_for_author(post.author_id) == alias:
+            return post
+        found = found or post
+    return found
+
+
+def get_post_or_404(post_id):
+    post = find_post(post_id)
+    if post is None:
+        raise Http404('Пост не найден')
+    return post
+
+
+class ShardedPosts:
+    """Посты из нескольких шардов, слитые по дате публикации.
+
+    Для среза [start:stop] из каждого шарда читаются первые stop
+    постов, которые затем сливаются кучей за O(stop * log k).
+    """
+
+    def __init__(self, queryset, aliases=None):
+        self.queryset = queryset.order_by('-pub_date', '-pk')
+        self.aliases = shard_aliases() if aliases is None else aliases
+
+    @cached_property
+    def total(self):
+        return sum(
+            self.queryset.using(alias).count() for alias in self.aliases)
+
+    def count(self):
+        return self.total
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = key.stop if key.stop is not None else self.total
+        merged = heapq.merge(
+            *(self.queryset.using(alias)[:stop] for alias in self.aliases),
+            key=lambda post: (post.pub_date, post.pk),
+            reverse=True,
+        )
+        return list(islice(merged, start, stop))
+
+
+def sharded(queryset):
+    if not is_sharded():
+        return queryset
+    return ShardedPosts(queryset)
+
+
+def followed_posts(user):
+    if not is_sharded():
+        return Post.objects.published().filter(
+            author__following__user=user).order_by('-pub_date', '-pk')
+    author_ids = list(Follow.objects.filter(user=user).values_list(
+        'author_id', flat=True))
+    return ShardedPosts(
+        Post.objects.published().filter(author_id__in=author_ids),
+        sorted({shard_for_author(author_id) for author_id in author_ids}),
+    )
+
+
+AUTHOR_ROWS = (
+    (Post, 'author_id', ('id',)),
+    (Comment, 'post__author_id', ('id',)),
+    (PostTag, 'post__author_id', ('post_id', 'tag')),
+    (PostMention, 'post__author_id', ('post_id', 'user_id')),
+    (PostRevision, 'post__author_id', ('post_id', 'number')),
+)
+
+
+def author_rows(model, lookup, key, author_id, using):
+    fields = [
+        field.attname for field in model._meta.concrete_fields
+        if not field.primary_key or field.attname in key
+    ]
+    rows = model._base_manager.using(using).filter(
+        **{lookup: author_id}).values('pk', *fields)
+    return fields, {tuple(row[name] for name in key): row for row in rows}
+
+
+def copy_author(author_id, source, target):
+    """Делает строки автора в target копией строк из source.
+
+    Посты, комментарии, теги, упоминания и правки сравниваются по
+    ключу: недостающие строки добавляются, изменённые обновляются,
+    лишние удаляются. Повторный вызов переносит только разницу.
+    """
+    changes = []
+    for model, lookup, key in AUTHOR_ROWS:
+        fields, wanted = author_rows(model, lookup, key, author_id, source)
+        _, current = author_rows(model, lookup, key, author_id, target)
+        missing = [
+            model(**{name: row[name] for name in fields})
+            for row_key, row in wanted.items() if row_key not in current
+        ]
+        changed = [
+            model(pk=current[row_key]['pk'], **{
+                name: row[name] for name in fields})
+            for row_key, row in wanted.items()
+            if row_key in current and any(
+                row[name] != current[row_key][name] for name in fields)
+        ]
+        stale = [
+            row['pk'] for row_key, row in current.items()
+            if row_key not in wanted
+        ]
+        changes.append((model, fields, missing, changed, stale))
+    with transaction.atomic(using=target):
+        for model, _, _, _, stale in reversed(changes):
+            raw_delete(model, stale, target)
+        for model, fields, missing, changed, _ in changes:
+            model._base_manager.using(target).bulk_create(missing)
+            model._base_manager.using(target).bulk_update(
+                changed, [name for name in fields if name != 'id'])
+    return len(changes[0][2])
+
+
+def lock_author(author_id, using):
+    """Блокирует до конца транзакции запись строк автора в базе using.
+
+    Блокировка автора не даёт добавить ему посты, блокировка постов -
+    править их и добавлять к ним комментарии, теги и правки. SQLite
+    select_for_update не поддерживает, поэтому сначала выполняется
+    пустой UPDATE: он сразу берёт замок записи на всю базу.
+    """
+    User._base_manager.using(using).filter(pk=author_id).update(
+        username=F('username'))
+    for model, lookup in ((User, 'pk'), (Post, 'author_id'),
+                          (Comment, 'post__author_id')):
+        list(model._base_manager.using(using).select_for_update().filter(
+            **{lookup: author_id}).values_list('pk', flat=True))
+
+
+def move_author(author_id, target):
+    """Переносит посты автора и комментарии к ним в другой шард.
+
+    Основная часть строк копируется без блокировок. Затем запись
+    автора в старом шарде блокируется, докопируется всё изменённое за
+    это время, карта шардов переключается на новую базу, и из старого
+    шарда удаляются только посты, уже лежащие в новом.
+    """
+    source = shard_for_author(author_id)
+    if source == target:
+        return 0
+    moved = copy_author(author_id, source, target)
+    with transaction.atomic(using=source):
+        lock_author(author_id, source)
+        moved += copy_author(author_id, source, target)
+        AuthorShard.objects.update_or_create(
+            author_id=author_id, defaults={'shard': target})
+        cache.delete(shard_cache_key(author_id))
+        for model, lookup in ((Comment, 'post__author_id'),
+                              (Post, 'author_id')):
+            copied = set(model._base_manager.using(target).filter(
+                **{lookup: author_id}).values_list('pk', flat=True))
+            raw_delete(model, [
+                pk for pk in model._base_manager.using(source).filter(
+                    **{lookup: author_id}).values_list('pk', flat=True)
+                if pk in copied
+            ], source)
+    return moved
+
+
+def plan_rebalance():
+    """Жадно выбирает авторов для переноса с самого загруженного шарда."""
+    totals = {}
+    authors = {}
+    for alias in shard_aliases():
+        counts = Post.objects.using(alias).values('author_id').annotate(
+            posts=Count('pk')).values_list('author_id', 'posts')
+        authors[alias] = {
+            author_id: posts for author_id, posts in counts
+            if shard_for_author(author_id) == alias
+        }
+        totals[alias] = sum(authors[alias].values())
+    moves = []
+    while True:
+        heavy = max(totals, key=totals.get)
+        light = min(totals, key=totals.get)
+        gap = totals[heavy] - totals[light]
+        candidates = [
+            (posts, author_id)
+            for author_id, posts in authors[heavy].items()
+            if posts * 2 <= gap
+        ]
+        if not candidates:
+            return moves
+        posts, author_id = max(candidates)
+        del authors[heavy][author_id]
+        authors[light][author_id] = posts
+        totals[heavy] -= posts
+        totals[light] += posts
+        moves.append((author_id, heavy, light, posts))
@@ -0,0 +1,244 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.urls import reverse
+
+from core import pagecache
+from core.markup import RENDERER_VERSION, render_markdown
+
+from .feeds import invalidate_authors, prepend
+from .graph import follow_graph
+from .models import Comment, Follow, Group, Mute, Post, User
+from .mutes import invalidate as invalidate_mutes
+from .prerender import post_paths, prerender_on_commit
+from .recent import recent_posts
+from .revisions import record as record_revision
+from .sharding import is_sharded, next_id, place_author, replicate
+from .tags import index_post
+from .threads import attach, count_reply, detach
+from .trending import comment_created, follow_created, post_created
+
+posts_bulk_changed = Signal(
+    providing_args=['post_ids', 'author_ids', 'group_ids'])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(posts_bulk_changed)
+def invalidate_pages(sender, **kwargs):
+    pagecache.invalidate()
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Group)
+def remember_saved_state(sender, instance, using, **kwargs):
+    if settings.PRERENDER_ON_SAVE and instance.pk:
+        instance._saved_state = sender.objects.using(using).filter(
+            pk=instance.pk).values().first()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def prerender_post(sender, instance, **kwargs):
+    if not settings.PRERENDER_ON_SAVE:
+        return
+    group_ids = {instance.group_id}
+    saved_state = getattr(instance, '_saved_state', None) or {}
+    group_ids.add(saved_state.get('group_id'))
+    slugs = Group.objects.filter(
+        pk__in=group_ids - {None}).values_list('slug', flat=True)
+    prerender_on_commit(post_paths(instance, slugs))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def prerender_comment(sender, instance, **kwargs):
+    if settings.PRERENDER_ON_SAVE and instance.post_id:
+        prerender_on_commit({
+            reverse('posts:post_detail', kwargs={'post_id': instance.post_id})
+        })
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def prerender_group(sender, instance, **kwargs):
+    if not settings.PRERENDER_ON_SAVE:
+        return
+    slugs = {instance.slug}
+    saved_state = getattr(instance, '_saved_state', None) or {}
+    slugs.add(saved_state.get('slug', instance.slug))
+    paths = {reverse('posts:posts_index')}
+    for slug in slugs:
+        paths.add(reverse('posts:posts_group', kwargs={'slug': slug}))
+    prerender_on_commit(paths)
+
+
+@receiver(posts_bulk_changed)
+def prerender_bulk(sender, post_ids, author_ids, group_ids, **kwargs):
+    if not settings.PRERENDER_ON_SAVE:
+        return
+    paths = {reverse('posts:posts_index')}
+    for pk in post_ids:
+        paths.add(reverse('posts:post_detail', kwargs={'post_id': pk}))
+    for slug in Group.objects.filter(
+            pk__in=group_ids).values_list('slug', flat=True):
+        paths.add(reverse('posts:posts_group', kwargs={'slug': slug}))
+    for username in User.objects.filter(
+            pk__in=author_ids).values_list('username', flat=True):
+        paths.add(reverse('posts:profile', kwargs={'username': username}))
+    prerender_on_commit(paths)
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def assign_global_id(sender, instance, **kwargs):
+    if is_sharded() and instance.pk is None:
+        instance.pk = next_id()
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def render_text(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'text' in update_fields:
+        instance.rendered_text = render_markdown(instance.text)
+        instance.render_version = RENDERER_VERSION
+
+
+@receiver(post_save, sender=Post)
+def update_post_index(sender, instance, created, using, update_fields=None,
+                      **kwargs):
+    if update_fields is None or {'text', 'status', 'deleted_at'} & set(
+            update_fields):
+        index_post(instance, using, created)
+
+
+@receiver(post_save, sender=Post)
+def record_post_revision(sender, instance, created, using,
+                         update_fields=None, **kwargs):
+    if update_fields is None or 'text' in update_fields:
+        record_revision(instance, using, created)
+
+
+@receiver(post_save, sender=Comment)
+def attach_comment(sender, instance, created, using, update_fields=None,
+                   **kwargs):
+    if created:
+        attach(instance, using)
+    elif update_fields and 'deleted_at' in update_fields:
+        count_reply(instance, using, -1 if instance.is_deleted else 1)
+
+
+@receiver(post_delete, sender=Comment)
+def detach_comment(sender, instance, using, **kwargs):
+    detach(instance, using)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Follow)
+def count_trending_activity(sender, instance, created, **kwargs):
+    if sender is Post:
+        if instance.is_published and instance.status_changed():
+            post_created(instance)
+    elif not created:
+        return
+    elif sender is Comment and instance.post_id:
+        comment_created(instance)
+    elif sender is Follow and instance.author_id:
+        follow_created(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+def replicate_reference_save(sender, instance, created, using, update_fields,
+                             **kwargs):
+    if not is_sharded() or using != DEFAULT_DB_ALIAS:
+        return
+    replicate(instance, update_fields)
+    if created and sender is User:
+        place_author(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def replicate_reference_delete(sender, instance, using, **kwargs):
+    if is_sharded() and using == DEFAULT_DB_ALIAS:
+        replicate(instance, delete=True)
+
+
+@receiver(post_save, sender=Post)
+def update_recent_posts(sender, instance, created, using, **kwargs):
+    if created and not instance.is_published:
+        return
+    if created and not transaction.get_connection(using).in_atomic_block:
+        recent_posts.push(instance)
+    else:
+        recent_posts.invalidate()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(posts_bulk_changed, sender=Post)
+def invalidate_recent_posts(sender, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        recent_posts.invalidate()
+
+
+@receiver(post_save, sender=Post)
+def update_author_feed(sender, instance, created, using, update_fields=None,
+                       **kwargs):
+    if not created:
+        if instance.status_changed() or 'deleted_at' in (update_fields or ()):
+            invalidate_authors([instance.author_id])
+        return
+    if not instance.is_published:
+        return
+    if transaction.get_connection(using).in_atomic_block:
+        invalidate_authors([instance.author_id])
+    else:
+        prepend(instance)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_author_feed(sender, instance, **kwargs):
+    invalidate_authors([instance.author_id])
+
+
+@receiver(posts_bulk_changed, sender=Post)
+def invalidate_author_feeds(sender, author_ids, **kwargs):
+    invalidate_authors(author_ids)
+
+
+@receiver(post_save, sender=Follow)
+def add_follow_edge(sender, instance, created, using, **kwargs):
+    if created and instance.user_id and instance.author_id:
+        follow_graph.add(instance.user_id, instance.author_id)
+    else:
+        follow_graph.invalidate()
+    transaction.on_commit(follow_graph.publish, using=using)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_follow_edge(sender, instance, using, **kwargs):
+    if not Follow.objects.using(using).filter(
+            user_id=instance.user_id, author_id=instance.author_id).exists():
+        follow_graph.remove(instance.user_id, instance.author_id)
+    transaction.on_commit(follow_graph.publish, using=using)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_follow_graph(sender, **kwargs):
+    follow_graph.invalidate()
+
+
+@receiver(post_save, sender=Mute)
+@receiver(post_delete, sender=Mute)
+def reset_mute_filter(sender, instance, **kwargs):
+    invalidate_mutes(instance.user_id)
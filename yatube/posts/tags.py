@@ -0,0 +1,142 @@
+import heapq
+import re
+
+from itertools import islice
+
+from django.db import transaction
+
+from .feeds import fetch_posts
+from .models import Post, PostMention, PostTag, User
+from .sharding import shard_aliases
+from .utility import decode_cursor, encode_cursor, keyset_filter
+
+TAG_RE = re.compile(r'(?<![\w&/#])#(\w{1,50})')
+MENTION_RE = re.compile(r'(?<![\w@.])@([\w.@+-]{1,150})')
+CURSOR_FIELDS = ('pub_date', 'post_id')
+PAGE_SIZE = 10
+
+
+def parse_tags(text):
+    return {tag.lower() for tag in TAG_RE.findall(text or '')}
+
+
+def parse_mentions(text):
+    return {name.rstrip('.') for name in MENTION_RE.findall(text or '')}
+
+
+def mentioned_ids(usernames):
+    if not usernames:
+        return {}
+    return dict(User.objects.filter(
+        username__in=usernames).values_list('username', 'pk'))
+
+
+def index_post(post, using, created=False):
+    """Приводит теги и упоминания поста в соответствие с его текстом.
+
+    Удаляются только исчезнувшие из текста строки и добавляются новые,
+    у нового поста старых строк нет и они не читаются. Неопубликованный
+    или удалённый пост в индекс не попадает.
+    """
+    tags = users = set()
+    if post.is_published and not post.is_deleted:
+        tags = parse_tags(post.text)
+        users = set(mentioned_ids(parse_mentions(post.text)).values())
+    current_tags = current_users = set()
+    if not created:
+        current_tags = set(PostTag.objects.using(using).filter(
+            post=post).values_list('tag', flat=True))
+        current_users = set(PostMention.objects.using(using).filter(
+            post=post).values_list('user_id', flat=True))
+    with transaction.atomic(using=using):
+        if current_tags - tags:
+            PostTag.objects.using(using).filter(
+                post=post, tag__in=current_tags - tags).delete()
+        if current_users - users:
+            PostMention.objects.using(using).filter(
+                post=post, user_id__in=current_users - users).delete()
+        PostTag.objects.using(using).bulk_create(
+            PostTag(post_id=post.pk, tag=tag, pub_date=post.pub_date)
+            for tag in tags - current_tags
+        )
+        PostMention.objects.using(using).bulk_create(
+            PostMention(post_id=post.pk, user_id=pk, pub_date=post.pub_date)
+            for pk in users - current_users
+        )
+
+
+def reindex_posts(posts, using):
+    """Заново строит теги и упоминания пачки постов одной базы."""
+    post_ids = [post.pk for post in posts]
+    posts = [
+        post for post in posts if post.is_published and not post.is_deleted]
+    users = mentioned_ids(
+        set().union(*(parse_mentions(post.text) for post in posts)))
+    with transaction.atomic(using=using):
+        PostTag.objects.using(using).filter(post_id__in=post_ids).delete()
+        PostMention.objects.using(using).filter(
+            post_id__in=post_ids).delete()
+        PostTag.objects.using(using).bulk_create(
+            PostTag(post_id=post.pk, tag=tag, pub_date=post.pub_date)
+            for post in posts
+            for tag in parse_tags(post.text)
+        )
+        PostMention.objects.using(using).bulk_create(
+            PostMention(
+                post_id=post.pk, user_id=users[name], pub_date=post.pub_date)
+            for post in posts
+            for name in parse_mentions(post.text)
+            if name in users
+        )
+
+
+def backfill(batch_size, progress=None):
+    indexed = 0
+    for alias in shard_aliases():
+        posts = Post.objects.using(alias).only(
+            'pk', 'text', 'pub_date', 'status').order_by('pk')
+        last_pk = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            reindex_posts(batch, alias)
+            indexed += len(batch)
+            if progress:
+                progress(len(batch))
+    return indexed
+
+
+class CursorPage:
+    def __init__(self, posts, next_cursor):
+        self.posts = posts
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.posts)
+
+
+def index_page(model, cursor=None, size=PAGE_SIZE, **condition):
+    """Страница постов по индексной таблице тегов или упоминаний.
+
+    Строки индекса читаются из каждого шарда по курсору (дата, id поста)
+    с сортировкой по индексу, сливаются, и только затем загружаются
+    сами посты.
+    """
+    values = decode_cursor(cursor, CURSOR_FIELDS) if cursor else None
+    rows = []
+    for alias in shard_aliases():
+        queryset = model.objects.using(alias).filter(**condition).order_by(
+            '-pub_date', '-post_id').only(*CURSOR_FIELDS)
+        if values is not None:
+            queryset = keyset_filter(queryset, CURSOR_FIELDS, values)
+        rows.append(queryset[:size + 1])
+    merged = list(islice(heapq.merge(
+        *rows, key=lambda row: (row.pub_date, row.post_id), reverse=True,
+    ), size + 1))
+    next_cursor = None
+    if len(merged) > size:
+        next_cursor = encode_cursor(merged[size - 1], CURSOR_FIELDS)
+    return CursorPage(
+        fetch_posts([row.post_id for row in merged[:size]]), next_cursor)
@@ -0,0 +1,104 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AdminChangeListTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@yatube.ru', password='admin')
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {number}',
+                slug=f'group-{number}',
+                description='Тестовое описание',
+            )
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def create_rows(self, count, start=0):
+        for number in range(start, start + count):
+            author = User.objects.create_user(username=f'user-{number}')
+            post = Post.objects.create(
+                author=author,
+                text=f'Пост {number}',
+                group=self.groups[number % len(self.groups)],
+            )
+            Comment.objects.create(
+                post=post, author=author, text=f'Комментарий {number}')
+            Follow.objects.create(user=author, author=self.admin)
+
+    def count_queries(self, url):
+        self.admin_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return len(queries)
+
+    def test_changelist_query_budget(self):
+        """Число запросов в списке админки не растёт с числом строк."""
+        urls = [
+            reverse(f'admin:posts_{model}_changelist')
+            for model in ('post', 'comment', 'follow')
+        ]
+        self.create_rows(5)
+        budget = {url: self.count_queries(url) for url in urls}
+        self.create_rows(35, start=5)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), budget[url])
+                self.assertLessEqual(budget[url], 8)
+
+    def test_cursor_pages_follow_each_other(self):
+        """Курсорная навигация проходит все записи без повторов."""
+        self.create_rows(250)
+        url = reverse('admin:posts_post_changelist')
+        seen = []
+        response = self.admin_client.get(url)
+        while True:
+            seen.extend(post.pk for post in response.context['cl'].result_list)
+            next_query = response.context['cl'].next_cursor_query
+            if next_query is None:
+                break
+            response = self.admin_client.get(url + next_query)
+        self.assertEqual(len(seen), 250)
+        self.assertEqual(
+            seen, list(Post.objects.values_list('pk', flat=True)))
+
+    def test_comment_cursor_follows_creation_order(self):
+        """Курсор комментариев идёт в том же порядке, что и первая страница,
+        даже если порядок дат и ключей расходится."""
+        self.create_rows(250)
+        now = timezone.now()
+        for comment in Comment.objects.all():
+            Comment.objects.filter(pk=comment.pk).update(
+                created=now - timezone.timedelta(minutes=comment.pk % 7))
+        url = reverse('admin:posts_comment_changelist')
+        seen = []
+        response = self.admin_client.get(url)
+        while True:
+            seen.extend(
+                comment.pk for comment in response.context['cl'].result_list)
+            next_query = response.context['cl'].next_cursor_query
+            if next_query is None:
+                break
+            response = self.admin_client.get(url + next_query)
+        self.assertEqual(seen, list(Comment.objects.order_by(
+            '-created', '-pk').values_list('pk', flat=True)))
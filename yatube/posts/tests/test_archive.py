@@ -0,0 +1,100 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import (
+    ArchivedComment, ArchivedPost, ArchivedPostRevision, Comment, Group, Post,
+)
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.old_posts = [
+            Post.objects.create(
+                author=self.user, text=f'Старый пост {number}',
+                group=self.group)
+            for number in range(12)
+        ]
+        Post.objects.filter(
+            pk__in=[post.pk for post in self.old_posts]
+        ).update(pub_date=timezone.now() - timedelta(days=400))
+        Comment.objects.create(
+            post=self.old_posts[0],
+            author=self.user,
+            text='Старый комментарий',
+        )
+        self.new_post = Post.objects.create(
+            author=self.user, text='Новый пост')
+
+    def archive(self):
+        out = StringIO()
+        call_command(
+            'archive_posts', '--days', '365', '--batch-size', '5', stdout=out)
+        return out.getvalue()
+
+    def test_old_posts_moved_to_archive(self):
+        """Старые посты и комментарии переносятся в архив."""
+        self.assertIn('Перенесено постов: 12', self.archive())
+        self.assertEqual(list(Post.objects.all()), [self.new_post])
+        self.assertEqual(ArchivedPost.objects.count(), 12)
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertEqual(
+            ArchivedComment.objects.get().post_id, self.old_posts[0].pk)
+
+    def test_post_detail_falls_through_to_archive(self):
+        """Страница архивного поста открывается по прежнему адресу."""
+        self.archive()
+        response = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.old_posts[0].pk}))
+        self.assertContains(response, 'Старый пост 0')
+        self.assertContains(response, 'Старый комментарий')
+        self.assertTrue(response.context['post'].is_archived)
+
+    def test_missing_post_not_found(self):
+        """Пост, которого нет ни в таблице, ни в архиве, не найден."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 100500}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_profile_lists_archived_posts_after_hot(self):
+        """Профиль показывает архивные посты после новых."""
+        self.archive()
+        url = reverse('posts:profile', kwargs={'username': self.user.username})
+        first_page = self.client.get(url).context['page_obj']
+        self.assertEqual(first_page.paginator.count, 13)
+        self.assertEqual(first_page[0], self.new_post)
+        self.assertTrue(first_page[1].is_archived)
+        second_page = self.client.get(url + '?page=2').context['page_obj']
+        self.assertEqual(len(second_page), 3)
+
+    def test_history_survives_archiving(self):
+        """Правки поста переносятся в архив вместе с ним."""
+        post = Post.objects.get(pk=self.old_posts[0].pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        self.archive()
+        self.assertEqual(
+            ArchivedPostRevision.objects.filter(post_id=post.pk).count(), 2)
+        response = self.client.get(
+            reverse('posts:post_history', kwargs={'post_id': post.pk}))
+        self.assertContains(response, 'Старый пост 0')
+        self.assertContains(response, 'Исправленный пост')
@@ -0,0 +1,115 @@
+from django.contrib.admin import helpers
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..bulk import BulkJob, delete_posts, get_progress
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(BULK_CHUNK_SIZE=3)
+class BulkModerationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@yatube.ru', password='admin')
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            description='Тестовое описание',
+            slug='other-slug',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+        self.spam = [
+            Post.objects.create(
+                author=self.spammer, text=f'Спам {number}', group=self.group)
+            for number in range(7)
+        ]
+        self.post = Post.objects.create(author=self.user, text='Обычный пост')
+        Comment.objects.create(
+            post=self.post, author=self.spammer, text='Спам в комментарии')
+        Comment.objects.create(
+            post=self.spam[0], author=self.user, text='Ответ на спам')
+
+    def run_action(self, action, posts, **data):
+        return self.admin_client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': action,
+                helpers.ACTION_CHECKBOX_NAME: [post.pk for post in posts],
+                'index': 0,
+                **data,
+            },
+            follow=True,
+        )
+
+    def test_move_to_group(self):
+        """Посты переносятся в другую группу после подтверждения."""
+        response = self.run_action('move_to_group', self.spam)
+        self.assertTemplateUsed(response, 'admin/posts/bulk_confirmation.html')
+        self.run_action(
+            'move_to_group', self.spam, post='yes', group=self.other_group.pk)
+        self.assertEqual(self.other_group.posts.count(), len(self.spam))
+        self.assertEqual(self.group.posts.count(), 0)
+
+    def test_delete_with_comments(self):
+        """Удаление постов удаляет и комментарии к ним."""
+        self.run_action('delete_with_comments', self.spam[:2], post='yes')
+        self.assertEqual(
+            Post.objects.filter(author=self.spammer).count(), 5)
+        self.assertFalse(Comment.objects.filter(text='Ответ на спам').exists())
+
+    def test_purge_authors(self):
+        """Удаляются все посты и комментарии авторов выбранных постов."""
+        self.run_action('purge_authors', self.spam[:1], post='yes')
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertFalse(Comment.objects.filter(author=self.spammer).exists())
+        self.assertTrue(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_bulk_jobs_see_soft_deleted_rows(self):
+        """Скрытые посты и комментарии тоже удаляются массовыми задачами."""
+        hidden = Comment.objects.create(
+            post=self.spam[1], author=self.user, text='Под скрытым постом')
+        self.spam[1].soft_delete()
+        delete_posts([self.spam[1].pk])
+        self.assertFalse(
+            Comment.all_objects.filter(pk=hidden.pk).exists())
+        self.spam[2].soft_delete()
+        Comment.objects.get(text='Спам в комментарии').soft_delete()
+        self.run_action('purge_authors', self.spam[:1], post='yes')
+        self.assertFalse(
+            Post.all_objects.filter(author=self.spammer).exists())
+        self.assertFalse(
+            Comment.all_objects.filter(author=self.spammer).exists())
+
+    def test_job_reports_progress(self):
+        """Задача сохраняет прогресс выполнения."""
+        job = BulkJob(delete_posts, [post.pk for post in self.spam])
+        job.run()
+        progress = get_progress(job.job_id)
+        self.assertEqual(progress['state'], 'done')
+        self.assertEqual(progress['done'], len(self.spam))
+        response = self.admin_client.get(reverse(
+            'admin:posts_post_bulk_progress', kwargs={'job_id': job.job_id}))
+        self.assertEqual(response.json()['total'], len(self.spam))
+
+    def test_bulk_change_invalidates_pages(self):
+        """Массовое действие сбрасывает кэш страниц."""
+        url = reverse('posts:posts_group', kwargs={'slug': self.group.slug})
+        self.client.get(url)
+        self.run_action('delete_with_comments', self.spam, post='yes')
+        self.assertNotContains(self.client.get(url), 'Спам 1')
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+class CleanupOrphansTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        deleted_post = Post.objects.create(author=self.author, text='Удалить')
+        deleted_user = User.objects.create_user(username='deleted')
+        Comment.objects.create(post=deleted_post, author=self.user, text='1')
+        Comment.objects.create(post=self.post, author=deleted_user, text='2')
+        self.comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Живой комментарий')
+        Follow.objects.create(user=deleted_user, author=self.author)
+        self.follow = Follow.objects.create(user=self.user, author=self.author)
+        deleted_post.delete()
+        deleted_user.delete()
+
+    def call(self, *args):
+        out = StringIO()
+        call_command('cleanup_orphans', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_keeps_rows(self):
+        """В режиме dry-run сироты только подсчитываются."""
+        output = self.call('--dry-run')
+        self.assertIn('posts.Comment: найдено 2', output)
+        self.assertIn('posts.Follow: найдено 1', output)
+        self.assertEqual(Comment.objects.count(), 3)
+
+    def test_orphans_purged_in_batches(self):
+        """Сироты удаляются пачками, живые строки остаются."""
+        output = self.call('--batch-size', '1', '--analyze')
+        self.assertIn('posts.Comment: удалено 2', output)
+        self.assertIn('Выполнено в default: ANALYZE', output)
+        self.assertEqual(list(Comment.objects.all()), [self.comment])
+        self.assertEqual(list(Follow.objects.all()), [self.follow])
+
+    @override_settings(POST_SHARDS=('default', 'shard1'))
+    def test_every_shard_compacted(self):
+        """Сжимается и измеряется каждый шард, а не только основная база."""
+        command = 'posts.management.commands.cleanup_orphans'
+        with mock.patch(f'{command}.purge_orphans', return_value={}), \
+                mock.patch(f'{command}.database_size') as size, \
+                mock.patch(f'{command}.compact', return_value=[]) as compact:
+            self.call('--vacuum')
+        self.assertEqual(
+            [call.kwargs['using'] for call in compact.call_args_list],
+            ['default', 'shard1'],
+        )
+        self.assertEqual(
+            [call.args for call in size.call_args_list],
+            [('default',), ('shard1',), ('default',), ('shard1',)],
+        )
+
+    def test_orphans_archived(self):
+        """Удаляемые строки дописываются в архив."""
+        handle, path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        self.call('--archive', path)
+        with open(path, encoding='utf-8') as archive:
+            rows = [json.loads(line) for line in archive]
+        self.assertEqual(
+            sorted(row['model'] for row in rows),
+            ['posts.Comment', 'posts.Comment', 'posts.Follow'],
+        )
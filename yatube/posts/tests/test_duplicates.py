@@ -0,0 +1,99 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..duplicates import check, signature_pk
+from ..minhash import minhash, similarity
+from ..models import Comment, ContentSignature, Post
+
+User = get_user_model()
+
+SPAM = (
+    'Лучшие часы со скидкой только сегодня, заходите на наш сайт '
+    'и получите подарок к каждому заказу'
+)
+SPAM_VARIANT = (
+    'Лучшие часы со скидкой только сегодня!!! Заходите на наш сайт '
+    'и получите подарок к каждому заказу.'
+)
+OTHER = (
+    'Сегодня гуляли в парке, видели белок и уток, потом пили чай '
+    'с пирогами у бабушки на даче'
+)
+
+
+class MinHashTests(TestCase):
+    def test_similar_texts_have_close_signatures(self):
+        """Подписи похожих текстов совпадают, разных - почти нет."""
+        self.assertEqual(similarity(minhash(SPAM), minhash(SPAM_VARIANT)), 1)
+        self.assertLess(similarity(minhash(SPAM), minhash(OTHER)), 0.3)
+
+
+class DuplicateDetectionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.spammer = User.objects.create_user(username='spammer')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.spammer)
+
+    def create_post(self, text):
+        return self.client.post(reverse('posts:post_create'), {'text': text})
+
+    def test_duplicate_post_flagged(self):
+        """Почти одинаковый пост сохраняется и отмечается похожим."""
+        self.create_post(SPAM)
+        self.create_post(SPAM_VARIANT)
+        self.create_post(OTHER)
+        first, second, third = Post.objects.order_by('pk')
+        flagged = ContentSignature.objects.get(
+            pk=signature_pk('post', second.pk))
+        self.assertEqual(
+            flagged.duplicate_of_id, signature_pk('post', first.pk))
+        self.assertIsNone(ContentSignature.objects.get(
+            pk=signature_pk('post', third.pk)).duplicate_of_id)
+
+    @override_settings(DUPLICATE_ACTION='reject')
+    def test_duplicate_post_rejected(self):
+        """В режиме reject почти одинаковый пост не сохраняется."""
+        self.create_post(SPAM)
+        response = self.create_post(SPAM_VARIANT)
+        self.assertFormError(
+            response, 'form', 'text', 'Похожий текст уже публиковался')
+        self.assertEqual(Post.objects.count(), 1)
+
+    @override_settings(DUPLICATE_ACTION='reject')
+    def test_duplicate_comment_rejected(self):
+        """В режиме reject почти одинаковый комментарий не сохраняется."""
+        post = Post.objects.create(text=OTHER, author=self.user)
+        url = reverse('posts:add_comment', args=(post.pk,))
+        self.client.post(url, {'text': SPAM})
+        self.client.post(url, {'text': SPAM_VARIANT})
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_short_texts_ignored(self):
+        """Короткие тексты не индексируются."""
+        self.create_post('Спасибо!')
+        self.create_post('Спасибо!')
+        self.assertFalse(ContentSignature.objects.exists())
+
+    def test_command_indexes_history(self):
+        """Команда индексирует старые записи в пуле процессов."""
+        Post.objects.bulk_create(
+            Post(text=text, author=self.spammer)
+            for text in (SPAM, OTHER, SPAM_VARIANT)
+        )
+        out = StringIO()
+        call_command('index_duplicates', '--workers', '2', stdout=out)
+        self.assertIn('post: проиндексировано 3, похожих на более ранние 1',
+                      out.getvalue())
+        _, match = check(SPAM)
+        self.assertIn(match[0], {
+            signature_pk('post', pk)
+            for pk in Post.objects.values_list('pk', flat=True)})
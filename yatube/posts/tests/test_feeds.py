@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..feeds import author_key
+from ..models import Follow, Post
+
+User = get_user_model()
+
+
+@override_settings(FEED_AUTHOR_POSTS=4)
+class FollowFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(3)
+        ]
+        cls.stranger = User.objects.create_user(username='stranger')
+        for number in range(8):
+            for author in cls.authors + [cls.stranger]:
+                Post.objects.create(author=author, text=f'Пост {number}')
+        for author in cls.authors:
+            Follow.objects.create(user=cls.user, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.expected = list(Post.objects.filter(
+            author__in=self.authors).order_by('-pub_date', '-pk'))
+
+    def get_page(self, page=1):
+        response = self.authorized_client.get(
+            reverse('posts:follow_index') + f'?page={page}')
+        return response.context['page_obj']
+
+    @override_settings(FOLLOW_GRAPH_SAMPLE_RATE=0)
+    def test_first_page_merged_from_author_lists(self):
+        """Первая страница собирается слиянием списков авторов."""
+        self.get_page()
+        with self.assertNumQueries(1):
+            page_obj = self.get_page()
+        self.assertEqual(page_obj.paginator.count, 24)
+        self.assertEqual(list(page_obj), self.expected[:10])
+
+    def test_deep_pages_fall_back_to_database(self):
+        """Страницы глубже сохранённых списков читаются из базы."""
+        self.assertEqual(list(self.get_page(2)), self.expected[10:20])
+        self.assertEqual(list(self.get_page(3)), self.expected[20:])
+
+    def test_follow_and_unfollow(self):
+        """Лента учитывает новые подписки и отписки."""
+        self.get_page()
+        Follow.objects.create(user=self.user, author=self.stranger)
+        self.assertEqual(self.get_page().paginator.count, 32)
+        Follow.objects.filter(author__in=self.authors[:2]).delete()
+        page_obj = self.get_page()
+        self.assertEqual(page_obj.paginator.count, 16)
+        self.assertEqual(
+            {post.author for post in page_obj},
+            {self.authors[2], self.stranger},
+        )
+
+    def test_new_post_updates_author_list(self):
+        """Новый пост автора сразу попадает в ленту."""
+        self.get_page()
+        post = Post.objects.create(author=self.authors[0], text='Новый')
+        self.assertIsNone(cache.get(author_key(self.authors[0].pk)))
+        self.assertEqual(self.get_page()[0], post)
@@ -0,0 +1,107 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+
+from ..graph import follow_graph
+from ..models import Follow
+from ..utility import raw_delete
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(3)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.user, author=author)
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(FOLLOW_GRAPH_SAMPLE_RATE=0)
+    def test_graph_answers_without_queries(self):
+        """Повторные вопросы к графу не обращаются к базе."""
+        follow_graph.followees(self.user.pk)
+        follow_graph.followers_of(self.authors[0].pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_graph.is_following(self.user.pk, self.authors[0].pk))
+            self.assertFalse(
+                follow_graph.is_following(self.user.pk, self.user.pk))
+            self.assertEqual(follow_graph.following_count(self.user.pk), 3)
+            self.assertEqual(
+                follow_graph.follower_count(self.authors[0].pk), 1)
+        self.assertEqual(
+            list(follow_graph.followees(self.user.pk)),
+            sorted(author.pk for author in self.authors),
+        )
+
+    def test_check_reports_drift(self):
+        """Проверка находит расхождения графа с таблицей."""
+        follow_graph.followees(self.user.pk)
+        self.assertEqual(follow_graph.check_consistency(), [])
+        Follow.objects.filter(author=self.authors[0]).update(
+            author=self.authors[1])
+        self.assertTrue(follow_graph.check_consistency())
+
+    @override_settings(FOLLOW_GRAPH_SAMPLE_RATE=1)
+    def test_worker_samples_report_drift(self):
+        """Процесс сверяет отдаваемый граф с базой, команда показывает
+        расхождение, не перечитывая граф."""
+        follow_graph.followees(self.user.pk)
+        raw_delete(Follow, list(Follow.objects.filter(
+            author=self.authors[0]).values_list('pk', flat=True)))
+        self.assertEqual(follow_graph.following_count(self.user.pk), 2)
+        out = StringIO()
+        with self.assertNumQueries(2):
+            call_command('check_follow_graph', stdout=out)
+        self.assertIn('Сверок в процессах: 1, расхождений: 1', out.getvalue())
+        self.assertIn(f'user {self.user.pk}: в графе 3, в базе 2',
+                      out.getvalue())
+        self.assertEqual(follow_graph.following_count(self.user.pk), 2)
+
+    def test_command_reports_duplicates(self):
+        """Команда сообщает о повторяющихся подписках."""
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        out = StringIO()
+        call_command('check_follow_graph', stdout=out)
+        self.assertIn('подписок: 3', out.getvalue())
+        self.assertIn('повторяющихся подписок: 1', out.getvalue())
+
+
+class FollowGraphUpdateTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='HasNoName')
+        self.author = User.objects.create_user(username='author')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_follow_and_unfollow_update_graph(self):
+        """Подписка и отписка меняют граф без перечитывания базы."""
+        follow_graph.followees(self.user.pk)
+        follow_graph.followers_of(self.author.pk)
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}))
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_graph.is_following(self.user.pk, self.author.pk))
+            self.assertEqual(follow_graph.follower_count(self.author.pk), 1)
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author'}))
+        with self.assertNumQueries(0):
+            self.assertFalse(
+                follow_graph.is_following(self.user.pk, self.author.pk))
+        self.assertEqual(follow_graph.check_consistency(), [])
@@ -0,0 +1,49 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.markup import RENDERER_VERSION
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class RenderedTextTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    def test_text_rendered_on_save(self):
+        """HTML текста сохраняется вместе с постом и комментарием."""
+        post = Post.objects.create(text='**важно**', author=self.user)
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='*да*')
+        self.assertEqual(post.rendered_text, '<p><strong>важно</strong></p>')
+        self.assertEqual(post.render_version, RENDERER_VERSION)
+        self.assertEqual(comment.rendered_text, '<p><em>да</em></p>')
+
+    def test_page_outputs_stored_html(self):
+        """Страница поста выводит сохранённый HTML."""
+        post = Post.objects.create(text='**важно**', author=self.user)
+        Comment.objects.create(post=post, author=self.user, text='`код`')
+        response = Client().get(
+            reverse('posts:post_detail', args=(post.pk,)))
+        self.assertContains(response, '<strong>важно</strong>')
+        self.assertContains(response, '<code>код</code>')
+
+    def test_command_rerenders_outdated(self):
+        """Команда размечает тексты со старой версией разметки."""
+        post = Post.objects.create(text='**важно**', author=self.user)
+        Post.objects.filter(pk=post.pk).update(
+            rendered_text='', render_version=0)
+        out = StringIO()
+        call_command('render_markup', stdout=out)
+        self.assertIn('Посты: размечено 1', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual(post.rendered_text, '<p><strong>важно</strong></p>')
+        self.assertEqual(post.render_version, RENDERER_VERSION)
@@ -0,0 +1,138 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Mute, Post
+from ..mutes import mutes_key
+
+User = get_user_model()
+
+
+class MuteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.author = User.objects.create_user(username='author')
+        cls.noisy = User.objects.create_user(username='noisy')
+        cls.group = Group.objects.create(
+            title='Сад', slug='garden', description='Про сад')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def page_authors(self, url, client=None):
+        response = (client or self.client).get(url)
+        return [post.author for post in response.context['page_obj']]
+
+    def test_muted_author_dropped_with_full_page(self):
+        """Скрытый автор пропадает, страница добирается до 10 постов,
+        общая страница остаётся в кэше."""
+        for number in range(12):
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+            Post.objects.create(text=f'Шум {number}', author=self.noisy)
+        index = reverse('posts:posts_index')
+        self.assertIn(self.noisy, self.page_authors(index, Client()))
+        self.client.get(reverse('posts:profile_mute', args=('noisy',)))
+        self.assertEqual(self.page_authors(index), [self.author] * 10)
+        response = Client().get(index)
+        self.assertIsNone(response.context)
+        self.assertContains(response, 'Шум 11')
+        self.client.get(reverse('posts:profile_unmute', args=('noisy',)))
+        self.assertContains(self.client.get(index), 'Шум 11')
+
+    def test_mostly_hidden_feed_has_no_empty_pages(self):
+        """Когда скрыта почти вся лента, страницы не пустые и не лишние."""
+        for number in range(12):
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+        for number in range(60):
+            Post.objects.create(text=f'Шум {number}', author=self.noisy)
+        Mute.objects.create(user=self.user, author=self.noisy)
+        index = reverse('posts:posts_index')
+        page_obj = self.client.get(index).context['page_obj']
+        self.assertEqual(page_obj.paginator.num_pages, 2)
+        self.assertEqual(list(page_obj), list(
+            Post.objects.filter(author=self.author).order_by('-pk')[:10]))
+        page_obj = self.client.get(index + '?page=2').context['page_obj']
+        self.assertEqual(
+            [post.text for post in page_obj], ['Пост 1', 'Пост 0'])
+
+    def test_pages_resume_from_stored_position(self):
+        """Следующая страница продолжает чтение с запомненного места."""
+        for number in range(30):
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+            Post.objects.create(text=f'Шум {number}', author=self.noisy)
+        Mute.objects.create(user=self.user, author=self.noisy)
+        index = reverse('posts:posts_index')
+        texts = []
+        for page in range(1, 4):
+            response = self.client.get(f'{index}?page={page}')
+            texts.extend(post.text for post in response.context['page_obj'])
+        self.assertEqual(
+            texts, [f'Пост {number}' for number in range(29, -1, -1)])
+        state = cache.get(f'{mutes_key(self.user.pk)}:index')
+        self.assertEqual(state['marks'][10], 20)
+        self.assertEqual(state['end'], 30)
+        page_obj = self.client.get(index).context['page_obj']
+        self.assertEqual(page_obj.paginator.num_pages, 3)
+
+    @override_settings(MUTE_SCAN_LIMIT=15)
+    def test_scan_is_bounded_and_continues(self):
+        """За запрос читается не больше MUTE_SCAN_LIMIT постов, следующий
+        запрос продолжает с того же места."""
+        for number in range(5):
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+        for number in range(50):
+            Post.objects.create(text=f'Шум {number}', author=self.noisy)
+        Mute.objects.create(user=self.user, author=self.noisy)
+        index = reverse('posts:posts_index')
+        self.assertEqual(self.page_authors(index), [])
+        state = cache.get(f'{mutes_key(self.user.pk)}:index')
+        self.assertEqual(state['marks'][0], 30)
+        self.assertEqual(self.page_authors(index), [self.author] * 5)
+
+    def test_muted_group(self):
+        """Скрытая группа пропадает из общей ленты и подписок."""
+        Follow.objects.create(user=self.user, author=self.author)
+        Post.objects.create(
+            text='В группе', author=self.author, group=self.group)
+        Post.objects.create(text='Без группы', author=self.author)
+        self.client.get(reverse('posts:group_mute', args=('garden',)))
+        for url in (reverse('posts:posts_index'),
+                    reverse('posts:follow_index')):
+            response = self.client.get(url)
+            self.assertEqual(
+                [post.text for post in response.context['page_obj']],
+                ['Без группы'],
+            )
+        response = self.client.get(
+            reverse('posts:posts_group', args=('garden',)))
+        self.assertEqual(len(response.context['page_obj']), 1)
+
+    def test_muted_author_leaves_follow_feed(self):
+        """Скрытый автор выпадает из ленты подписок."""
+        Follow.objects.create(user=self.user, author=self.noisy)
+        Post.objects.create(text='Шум', author=self.noisy)
+        Mute.objects.create(user=self.user, author=self.noisy)
+        self.assertEqual(
+            self.page_authors(reverse('posts:follow_index')), [])
+
+    def test_block(self):
+        """Заблокированный автор не подписывается и не комментирует."""
+        Follow.objects.create(user=self.noisy, author=self.user)
+        self.client.get(reverse('posts:profile_block', args=('noisy',)))
+        self.assertFalse(Follow.objects.filter(user=self.noisy).exists())
+        post = Post.objects.create(text='Мой пост', author=self.user)
+        noisy = Client()
+        noisy.force_login(self.noisy)
+        noisy.get(reverse('posts:profile_follow', args=('HasNoName',)))
+        response = noisy.post(
+            reverse('posts:add_comment', args=(post.pk,)), {'text': 'Шум'})
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.assertFalse(Follow.objects.filter(user=self.noisy).exists())
+        self.assertFalse(Comment.objects.exists())
@@ -0,0 +1,91 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.prerender import page_file, prerender
+
+from ..models import Group, Post
+
+TEMP_PRERENDER_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
+
+
+@override_settings(PRERENDER_ROOT=TEMP_PRERENDER_ROOT)
+class PrerenderCommandTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Post text for TEST',
+            group=cls.group,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PRERENDER_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_command_writes_public_pages(self):
+        """Команда сохраняет публичные страницы и их сжатые копии."""
+        call_command('prerender', stdout=open(os.devnull, 'w'))
+        with open(page_file('/'), 'rb') as page:
+            self.assertIn(self.post.text.encode(), page.read())
+        for path in ('/', '/about/author/', '/group/test-slug/',
+                     '/profile/HasNoName/'):
+            with self.subTest(path=path):
+                filename = page_file(path)
+                with open(filename, 'rb') as page:
+                    content = page.read()
+                with gzip.open(filename + '.gz') as page:
+                    self.assertEqual(page.read(), content)
+                self.assertIn(b'</html>', content)
+                self.assertNotIn(b'<!--hole:', content)
+
+    def test_missing_page_is_removed(self):
+        """Страница удалённой группы удаляется с диска."""
+        prerender(['/group/test-slug/'])
+        filename = page_file('/group/test-slug/')
+        self.assertTrue(os.path.exists(filename))
+        Group.objects.filter(slug='test-slug').update(slug='other-slug')
+        cache.clear()
+        prerender(['/group/test-slug/'])
+        self.assertFalse(os.path.exists(filename))
+        self.assertFalse(os.path.exists(filename + '.gz'))
+
+
+@override_settings(
+    PRERENDER_ROOT=TEMP_PRERENDER_ROOT, PRERENDER_ON_SAVE=True)
+class PrerenderHooksTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PRERENDER_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='HasNoName')
+
+    def test_new_post_rerenders_pages(self):
+        """Новый пост обновляет главную страницу и профиль автора."""
+        post = Post.objects.create(author=self.user, text='Свежий пост')
+        with open(page_file('/'), 'rb') as page:
+            self.assertIn(post.text.encode(), page.read())
+        with open(page_file('/profile/HasNoName/'), 'rb') as page:
+            self.assertIn(f'/posts/{post.pk}/'.encode(), page.read())
@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+
+from core import pagecache
+
+from ..models import Group, Post
+from ..recent import VERSION_KEY, recent_posts
+
+User = get_user_model()
+
+
+@override_settings(RECENT_POSTS_SIZE=15)
+class RecentPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, text=f'Пост {number}', group=cls.group)
+            for number in range(20)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_first_pages_without_queries(self):
+        """Первые страницы главной и группы не обращаются к базе."""
+        urls = (
+            reverse('posts:posts_index'),
+            reverse('posts:posts_group', kwargs={'slug': self.group.slug}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.client.get(url)
+                pagecache.invalidate()
+                with self.assertNumQueries(0):
+                    response = self.client.get(url)
+                page_obj = response.context['page_obj']
+                self.assertEqual(page_obj.paginator.count, 20)
+                self.assertEqual(page_obj[0], self.posts[-1])
+                self.assertEqual(page_obj[0].author, self.user)
+                self.assertEqual(page_obj[0].group, self.group)
+                self.assertContains(response, 'Пост 19')
+
+    def test_deep_page_falls_back_to_database(self):
+        """Страницы за пределами буфера читаются из базы."""
+        response = self.client.get(reverse('posts:posts_index') + '?page=2')
+        self.assertEqual(
+            list(response.context['page_obj']), self.posts[9::-1])
+
+    def test_version_change_reloads_buffer(self):
+        """Новая версия в общем кэше заставляет перечитать буфер."""
+        url = reverse('posts:posts_index')
+        self.client.get(url)
+        Post.objects.filter(pk=self.posts[-1].pk).update(
+            text='Изменён', rendered_text='<p>Изменён</p>')
+        cache.incr(VERSION_KEY)
+        pagecache.invalidate()
+        self.assertContains(self.client.get(url), 'Изменён')
+
+    def test_page_survives_concurrent_reset(self):
+        """Сброс буфера не ломает страницу, которая уже собирается."""
+        posts = recent_posts.index_posts()
+        recent_posts.reset(None)
+        page = posts[:10]
+        self.assertEqual(page[0], self.posts[-1])
+        self.assertEqual(page[0].author, self.user)
+        self.assertEqual(page[0].group, self.group)
+
+    def test_missing_group_not_found(self):
+        """Несуществующая группа отдаёт 404."""
+        response = self.client.get(
+            reverse('posts:posts_group', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
+
+
+class RecentPostsPushTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='HasNoName')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_created_post_pushed_without_reload(self):
+        """Созданный пост попадает в буфер без перечитывания базы."""
+        url = reverse('posts:posts_index')
+        self.client.get(url)
+        self.authorized_client.post(
+            reverse('posts:post_create'), {'text': 'Свежий пост'})
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, 'Свежий пост')
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
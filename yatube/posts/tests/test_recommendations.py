@@ -0,0 +1,92 @@
+from io import StringIO
+from unittest import skipIf
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, FollowSuggestion
+from ..recommendations import build_suggestions, sparse, suggestions_for
+
+User = get_user_model()
+
+
+@skipIf(sparse is None, 'нужны numpy и scipy')
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        names = ('alice', 'bob', 'carol', 'dave', 'erin', 'frank')
+        cls.users = {
+            name: User.objects.create_user(username=name) for name in names}
+        for user, author in (
+            ('alice', 'bob'),
+            ('bob', 'carol'),
+            ('dave', 'bob'),
+            ('dave', 'erin'),
+        ):
+            Follow.objects.create(
+                user=cls.users[user], author=cls.users[author])
+
+    def setUp(self):
+        cache.clear()
+
+    def usernames(self, name):
+        return [
+            author['username']
+            for author in suggestions_for(self.users[name])
+        ]
+
+    def test_friends_of_friends_and_cofollow(self):
+        """Рекомендуются друзья друзей и авторы с общими подписчиками."""
+        build_suggestions()
+        suggested = self.usernames('alice')
+        self.assertIn('carol', suggested)
+        self.assertIn('erin', suggested)
+        self.assertNotIn('bob', suggested)
+        self.assertNotIn('alice', suggested)
+
+    def test_new_user_gets_popular_authors(self):
+        """Пользователь без подписок получает самых читаемых авторов."""
+        build_suggestions()
+        self.assertEqual(self.usernames('frank')[0], 'bob')
+
+    def test_top_cutoff(self):
+        """Сохраняется не больше top авторов на пользователя."""
+        build_suggestions(top=1)
+        self.assertEqual(len(self.usernames('alice')), 1)
+
+    def test_served_from_cache(self):
+        """Повторная выдача рекомендаций не обращается к базе."""
+        build_suggestions()
+        cache.clear()
+        self.usernames('alice')
+        with self.assertNumQueries(0):
+            self.usernames('alice')
+
+    def test_followed_authors_filtered(self):
+        """Автор, на которого подписались после расчёта, не предлагается."""
+        build_suggestions()
+        Follow.objects.create(
+            user=self.users['alice'], author=self.users['carol'])
+        self.assertNotIn('carol', self.usernames('alice'))
+
+    def test_stale_rows_removed(self):
+        """Рекомендации отписавшихся от всех пользователей удаляются."""
+        build_suggestions()
+        Follow.objects.filter(user=self.users['alice']).delete()
+        build_suggestions()
+        self.assertFalse(
+            FollowSuggestion.objects.filter(user=self.users['alice']).exists())
+
+    def test_shown_on_follow_index(self):
+        """Рекомендации выводятся на странице подписок."""
+        call_command('build_suggestions', stdout=StringIO())
+        client = Client()
+        client.force_login(self.users['alice'])
+        response = client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Кого почитать')
+        self.assertContains(
+            response, reverse('posts:profile', args=('carol',)))
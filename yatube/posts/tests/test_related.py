@@ -0,0 +1,94 @@
+from io import StringIO
+from unittest import skipIf
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, RelatedPosts
+from ..related import build_related, related_posts, sparse
+
+User = get_user_model()
+
+
+@skipIf(sparse is None, 'нужны numpy и scipy')
+class RelatedPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Сад', slug='garden', description='Про сад')
+        cls.tomatoes = Post.objects.create(
+            text='Рассада томатов на подоконнике растёт быстро',
+            author=cls.user,
+            group=cls.group,
+        )
+        cls.seedlings = Post.objects.create(
+            text='Как поливать рассаду томатов на подоконнике',
+            author=cls.user,
+        )
+        cls.football = Post.objects.create(
+            text='Вчерашний футбольный матч закончился вничью',
+            author=cls.user,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def ids(self, post):
+        return [item['id'] for item in related_posts(post.pk)]
+
+    def test_similar_texts_are_neighbours(self):
+        """Посты с похожим текстом попадают в соседи друг друга."""
+        build_related()
+        self.assertEqual(self.ids(self.tomatoes), [self.seedlings.pk])
+        self.assertEqual(self.ids(self.football), [])
+
+    def test_group_membership_counts(self):
+        """Посты одной группы ближе друг к другу."""
+        self.football.group = self.group
+        self.football.save()
+        build_related()
+        self.assertIn(self.football.pk, self.ids(self.tomatoes))
+
+    def test_incremental_update(self):
+        """Новый пост получает соседей и попадает в их списки."""
+        build_related()
+        post = Post.objects.create(
+            text='Футбольный матч сборной закончился вничью',
+            author=self.user,
+        )
+        built = build_related()
+        self.assertEqual(built['posts'], 1)
+        self.assertEqual(self.ids(post), [self.football.pk])
+        self.assertEqual(self.ids(self.football), [post.pk])
+
+    def test_full_rebuild_drops_deleted(self):
+        """Полный пересчёт удаляет списки удалённых постов."""
+        build_related()
+        pk = self.football.pk
+        Post.objects.filter(pk=pk).delete()
+        build_related(full=True)
+        self.assertFalse(RelatedPosts.objects.filter(post_id=pk).exists())
+
+    def test_served_from_cache(self):
+        """Повторная выдача соседей не обращается к базе."""
+        build_related()
+        cache.clear()
+        related_posts(self.tomatoes.pk)
+        with self.assertNumQueries(0):
+            related_posts(self.tomatoes.pk)
+
+    def test_shown_on_post_detail(self):
+        """Похожие посты выводятся на странице поста."""
+        call_command('build_related', stdout=StringIO())
+        response = Client().get(
+            reverse('posts:post_detail', args=(self.tomatoes.pk,)))
+        self.assertContains(response, 'Похожие записи')
+        self.assertContains(
+            response,
+            reverse('posts:post_detail', args=(self.seedlings.pk,)),
+        )
@@ -0,0 +1,96 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Post, PostRevision
+from ..revisions import apply_delta, make_delta, text_at
+
+User = get_user_model()
+
+
+@override_settings(REVISION_SNAPSHOT_EVERY=3, REVISIONS_PER_PAGE=2)
+class RevisionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.other = User.objects.create_user(username='other')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.post = Post.objects.create(text='Текст 0', author=self.user)
+
+    def edit(self, *texts):
+        for text in texts:
+            self.post.text = text
+            self.post.save()
+
+    def test_delta_round_trip(self):
+        """Разница восстанавливает новый текст из старого."""
+        old = 'Мама мыла раму'
+        new = 'Мама долго мыла новую раму!'
+        self.assertEqual(apply_delta(old, make_delta(old, new)), new)
+
+    def test_every_edit_recorded(self):
+        """Каждая правка хранится, полный текст - раз в несколько правок."""
+        self.edit('Текст 1', 'Текст 1', 'Текст 2', 'Текст 3', 'Текст 4')
+        revisions = self.post.revisions.order_by('number')
+        self.assertEqual(
+            list(revisions.values_list('is_snapshot', flat=True)),
+            [True, False, False, True, False],
+        )
+        for number in range(1, 6):
+            with self.assertNumQueries(1):
+                self.assertEqual(
+                    text_at(self.post, number), f'Текст {number - 1}')
+
+    def test_post_without_history(self):
+        """У поста без истории первой правкой становится прежний текст."""
+        self.post.revisions.all().delete()
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(text_at(post, 1), 'Текст 0')
+        self.assertEqual(text_at(post, 2), 'Новый текст')
+
+    def test_history_page(self):
+        """История постранична, черновик видит только автор."""
+        self.edit('Текст 1', 'Текст 2')
+        url = reverse('posts:post_history', args=(self.post.pk,))
+        response = self.client.get(url)
+        self.assertEqual(
+            [text for _, text in response.context['history']],
+            ['Текст 2', 'Текст 1'],
+        )
+        response = self.client.get(url, {'page': 2})
+        self.assertEqual(
+            [text for _, text in response.context['history']], ['Текст 0'])
+        self.post.status = Post.DRAFT
+        self.post.save()
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_compaction(self):
+        """Старые правки прореживаются до одной за день, тексты целы."""
+        self.edit(*(f'Текст {number}' for number in range(1, 7)))
+        now = timezone.now()
+        for number, days in ((1, 5), (2, 5), (3, 4), (4, 4), (5, 4)):
+            PostRevision.objects.filter(
+                post=self.post, number=number,
+            ).update(created=now - timedelta(days=days, minutes=number))
+        out = StringIO()
+        call_command('compact_revisions', days=1, stdout=out)
+        self.assertIn('Удалено правок: 2', out.getvalue())
+        revisions = self.post.revisions.order_by('number')
+        self.assertEqual(
+            list(revisions.values_list('number', flat=True)), [1, 2, 5, 6, 7])
+        for number in (1, 2, 5, 6, 7):
+            self.assertEqual(
+                text_at(self.post, number), f'Текст {number - 1}')
@@ -0,0 +1,108 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Post, PostTag
+from ..scheduling import publish_due
+from ..signals import posts_bulk_changed
+
+User = get_user_model()
+
+
+class SchedulingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def scheduled(self, text, minutes):
+        return Post.objects.create(
+            text=text,
+            author=self.user,
+            status=Post.SCHEDULED,
+            publish_at=timezone.now() + timedelta(minutes=minutes),
+        )
+
+    def index_texts(self):
+        response = self.client.get(reverse('posts:posts_index'))
+        return [post.text for post in response.context['page_obj']]
+
+    def test_draft_hidden_until_published(self):
+        """Черновик не виден в лентах, после публикации появляется."""
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Черновик', 'draft': 'on'})
+        self.assertRedirects(response, reverse('posts:drafts'))
+        post = Post.objects.get(text='Черновик')
+        self.assertEqual(post.status, Post.DRAFT)
+        self.assertEqual(self.index_texts(), [])
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,)))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('posts:drafts'))
+        self.assertEqual(list(response.context['page_obj']), [post])
+        self.client.post(
+            reverse('posts:post_edit', args=(post.pk,)), {'text': 'Черновик'})
+        post.refresh_from_db()
+        self.assertEqual(post.status, Post.PUBLISHED)
+        self.assertEqual(self.index_texts(), ['Черновик'])
+
+    def test_schedule_through_form(self):
+        """Пост планируется только на будущее время."""
+        publish_at = timezone.localtime() + timedelta(hours=1)
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Завтра',
+            'publish_at': publish_at.strftime('%Y-%m-%dT%H:%M'),
+        })
+        self.assertEqual(Post.objects.get().status, Post.SCHEDULED)
+        response = self.client.post(reverse('posts:post_create'), {
+            'text': 'Вчера',
+            'publish_at': (publish_at - timedelta(days=1)).strftime(
+                '%Y-%m-%dT%H:%M'),
+        })
+        self.assertFormError(
+            response, 'publication', 'publish_at',
+            'Время публикации должно быть в будущем',
+        )
+
+    def test_publish_due_in_batches(self):
+        """Наступившие посты публикуются пачками, один сигнал на пачку."""
+        posts = [self.scheduled(f'#сад пост {number}', -number)
+                 for number in range(1, 4)]
+        self.scheduled('Будущий пост', 60)
+        self.assertEqual(PostTag.objects.count(), 0)
+        self.assertEqual(self.index_texts(), [])
+        batches = []
+
+        def collect(sender, post_ids, **kwargs):
+            batches.append(post_ids)
+
+        posts_bulk_changed.connect(collect)
+        try:
+            self.assertEqual(publish_due(2), 3)
+        finally:
+            posts_bulk_changed.disconnect(collect)
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+        self.assertEqual(
+            self.index_texts(), ['#сад пост 1', '#сад пост 2', '#сад пост 3'])
+        self.assertEqual(PostTag.objects.count(), 3)
+        posts[0].refresh_from_db()
+        self.assertEqual(posts[0].pub_date, posts[0].publish_at)
+        self.assertEqual(publish_due(2), 0)
+
+    def test_command(self):
+        """Команда публикует наступившие посты."""
+        self.scheduled('Пора', -1)
+        out = StringIO()
+        call_command('publish_scheduled', stdout=out)
+        self.assertIn('Опубликовано постов: 1', out.getvalue())
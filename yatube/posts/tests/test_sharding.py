@@ -0,0 +1,202 @@
+import os
+
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import sharding
+from ..models import AuthorShard, Comment, Follow, Group, Post, PostTag
+
+SHARD = 'shard_test'
+User = get_user_model()
+
+
+@override_settings(POST_SHARDS=('default', SHARD))
+class ShardingTests(TestCase):
+    databases = {'default', SHARD}
+
+    @classmethod
+    def setUpClass(cls):
+        connections.databases[SHARD] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(settings.BASE_DIR, 'shard_test.sqlite3'),
+        }
+        connections[SHARD].creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='HasNoName')
+        cls.local_author = User.objects.create_user(username='local')
+        cls.remote_author = User.objects.create_user(username='remote')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            description='Тестовое описание',
+            slug='test-slug',
+        )
+        for author, shard in ((cls.local_author, 'default'),
+                              (cls.remote_author, SHARD)):
+            AuthorShard.objects.update_or_create(
+                author=author, defaults={'shard': shard})
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connection = connections[SHARD]
+        connection.creation.destroy_test_db(
+            connection.settings_dict['NAME'], verbosity=0)
+        del connections[SHARD]
+        del connections.databases[SHARD]
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        self.posts = []
+        for number in range(6):
+            for author in (self.local_author, self.remote_author):
+                self.posts.append(Post.objects.create(
+                    author=author,
+                    text=f'Пост {number} {author.username}',
+                    group=self.group,
+                ))
+
+    def test_posts_stored_in_author_shard(self):
+        """Посты автора попадают в его шард с общими ключами."""
+        self.assertEqual(
+            Post.objects.using(SHARD).filter(
+                author=self.remote_author).count(), 6)
+        self.assertFalse(Post.objects.filter(
+            author=self.remote_author).exists())
+        pks = [post.pk for post in self.posts]
+        self.assertEqual(len(set(pks)), len(pks))
+
+    def test_index_merges_shards_by_date(self):
+        """Главная страница сливает шарды по дате публикации."""
+        expected = list(reversed(self.posts))
+        first_page = self.client.get(
+            reverse('posts:posts_index')).context['page_obj']
+        self.assertEqual(first_page.paginator.count, 12)
+        self.assertEqual(list(first_page), expected[:10])
+        second_page = self.client.get(
+            reverse('posts:posts_index') + '?page=2').context['page_obj']
+        self.assertEqual(list(second_page), expected[10:])
+        group_page = self.client.get(reverse(
+            'posts:posts_group', kwargs={'slug': self.group.slug}))
+        self.assertEqual(group_page.context['page_obj'].paginator.count, 12)
+
+    def test_post_detail_and_comment_on_shard(self):
+        """Пост из шарда открывается, комментарий сохраняется в его шард."""
+        post = self.posts[1]
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        self.assertContains(self.client.get(url), post.text)
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Комментарий в шарде'},
+        )
+        self.assertTrue(Comment.objects.using(SHARD).filter(
+            post_id=post.pk, text='Комментарий в шарде').exists())
+        self.assertContains(self.client.get(url), 'Комментарий в шарде')
+
+    def test_follow_index_reads_author_shards(self):
+        """Лента подписок собирает посты из шардов авторов."""
+        Follow.objects.create(user=self.reader, author=self.remote_author)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 6)
+
+    def test_new_user_replicated_and_placed(self):
+        """Новый пользователь копируется в шарды и получает шард."""
+        user = User.objects.create_user(username='newcomer')
+        self.assertTrue(
+            User.objects.using(SHARD).filter(username='newcomer').exists())
+        self.assertTrue(AuthorShard.objects.filter(author=user).exists())
+
+    def test_rebalance_moves_author(self):
+        """Команда переносит посты и комментарии автора в другой шард."""
+        post = self.posts[1]
+        Comment.objects.create(post=post, author=self.reader, text='Коммент')
+        out = StringIO()
+        call_command(
+            'rebalance_shards', '--move', 'remote', 'default', stdout=out)
+        self.assertIn('перенесено постов: 6', out.getvalue())
+        self.assertFalse(Post.objects.using(SHARD).exists())
+        self.assertEqual(
+            Post.objects.filter(author=self.remote_author).count(), 6)
+        self.assertTrue(
+            Comment.objects.filter(post_id=post.pk, text='Коммент').exists())
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}))
+        self.assertContains(response, 'Коммент')
+
+    def test_dry_run_writes_nothing(self):
+        """Пробный запуск только печатает план и ничего не пишет."""
+        User.objects.bulk_create([User(username='unsynced')])
+        out = StringIO()
+        with mock.patch('posts.management.commands.rebalance_shards.'
+                        'seed_tickets') as seed_tickets:
+            call_command(
+                'rebalance_shards', '--move', 'remote', 'default',
+                '--dry-run', stdout=out)
+        seed_tickets.assert_not_called()
+        self.assertFalse(
+            User.objects.using(SHARD).filter(username='unsynced').exists())
+        self.assertEqual(Post.objects.using(SHARD).count(), 6)
+        self.assertIn(f'Автор {self.remote_author.pk} -> default',
+                      out.getvalue())
+
+    def test_lock_author_takes_write_lock(self):
+        """Блокировка автора начинает запись в SQLite сразу."""
+        connection = connections[SHARD]
+        with transaction.atomic(using=SHARD):
+            with CaptureQueriesContext(connection) as queries:
+                sharding.lock_author(self.remote_author.pk, SHARD)
+        self.assertTrue(queries[0]['sql'].startswith('UPDATE'))
+
+    def test_move_keeps_writes_made_during_copy(self):
+        """Записи, сделанные во время копирования, переживают перенос."""
+        post = self.posts[1]
+        lock_author = sharding.lock_author
+
+        def write_then_lock(author_id, using):
+            Comment.objects.create(
+                post=post, author=self.reader, text='Во время переноса')
+            Post.objects.filter(pk=post.pk).using(SHARD).update(
+                text='Правка во время переноса')
+            Post.objects.create(author=self.remote_author, text='#поздний')
+            lock_author(author_id, using)
+
+        with mock.patch.object(
+                sharding, 'lock_author', side_effect=write_then_lock):
+            moved = sharding.move_author(self.remote_author.pk, 'default')
+        self.assertEqual(moved, 7)
+        self.assertFalse(Post.objects.using(SHARD).exists())
+        self.assertFalse(Comment.objects.using(SHARD).exists())
+        self.assertEqual(
+            Post.objects.filter(author=self.remote_author).count(), 7)
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).text, 'Правка во время переноса')
+        self.assertTrue(Comment.objects.filter(
+            post_id=post.pk, text='Во время переноса').exists())
+        self.assertTrue(PostTag.objects.filter(tag='поздний').exists())
+
+    def test_tag_page_merges_shards(self):
+        """Страница тега собирает посты из всех шардов и переживает перенос."""
+        local = Post.objects.create(author=self.local_author, text='#общий')
+        remote = Post.objects.create(author=self.remote_author, text='#общий')
+        url = reverse('posts:tag_posts', args=('общий',))
+        self.assertEqual(
+            list(self.client.get(url).context['page']), [remote, local])
+        call_command(
+            'rebalance_shards', '--move', 'remote', 'default',
+            stdout=StringIO())
+        cache.clear()
+        self.assertEqual(
+            [post.pk for post in self.client.get(url).context['page']],
+            [remote.pk, local.pk],
+        )
@@ -0,0 +1,102 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.admin import helpers
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Post, PostTag
+
+User = get_user_model()
+
+
+class SoftDeleteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@yatube.ru', password='admin')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.post = Post.objects.create(text='#сад Пост', author=self.user)
+
+    def index_posts(self):
+        response = self.client.get(reverse('posts:posts_index'))
+        return list(response.context['page_obj'])
+
+    def test_post_hidden_and_restored(self):
+        """Скрытый пост пропадает из лент и индекса тегов до возврата."""
+        self.assertEqual(self.index_posts(), [self.post])
+        self.post.soft_delete()
+        self.assertEqual(self.index_posts(), [])
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertTrue(Post.all_objects.filter(pk=self.post.pk).exists())
+        self.assertFalse(PostTag.objects.exists())
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.post.pk,)))
+        self.assertEqual(response.status_code, 404)
+        self.post.restore()
+        self.assertEqual(self.index_posts(), [self.post])
+        self.assertTrue(PostTag.objects.exists())
+
+    def test_comment_hidden_and_reply_counts(self):
+        """Скрытый комментарий не виден, счётчик ответов предка следует."""
+        root = Comment.objects.create(
+            post=self.post, author=self.user, text='Корень')
+        reply = Comment.objects.create(
+            post=self.post, author=self.user, text='Ответ', parent=root)
+        reply.refresh_from_db()
+        reply.soft_delete()
+        root.refresh_from_db()
+        self.assertEqual(root.reply_count, 0)
+        self.assertEqual(list(self.post.comments.all()), [root])
+        reply.restore()
+        root.refresh_from_db()
+        self.assertEqual(root.reply_count, 1)
+
+    def test_admin_actions(self):
+        """Модератор скрывает и возвращает посты из админки."""
+        admin_client = Client()
+        admin_client.force_login(self.admin)
+        url = reverse('admin:posts_post_changelist')
+        for action in ('soft_delete', 'restore'):
+            admin_client.post(url, {
+                'action': action,
+                helpers.ACTION_CHECKBOX_NAME: [self.post.pk],
+            })
+            self.assertEqual(
+                Post.objects.filter(pk=self.post.pk).exists(),
+                action == 'restore',
+            )
+        response = admin_client.get(url, {'deleted': 'no'})
+        self.assertContains(response, '#сад Пост')
+
+    def test_purge(self):
+        """Скрытые дольше срока строки удаляются насовсем с комментариями."""
+        kept = Post.objects.create(text='Недавно скрыт', author=self.user)
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий')
+        old_comment = Comment.objects.create(
+            post=kept, author=self.user, text='Старый комментарий')
+        self.post.soft_delete()
+        kept.soft_delete()
+        old_comment.soft_delete()
+        old = timezone.now() - timedelta(days=31)
+        Post.all_objects.filter(pk=self.post.pk).update(deleted_at=old)
+        Comment.all_objects.filter(pk=old_comment.pk).update(deleted_at=old)
+        out = StringIO()
+        call_command('purge_deleted', stdout=out)
+        self.assertIn('Посты: удалено 1', out.getvalue())
+        self.assertIn('Комментарии: удалено 1', out.getvalue())
+        self.assertFalse(Post.all_objects.filter(pk=self.post.pk).exists())
+        self.assertFalse(Comment.all_objects.filter(
+            pk__in=(comment.pk, old_comment.pk)).exists())
+        self.assertTrue(Post.all_objects.filter(pk=kept.pk).exists())
@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, PostMention, PostTag
+from ..tags import PAGE_SIZE, parse_mentions, parse_tags
+
+User = get_user_model()
+
+
+class TagParsingTests(TestCase):
+    def test_parse(self):
+        """Теги приводятся к нижнему регистру, якоря ссылок не теги."""
+        self.assertEqual(
+            parse_tags('#Сад и #сад, https://ya.ru/#top, &#39; #огород'),
+            {'сад', 'огород'},
+        )
+        self.assertEqual(
+            parse_mentions('Привет, @leo. Почта leo@ya.ru'), {'leo'})
+
+
+class TagIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.leo = User.objects.create_user(username='leo')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_index_follows_edits_and_deletes(self):
+        """Таблицы тегов и упоминаний следуют за правкой и удалением."""
+        post = Post.objects.create(
+            text='#сад #огород привет @leo', author=self.user)
+        self.assertEqual(
+            set(post.tags.values_list('tag', flat=True)), {'сад', 'огород'})
+        self.assertEqual(
+            list(post.mentions.values_list('user_id', flat=True)),
+            [self.leo.pk],
+        )
+        self.client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            {'text': '#сад #цветы'},
+        )
+        self.assertEqual(
+            set(post.tags.values_list('tag', flat=True)), {'сад', 'цветы'})
+        self.assertFalse(post.mentions.exists())
+        post.delete()
+        self.assertFalse(PostTag.objects.exists())
+
+    def test_tag_page_paginated_by_cursor(self):
+        """Страница тега листается курсором."""
+        for number in range(PAGE_SIZE + 2):
+            Post.objects.create(text=f'#Сад пост {number}', author=self.user)
+        Post.objects.create(text='без тегов', author=self.user)
+        url = reverse('posts:tag_posts', args=('сад',))
+        response = self.client.get(url)
+        first = list(response.context['page'])
+        self.assertEqual(len(first), PAGE_SIZE)
+        self.assertEqual(first[0].text, f'#Сад пост {PAGE_SIZE + 1}')
+        cursor = response.context['page'].next_cursor
+        second = list(self.client.get(
+            url, {'cursor': cursor}).context['page'])
+        self.assertEqual(
+            [post.text for post in second], ['#Сад пост 1', '#Сад пост 0'])
+
+    def test_mentions_page(self):
+        """На странице упоминаний - посты, где упомянут пользователь."""
+        Post.objects.create(text='Привет, @HasNoName!', author=self.leo)
+        Post.objects.create(text='Привет, @leo!', author=self.user)
+        response = self.client.get(reverse('posts:mentions'))
+        self.assertEqual(
+            [post.text for post in response.context['page']],
+            ['Привет, @HasNoName!'],
+        )
+
+    def test_backfill_command(self):
+        """Команда строит таблицы по уже существующим постам."""
+        Post.objects.bulk_create([
+            Post(text='#старый пост для @leo', author=self.user),
+            Post(text='#старый', author=self.user),
+        ])
+        self.assertFalse(PostTag.objects.exists())
+        out = StringIO()
+        call_command('index_tags', '--batch-size', '1', stdout=out)
+        self.assertIn('Обработано постов: 2', out.getvalue())
+        self.assertEqual(PostTag.objects.filter(tag='старый').count(), 2)
+        self.assertEqual(PostMention.objects.filter(user=self.leo).count(), 1)
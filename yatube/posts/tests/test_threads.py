@@ -0,0 +1,97 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..threads import encode_segment, subtree, thread_page
+
+User = get_user_model()
+
+
+class ThreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def comment(self, text, parent=None):
+        return Comment.objects.create(
+            post=self.post, author=self.user, text=text, parent=parent)
+
+    def test_paths_and_reply_counts(self):
+        """Путь ответа продолжает путь родителя, счётчики у всех предков."""
+        root = self.comment('Корень')
+        reply = self.comment('Ответ', root)
+        nested = self.comment('Ответ на ответ', reply)
+        nested.refresh_from_db()
+        self.assertEqual(nested.depth, 2)
+        self.assertEqual(nested.path, ''.join(
+            encode_segment(pk) for pk in (root.pk, reply.pk, nested.pk)))
+        root.refresh_from_db()
+        self.assertEqual(root.reply_count, 2)
+        reply.delete()
+        root.refresh_from_db()
+        self.assertEqual(root.reply_count, 1)
+
+    def test_subtree_in_depth_first_order(self):
+        """Ветка читается одним запросом в порядке обхода в глубину."""
+        first = self.comment('Первый')
+        second = self.comment('Второй')
+        reply = self.comment('Ответ первому', first)
+        nested = self.comment('Ответ на ответ', reply)
+        self.comment('Ответ второму', second)
+        with self.assertNumQueries(1):
+            comments = [comment.pk for comment in subtree(
+                self.post.comments, first)]
+        self.assertEqual(comments, [first.pk, reply.pk, nested.pk])
+
+    @override_settings(COMMENT_THREADS_PER_PAGE=2, COMMENT_EXPANDED_DEPTH=1)
+    def test_thread_page(self):
+        """Страница веток - корни страницы с ответами до заданной глубины."""
+        roots = [self.comment(f'Корень {number}') for number in range(3)]
+        reply = self.comment('Ответ', roots[1])
+        self.comment('Свёрнутый ответ', reply)
+        self.comment('Ответ на следующей странице', roots[2])
+        page, comments = thread_page(self.post.comments, 1)
+        self.assertEqual(
+            [comment.pk for comment in comments],
+            [roots[0].pk, roots[1].pk, reply.pk],
+        )
+        self.assertEqual(comments[-1].reply_count, 1)
+        page, comments = thread_page(self.post.comments, 2)
+        self.assertEqual(len(comments), 2)
+
+    def test_reply_through_form(self):
+        """Ответ из формы становится ответом и ведёт на страницу ветки."""
+        root = self.comment('Корень')
+        response = self.client.post(
+            reverse('posts:add_comment', args=(self.post.pk,)),
+            {'text': 'Ответ', 'parent': root.pk},
+        )
+        self.assertRedirects(response, reverse(
+            'posts:comment_thread', args=(self.post.pk, root.pk)),
+            fetch_redirect_response=False)
+        reply = Comment.objects.get(text='Ответ')
+        self.assertEqual(reply.parent, root)
+        response = self.client.get(reverse(
+            'posts:comment_thread', args=(self.post.pk, root.pk)))
+        self.assertEqual(list(response.context['comment']), [root, reply])
+        self.assertContains(response, f'value="{root.pk}"')
+
+    def test_parent_from_other_post_ignored(self):
+        """Родитель из чужого поста не принимается."""
+        other = Post.objects.create(text='Другой пост', author=self.user)
+        foreign = Comment.objects.create(
+            post=other, author=self.user, text='Чужой')
+        self.client.post(
+            reverse('posts:add_comment', args=(self.post.pk,)),
+            {'text': 'Ответ', 'parent': foreign.pk},
+        )
+        self.assertIsNone(Comment.objects.get(text='Ответ').parent)
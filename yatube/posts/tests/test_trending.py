@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..trending import record, snapshot, top
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Сад', slug='garden', description='Про сад')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_writes_counted(self):
+        """Посты, комментарии и подписки попадают в рейтинги."""
+        post = Post.objects.create(
+            text='#урожай собрали', author=self.author, group=self.group)
+        Comment.objects.create(post=post, author=self.user, text='Ура')
+        Comment.objects.create(post=post, author=self.user, text='Ещё')
+        Follow.objects.create(user=self.user, author=self.author)
+        trending = snapshot()
+        self.assertEqual(trending['tag'][0]['id'], 'урожай')
+        self.assertEqual(trending['tag'][0]['score'], 3)
+        self.assertEqual(trending['group'][0]['label'], ('garden', 'Сад'))
+        self.assertEqual(trending['post'][0]['id'], post.pk)
+        self.assertEqual(trending['post'][0]['score'], 2)
+        self.assertEqual(trending['author'][0]['score'], 2)
+
+    @override_settings(TRENDING_BUCKET_SECONDS=60, TRENDING_DECAY=0.5)
+    def test_old_activity_decays(self):
+        """Активность в старых корзинах весит меньше свежей."""
+        now = 60 * 1000
+        for _ in range(4):
+            record('tag', 'вчера', now=now - 120)
+        for _ in range(2):
+            record('tag', 'сейчас', now=now)
+        self.assertEqual(
+            [(item['id'], item['score']) for item in top('tag', now=now)],
+            [('сейчас', 2), ('вчера', 1)],
+        )
+        self.assertEqual(top('tag', now=now + 60 * 12), [])
+
+    @override_settings(TRENDING_BUCKET_SECONDS=60, TRENDING_CAPACITY=2)
+    def test_bucket_keeps_strongest(self):
+        """От прошедшей корзины остаются только самые активные элементы."""
+        for tag, count in (('a', 3), ('b', 1), ('c', 2)):
+            for _ in range(count):
+                record('tag', tag, now=0)
+        self.assertEqual(
+            [item['id'] for item in top('tag', now=0)], ['a', 'c', 'b'])
+        self.assertEqual(
+            [item['id'] for item in top('tag', now=60)], ['a', 'c'])
+
+    def test_concurrent_records_counted(self):
+        """Одновременные события не теряются."""
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(
+                lambda number: record('tag', f'тег{number % 3}', now=0),
+                range(30),
+            ))
+        self.assertEqual(
+            sorted(item['score'] for item in top('tag', now=0)),
+            [10, 10, 10],
+        )
+
+    def test_labels_read_lazily(self):
+        """Подписи читаются из базы при показе, а не при записи."""
+        follow = Follow(user=self.user, author_id=self.author.pk)
+        with self.assertNumQueries(1):
+            follow.save()
+        Group.objects.filter(pk=self.group.pk).update(title='Огород')
+        record('group', self.group.pk)
+        self.assertEqual(
+            top('author')[0]['label'], self.author.username)
+        self.assertEqual(top('group')[0]['label'], ('garden', 'Огород'))
+
+    def test_index_reads_no_sql_for_trending(self):
+        """Главная показывает рейтинг из кэша без запросов к базе."""
+        Post.objects.create(text='#урожай', author=self.author)
+        response = Client().get(reverse('posts:posts_index'))
+        self.assertContains(response, 'Сейчас обсуждают')
+        self.assertContains(
+            response, reverse('posts:tag_posts', args=('урожай',)))
+        with self.assertNumQueries(0):
+            snapshot()
@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import F, Subquery
+
+SEGMENT_LENGTH = 8
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+PATH_END = '~'
+
+
+def encode_segment(pk):
+    encoded = ''
+    while True:
+        pk, remainder = divmod(pk, len(DIGITS))
+        encoded = DIGITS[remainder] + encoded
+        if not pk:
+            return encoded.rjust(SEGMENT_LENGTH, '0')
+
+
+def ancestor_ids(path):
+    return [
+        int(path[start:start + SEGMENT_LENGTH], len(DIGITS))
+        for start in range(0, len(path) - SEGMENT_LENGTH, SEGMENT_LENGTH)
+    ]
+
+
+def reply_parent(parent):
+    """Родитель ответа с учётом предельной глубины дерева.
+
+    Путь ограничен длиной поля, поэтому ответ на слишком глубокий
+    комментарий становится ответом на его предка.
+    """
+    while parent is not None and parent.depth >= settings.COMMENT_MAX_DEPTH:
+        parent = parent.parent
+    return parent
+
+
+def count_reply(comment, using, delta):
+    """Меняет на delta счётчики ответов у предков комментария."""
+    ancestors = ancestor_ids(comment.path)
+    if ancestors:
+        type(comment).all_objects.using(using).filter(
+            pk__in=ancestors, reply_count__gte=-delta).update(
+            reply_count=F('reply_count') + delta)
+
+
+def attach(comment, using):
+    """Записывает путь нового комментария и обновляет счётчики предков.
+
+    Путь - это id всех предков и самого комментария в base36 фиксированной
+    ширины, поэтому сортировка по пути даёт обход дерева в глубину,
+    а ветка - это диапазон путей с общим префиксом.
+    """
+    parent = comment.parent if comment.parent_id else None
+    comment.path = (parent.path if parent else '') + encode_segment(
+        comment.pk)
+    comment.depth = parent.depth + 1 if parent else 0
+    type(comment).objects.using(using).filter(pk=comment.pk).update(
+        path=comment.path, depth=comment.depth)
+    count_reply(comment, using, 1)
+
+
+def detach(comment, using):
+    if not comment.is_deleted:
+        count_reply(comment, using, -1)
+
+
+def subtree(comments, root, max_depth=None):
+    """Ветка комментария одним диапазонным запросом по индексу."""
+    rows = comments.filter(
+        path__gte=root.path, path__lt=root.path + PATH_END)
+    if max_depth is not None:
+        rows = rows.filter(depth__lte=max_depth)
+    return rows.select_related('author').order_by('path')
+
+
+def thread_page(comments, page_number):
+    """Страница веток: корни страницы и их ответы до COMMENT_EXPANDED_DEPTH.
+
+    Корни читаются по индексу (пост, глубина, путь), а все ответы -
+    одним запросом по диапазону путей от первого корня страницы до
+    первого корня следующей. Диапазоны страниц покрывают все пути,
+    поэтому ответы удалённых корней тоже не теряются. Комментарии идут
+    в порядке обхода, и шаблон выводит их одним циклом с отступом.
+    """
+    roots = comments.filter(depth=0).order_by('path')
+    page = Paginator(
+        roots.only('path'), settings.COMMENT_THREADS_PER_PAGE,
+    ).get_page(page_number)
+    rows = comments.filter(depth__lte=settings.COMMENT_EXPANDED_DEPTH)
+    if page.has_previous():
+        rows = rows.filter(path__gte=page[0].path)
+    if page.has_next():
+        following = roots.filter(
+            path__gt=page[len(page) - 1].path).values('path')[:1]
+        rows = rows.filter(path__lt=Subquery(following))
+    return page, list(rows.select_related('author').order_by('path'))
@@ -0,0 +1,230 @@
+import heapq
+import time
+
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from .models import Group, Post
+from .sharding import shard_aliases
+from .tags import parse_tags
+
+User = get_user_model()
+
+KINDS = ('tag', 'group', 'post', 'author')
+SNIPPET_LENGTH = 50
+
+
+def current_bucket(now=None):
+    now = time.time() if now is None else now
+    return int(now // settings.TRENDING_BUCKET_SECONDS)
+
+
+def bucket_timeout():
+    return settings.TRENDING_BUCKET_SECONDS * (settings.TRENDING_WINDOW + 1)
+
+
+def top_key(kind, bucket):
+    return f'trending:{kind}:{bucket}'
+
+
+def label_key(kind, item_id):
+    return f'trending:label:{kind}:{item_id}'
+
+
+def increment(key, amount, timeout):
+    if cache.add(key, amount, timeout):
+        return amount
+    try:
+        return cache.incr(key, amount)
+    except ValueError:
+        cache.set(key, amount, timeout)
+        return amount
+
+
+def record(kind, item_id, now=None, amount=1):
+    """Засчитывает событие элементу в текущей корзине времени.
+
+    Счётчик элемента увеличивается атомарно. Первое событие элемента в
+    корзине занимает для него номер в списке корзины (не больше
+    TRENDING_TRACKED), по которому лучшие элементы собираются при чтении.
+    """
+    key = top_key(kind, current_bucket(now))
+    timeout = bucket_timeout()
+    if cache.add(f'{key}:{item_id}', amount, timeout):
+        slot = increment(f'{key}:slots', 1, timeout)
+        if slot <= settings.TRENDING_TRACKED:
+            cache.set(f'{key}:slot:{slot}', item_id, timeout)
+    else:
+        increment(f'{key}:{item_id}', amount, timeout)
+
+
+def remember_labels(instance):
+    """Кладёт в кэш подписи уже загруженных автора и группы.
+
+    Связи, которых нет в памяти, не читаются: их подписи загрузит
+    snapshot при показе.
+    """
+    labels = {}
+    for kind, label in (
+            ('author', lambda user: user.username),
+            ('group', lambda group: (group.slug, group.title))):
+        field = instance._meta.get_field(kind)
+        related = (
+            field.get_cached_value(instance)
+            if field.is_cached(instance) else None)
+        if related is not None:
+            labels[label_key(kind, related.pk)] = label(related)
+    cache.set_many(labels, bucket_timeout())
+
+
+def post_created(post):
+    for tag in parse_tags(post.text):
+        record('tag', tag)
+    if post.group_id:
+        record('group', post.group_id)
+    record('author', post.author_id)
+    remember_labels(post)
+
+
+def posts_published(posts):
+    """Засчитывает пачку постов, каждому элементу - одной записью."""
+    counts = Counter()
+    for post in posts:
+        for tag in parse_tags(post.text):
+            counts['tag', tag] += 1
+        counts['author', post.author_id] += 1
+        if post.group_id:
+            counts['group', post.group_id] += 1
+    for (kind, item_id), amount in counts.items():
+        record(kind, item_id, amount=amount)
+
+
+def comment_created(comment):
+    post = comment.post
+    record('post', post.pk)
+    for tag in parse_tags(post.text):
+        record('tag', tag)
+    if post.group_id:
+        record('group', post.group_id)
+
+
+def follow_created(follow):
+    record('author', follow.author_id)
+
+
+def bucket_counts(kind, bucket):
+    """Счётчики всех элементов корзины, собранные по её списку."""
+    key = top_key(kind, bucket)
+    slots = min(cache.get(f'{key}:slots', 0), settings.TRENDING_TRACKED)
+    items = cache.get_many(
+        [f'{key}:slot:{slot}' for slot in range(1, slots + 1)]).values()
+    counters = cache.get_many([f'{key}:{item_id}' for item_id in items])
+    return {
+        item_id: counters[f'{key}:{item_id}']
+        for item_id in items if f'{key}:{item_id}' in counters
+    }
+
+
+def close_bucket(kind, bucket):
+    """Сохраняет TRENDING_CAPACITY лучших элементов прошедшей корзины.
+
+    В прошедшую корзину события больше не пишутся, поэтому её итог
+    считается один раз.
+    """
+    counts = dict(heapq.nlargest(
+        settings.TRENDING_CAPACITY, bucket_counts(kind, bucket).items(),
+        key=itemgetter(1)))
+    cache.set(f'{top_key(kind, bucket)}:top', counts, bucket_timeout())
+    return counts
+
+
+def load_labels(kind, ids):
+    if kind == 'group':
+        return {
+            pk: (slug, title) for pk, slug, title in Group.objects.filter(
+                pk__in=ids).values_list('pk', 'slug', 'title')
+        }
+    if kind == 'author':
+        return dict(User.objects.filter(
+            pk__in=ids).values_list('pk', 'username'))
+    labels = {}
+    for alias in shard_aliases():
+        for pk, text in Post.objects.using(alias).published().filter(
+                pk__in=ids).values_list('pk', 'text'):
+            labels[pk] = (text or '')[:SNIPPET_LENGTH]
+    return labels
+
+
+def get_labels(items):
+    """Подписи элементов: из кэша, а недостающие - из базы."""
+    labels = {(kind, item_id): item_id for kind, item_id in items
+              if kind == 'tag'}
+    keys = {
+        label_key(kind, item_id): (kind, item_id)
+        for kind, item_id in items if kind != 'tag'
+    }
+    for key, label in cache.get_many(keys).items():
+        labels[keys[key]] = label
+    missing = defaultdict(list)
+    for kind, item_id in keys.values():
+        if (kind, item_id) not in labels:
+            missing[kind].append(item_id)
+    loaded = {}
+    for kind, ids in missing.items():
+        for item_id, label in load_labels(kind, ids).items():
+            labels[kind, item_id] = label
+            loaded[label_key(kind, item_id)] = label
+    cache.set_many(loaded, bucket_timeout())
+    return labels
+
+
+def snapshot(kinds=KINDS, limit=None, now=None):
+    """Лучшие элементы каждого вида за окно из TRENDING_WINDOW корзин.
+
+    Счёт корзины умножается на TRENDING_DECAY в степени её возраста,
+    поэтому старая активность плавно теряет вес. Текущая корзина
+    собирается из счётчиков, прошедшие - из итогов close_bucket, а
+    подписи лучших элементов читаются из кэша.
+    """
+    bucket = current_bucket(now)
+    keys = {
+        f'{top_key(kind, bucket - age)}:top': (kind, age)
+        for kind in kinds
+        for age in range(1, settings.TRENDING_WINDOW)
+    }
+    closed = {keys[key]: counts for key, counts in cache.get_many(
+        keys).items()}
+    shown = {}
+    for kind in kinds:
+        scores = defaultdict(float)
+        for age in range(settings.TRENDING_WINDOW):
+            if age == 0:
+                counts = bucket_counts(kind, bucket)
+            elif (kind, age) in closed:
+                counts = closed[kind, age]
+            else:
+                counts = close_bucket(kind, bucket - age)
+            weight = settings.TRENDING_DECAY ** age
+            for item_id, count in counts.items():
+                scores[item_id] += count * weight
+        shown[kind] = heapq.nlargest(
+            limit or settings.TRENDING_SHOWN, scores.items(),
+            key=itemgetter(1))
+    labels = get_labels(
+        {(kind, item_id) for kind in kinds for item_id, _ in shown[kind]})
+    return {
+        kind: [
+            {'id': item_id, 'label': labels[kind, item_id],
+             'score': round(score, 2)}
+            for item_id, score in shown[kind] if (kind, item_id) in labels
+        ]
+        for kind in kinds
+    }
+
+
+def top(kind, limit=None, now=None):
+    return snapshot((kind,), limit, now)[kind]
@@ -6,12 +6,21 @@ app_name = 'posts'
 urlpatterns = [
     path('', views.index, name='posts_index'),
     path('group/<slug:slug>/', views.group_posts, name='posts_group'),
+    path('tags/<str:tag>/', views.tag_posts, name='tag_posts'),
+    path('mentions/', views.mentions, name='mentions'),
+    path('drafts/', views.drafts, name='drafts'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<post_id>/edit/',
          views.post_edit,
          name='post_edit'),
+    path('posts/<int:post_id>/history/',
+         views.post_history,
+         name='post_history'),
+    path('posts/<int:post_id>/comments/<int:comment_id>/',
+         views.comment_thread,
+         name='comment_thread'),
     path('posts/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'),
@@ -26,4 +35,23 @@ urlpatterns = [
         views.profile_unfollow,
         name="profile_unfollow"
     ),
+    path(
+        'profile/<str:username>/mute/',
+        views.profile_mute,
+        name='profile_mute'
+    ),
+    path(
+        'profile/<str:username>/block/',
+        views.profile_mute,
+        {'blocked': True},
+        name='profile_block'
+    ),
+    path(
+        'profile/<str:username>/unmute/',
+        views.profile_unmute,
+        name='profile_unmute'
+    ),
+    path('group/<slug:slug>/mute/', views.group_mute, name='group_mute'),
+    path(
+        'group/<slug:slug>/unmute/', views.group_unmute, name='group_unmute'),
 ]
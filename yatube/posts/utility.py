@@ -1,7 +1,89 @@
+import base64
+import datetime
+import json
+import time
+
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, models
+from django.db.models import Max, Q
+
+COUNT_LIMIT = 10000
 
 
 def get_one_page(request, posts):
-    paginator = Paginator(posts, 10)
+    paginator = getattr(posts, 'paginator_class', Paginator)(posts, 10)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Даты с микросекундами: иначе курсор пропускает строки с той же
+    миллисекундой."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(obj, fields):
+    values = [getattr(obj, field) for field in fields]
+    data = json.dumps(values, cls=CursorEncoder).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor, fields):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != len(fields):
+        return None
+    return values
+
+
+def keyset_filter(queryset, fields, values):
+    """Записи строго после курсора при сортировке по убыванию полей."""
+    condition = Q()
+    equal = {}
+    for field, value in zip(fields, values):
+        condition |= Q(**equal, **{f'{field}__lt': value})
+        equal[field] = value
+    return queryset.filter(condition)
+
+
+def estimated_count(queryset):
+    """Оценка числа строк без полного прохода по таблице."""
+    if not queryset.query.where:
+        return queryset.aggregate(estimate=Max('pk'))['estimate'] or 0
+    return queryset.order_by()[:COUNT_LIMIT].count()
+
+
+def raw_delete(model, pks, using=DEFAULT_DB_ALIAS):
+    """Удаляет строки без загрузки объектов, повторяя on_delete связей."""
+    for relation in model._meta.related_objects:
+        related = relation.related_model._base_manager.using(using).filter(
+            **{f'{relation.field.name}__in': pks})
+        if relation.on_delete is models.CASCADE:
+            raw_delete(
+                relation.related_model,
+                list(related.values_list('pk', flat=True)),
+                using,
+            )
+        elif relation.on_delete is models.SET_NULL:
+            related.update(**{relation.field.name: None})
+    model._base_manager.using(using).filter(pk__in=pks)._raw_delete(using)
+
+
+def get_version(key):
+    """Версия данных в общем кэше; после сброса кэша она не повторяется."""
+    return cache.get_or_set(key, time.time_ns, None)
+
+
+def bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return get_version(key)
@@ -1,23 +1,49 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
-from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from core.pagecache import cache_page_with_holes
+from core.ratelimit import ratelimit
+
+from . import duplicates, trending
+from .archive import HotColdPosts, get_archived_post
+from .feeds import follow_feed
+from .forms import CommentForm, PostForm, PublicationForm
+from .models import Follow, Group, Mute, Post, PostMention, PostTag, User
+from .mutes import has_mutes, is_blocked, mute_filter
+from .recent import recent_posts
+from .related import related_posts
+from .revisions import texts
+from .sharding import find_post, get_post_or_404, shard_for_author
+from .tags import index_page
+from .threads import reply_parent, subtree, thread_page
 from .utility import get_one_page
 
+DUPLICATE_MESSAGE = 'Похожий текст уже публиковался'
+
 
-@cache_page(20)
+@cache_page_with_holes(personal=has_mutes)
 def index(request):
+    posts = mute_filter(request.user).apply(
+        recent_posts.index_posts(), 'index')
     return render(request, 'posts/index.html', {
-        'page_obj': get_one_page(request, Post.objects.all())
+        'page_obj': get_one_page(request, posts),
+        'trending': trending.snapshot(),
     }
     )
 
 
+@cache_page_with_holes(personal=has_mutes)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    found = recent_posts.group_posts(slug)
+    if found is None:
+        raise Http404('Группа не найдена')
+    group, posts = found
+    posts = mute_filter(request.user).without_group(group.pk).apply(
+        posts, f'group:{group.pk}')
     page_obj = get_one_page(request, posts)
     return render(
         request,
@@ -26,46 +52,115 @@ def group_posts(request, slug):
     )
 
 
+@cache_page_with_holes
+def tag_posts(request, tag):
+    tag = tag.lower()
+    return render(request, 'posts/tag_list.html', {
+        'heading': f'Записи с тегом #{tag}',
+        'page': index_page(PostTag, request.GET.get('cursor'), tag=tag),
+    })
+
+
+@login_required
+def mentions(request):
+    return render(request, 'posts/tag_list.html', {
+        'heading': 'Упоминания',
+        'page': index_page(
+            PostMention, request.GET.get('cursor'), user_id=request.user.pk),
+    })
+
+
+@cache_page_with_holes
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    posts = HotColdPosts(
+        author.posts.published(), author.archived_posts.all())
     page_obj = get_one_page(request, posts)
-    following = (request.user.is_authenticated
-                 and Follow.objects.filter(
-                     user=request.user,
-                     author=author).exists()
-                 )
     return render(
         request,
         'posts/profile.html',
-        {'page_obj': page_obj, 'author': author, 'following': following, }
+        {'page_obj': page_obj, 'author': author, }
     )
 
 
+@cache_page_with_holes
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comment = post.comments.all()
+    post = find_post(post_id)
+    if post is None:
+        post = get_archived_post(post_id)
+    elif not post.is_published:
+        raise Http404('Пост не опубликован')
+    threads, comment = thread_page(post.comments, request.GET.get('page'))
     form = CommentForm(request.POST or None)
     author = post.author
     context = {
         'post': post,
         'comment': comment,
+        'threads': threads,
+        'expanded_depth': settings.COMMENT_EXPANDED_DEPTH,
         'form': form,
         'author': author,
+        'related': related_posts(post.pk),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@cache_page_with_holes
+def comment_thread(request, post_id, comment_id):
+    post = find_post(post_id)
+    if post is None:
+        post = get_archived_post(post_id)
+    elif not post.is_published:
+        raise Http404('Пост не опубликован')
+    root = get_object_or_404(post.comments.all(), pk=comment_id)
+    return render(request, 'posts/comment_thread.html', {
+        'post': post,
+        'root': root,
+        'comment': subtree(post.comments, root),
+    })
+
+
+def post_history(request, post_id):
+    post = find_post(post_id)
+    if post is None:
+        post = get_archived_post(post_id)
+    elif not post.is_published and post.author != request.user:
+        raise Http404('Пост не опубликован')
+    page_obj = Paginator(
+        post.revisions.order_by('-number'), settings.REVISIONS_PER_PAGE,
+    ).get_page(request.GET.get('page'))
+    found = texts(
+        post.revisions.all(), [revision.number for revision in page_obj])
+    return render(request, 'posts/post_history.html', {
+        'post': post,
+        'page_obj': page_obj,
+        'history': [
+            (revision, found[revision.number]) for revision in page_obj],
+    })
+
+
 @login_required
+@ratelimit('post_create', '10/m', methods=('POST',))
 def post_create(request):
     template = 'posts/create_post.html'
     form = PostForm(request.POST or None)
-    if form.is_valid():
-        form.instance.author = request.user
-        form.save()
-        return redirect('posts:profile', username=request.user.username)
+    publication = PublicationForm(request.POST or None)
+    if all((form.is_valid(), publication.is_valid())):
+        signature, match = duplicates.check(form.cleaned_data['text'])
+        if duplicates.rejects(match):
+            form.add_error('text', DUPLICATE_MESSAGE)
+        else:
+            post = form.save(commit=False)
+            post.author = request.user
+            publication.apply(post)
+            post.save()
+            duplicates.remember(post, signature, match)
+            if not post.is_published:
+                return redirect('posts:drafts')
+            return redirect('posts:profile', username=request.user.username)
     context = {
         'form': form,
+        'publication': publication,
     }
     return render(request, template, context)
 
@@ -73,7 +168,7 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     template = 'posts/create_post.html'
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_post_or_404(post_id)
     if post.author != request.user:
         return redirect('posts:post_detail', post_id=post_id)
     form = PostForm(
@@ -81,31 +176,62 @@ def post_edit(request, post_id):
         files=request.FILES or None,
         instance=post
     )
-    if form.is_valid():
-        form.save()
+    publication = PublicationForm(request.POST or None, post=post)
+    if all((form.is_valid(), publication.is_valid())):
+        post = form.save(commit=False)
+        publication.apply(post)
+        post.save()
+        if not post.is_published:
+            return redirect('posts:drafts')
         return redirect('posts:post_detail', post_id=post_id)
     context = {
         'form': form,
+        'publication': publication,
     }
     return render(request, template, context)
 
 
 @login_required
+@ratelimit('add_comment', '20/m')
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_post_or_404(post_id)
+    if not post.is_published:
+        raise Http404('Пост не опубликован')
+    if is_blocked(request.user.pk, post.author_id):
+        raise PermissionDenied('Автор заблокировал вас')
     form = CommentForm(request.POST or None)
+    parent = None
+    if request.POST.get('parent', '').isdigit():
+        parent = reply_parent(
+            post.comments.filter(pk=request.POST['parent']).first())
     if form.is_valid():
-        comment = form.save(commit=False)
-        comment.author = request.user
-        comment.post = post
-        comment.save()
+        signature, match = duplicates.check(form.cleaned_data['text'])
+        if not duplicates.rejects(match):
+            comment = form.save(commit=False)
+            comment.author = request.user
+            comment.post = post
+            comment.parent = parent
+            comment.save()
+            duplicates.remember(comment, signature, match)
+    if parent is not None:
+        return redirect(
+            'posts:comment_thread', post_id=post_id, comment_id=parent.pk)
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@login_required
+def drafts(request):
+    posts = Post.objects.using(shard_for_author(request.user.pk)).filter(
+        author=request.user).exclude(status=Post.PUBLISHED).order_by(
+        'status', 'pub_date', 'pk')
+    return render(request, 'posts/drafts.html', {
+        'page_obj': get_one_page(request, posts),
+    })
+
+
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(
-        author__following__user=request.user)
+    posts = follow_feed(request.user)
     page_obj = get_one_page(request, posts)
     context = {
         'posts': posts,
@@ -115,10 +241,11 @@ def follow_index(request):
 
 
 @login_required
+@ratelimit('profile_follow', '30/m')
 def profile_follow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
-    if user != author:
+    if user != author and not is_blocked(user.pk, author.pk):
         Follow.objects.get_or_create(
             user=user,
             author=author,
@@ -131,3 +258,34 @@ def profile_unfollow(request, username):
     get_object_or_404(
         Follow, user=request.user, author__username=username).delete()
     return redirect('posts:profile', username=username)
+
+
+@login_required
+def profile_mute(request, username, blocked=False):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Mute.objects.update_or_create(
+            user=request.user, author=author, defaults={'blocked': blocked})
+        if blocked:
+            Follow.objects.filter(user=author, author=request.user).delete()
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+def profile_unmute(request, username):
+    Mute.objects.filter(
+        user=request.user, author__username=username).delete()
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+def group_mute(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    Mute.objects.get_or_create(user=request.user, group=group)
+    return redirect('posts:posts_group', slug=slug)
+
+
+@login_required
+def group_unmute(request, slug):
+    Mute.objects.filter(user=request.user, group__slug=slug).delete()
+    return redirect('posts:posts_group', slug=slug)
@@ -55,10 +55,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
@@ -101,8 +103,16 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    # 'archive': {
+    #     'ENGINE': 'django.db.backends.sqlite3',
+    #     'NAME': os.path.join(BASE_DIR, 'archive.sqlite3'),
+    # },
 }
+DATABASE_ROUTERS = (
+    'posts.routers.ShardRouter',
+    'posts.routers.ArchiveRouter',
+)
 
 
 # Password validation
@@ -139,6 +149,8 @@ USE_TZ = True
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'static_root')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:posts_index'
@@ -153,3 +165,66 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+USER_CACHE_TIMEOUT = 60 * 15
+PAGE_CACHE_TIMEOUT = 60
+PRERENDER_ROOT = os.path.join(BASE_DIR, 'prerendered')
+PRERENDER_ON_SAVE = False
+
+RATELIMIT_ENABLE = True
+RATELIMIT_CACHE = 'default'
+RATELIMIT_RATES = {}
+
+BULK_CHUNK_SIZE = 500
+BULK_BACKGROUND_THRESHOLD = 5000
+
+ARCHIVE_DATABASE = 'default'
+ARCHIVE_AFTER_DAYS = 365
+
+POST_SHARDS = ('default',)
+
+RECENT_POSTS_SIZE = 50
+RECENT_GROUPS_LIMIT = 100
+
+FEED_AUTHOR_POSTS = 100
+FEED_CACHE_TIMEOUT = 60 * 60 * 24
+
+RECOMMENDATIONS_TOP_K = 20
+RECOMMENDATIONS_SHOWN = 5
+RECOMMENDATIONS_BLOCK_SIZE = 500
+RECOMMENDATIONS_CACHE_TIMEOUT = 60 * 60 * 24
+
+DUPLICATE_ACTION = 'flag'
+DUPLICATE_THRESHOLD = 0.8
+DUPLICATE_MIN_LENGTH = 50
+DUPLICATE_CANDIDATES = 100
+
+RELATED_POSTS_TOP_K = 10
+RELATED_POSTS_SHOWN = 5
+RELATED_MIN_SCORE = 0.1
+RELATED_GROUP_WEIGHT = 0.5
+RELATED_BLOCK_SIZE = 500
+RELATED_CACHE_TIMEOUT = 60 * 60 * 24
+
+TRENDING_BUCKET_SECONDS = 60 * 5
+TRENDING_WINDOW = 12
+TRENDING_DECAY = 0.8
+TRENDING_CAPACITY = 50
+TRENDING_TRACKED = 1000
+TRENDING_SHOWN = 5
+
+FOLLOW_GRAPH_SAMPLE_RATE = 0.01
+
+COMMENT_THREADS_PER_PAGE = 20
+COMMENT_EXPANDED_DEPTH = 3
+COMMENT_MAX_DEPTH = 30
+
+REVISION_SNAPSHOT_EVERY = 10
+REVISION_KEEP_DAYS = 30
+REVISIONS_PER_PAGE = 10
+
+SOFT_DELETE_RETENTION_DAYS = 30
+
+MUTE_OVERFETCH = 2
+MUTE_SCAN_LIMIT = 200
+MUTES_CACHE_TIMEOUT = 60 * 60 * 24